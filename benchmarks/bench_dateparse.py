@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: разбор даты и времени (dateparse)
+
+Корпус фраз и случайные сочетания слов проверяются в
+tests/test_dateparse.py. Здесь измеряется:
+  • "ДД.ММ ЧЧ:ММ" через быстрый путь против прежней проверки
+    длины + двух strptime;
+  • фразы на естественном языке;
+  • выделение даты из сообщения целиком (split_when).
+
+Запуск: python benchmarks/bench_dateparse.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dateparse import parse_when, split_when
+
+REPEATS = 20_000
+TZ = pytz.timezone('Europe/Moscow')
+# Суббота, 17 октября 2026, 10:20:30
+NOW = TZ.localize(datetime(2026, 10, 17, 10, 20, 30))
+
+
+def old_check(date_text: str, time_text: str):
+    """Прежняя проверка из /add и диалога: длина, разделитель и strptime (дважды при переходе года)"""
+    if len(date_text) != 5 or date_text[2] != '.' or len(time_text) != 5 or time_text[2] != ':':
+        return None
+    moment = TZ.localize(datetime.strptime(f"{date_text}.{NOW.year} {time_text}", "%d.%m.%Y %H:%M"))
+    if moment <= NOW:
+        moment = TZ.localize(datetime.strptime(f"{date_text}.{NOW.year + 1} {time_text}", "%d.%m.%Y %H:%M"))
+    return moment
+
+
+def timed(label, func, inputs):
+    started = time.perf_counter()
+    for index in range(REPEATS):
+        func(inputs[index % len(inputs)])
+    elapsed = (time.perf_counter() - started) / REPEATS
+    print(f"{label:<40} {elapsed * 1e6:7.1f} мкс")
+
+
+def main():
+    canonical = ["25.12 14:30", "01.03 09:00", "10.10 18:45"]
+    timed("ДД.ММ ЧЧ:ММ — прежняя проверка", lambda phrase: old_check(*phrase.split()), canonical)
+    timed("ДД.ММ ЧЧ:ММ — parse_when", lambda phrase: parse_when(phrase, NOW), canonical)
+    natural = ["завтра в 9", "в пятницу 14:30", "через 2 часа", "25 декабря в 10:00", "послезавтра в 7 вечера"]
+    timed("естественный язык — parse_when", lambda phrase: parse_when(phrase, NOW), natural)
+    messages = ["Совещание 25.12 14:30", "Позвонить маме завтра в 9", "Оплатить счет за интернет 25 декабря"]
+    timed("сообщение целиком — split_when", lambda message: split_when(message, NOW), messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: отправка пачки напоминаний, пришедшихся на одну минуту
+
+Имитация Telegram с задержкой ответа и лимитами (при превышении —
+RetryAfter, сообщение не доставлено). Лимиты и задержка масштабированы
+в SCALE раз, чтобы прогон занимал секунды, а не минуты.
+
+Сравниваются:
+  • "подряд"    — send_message по одному (как было в планировщике);
+  • "все сразу" — все отправки одновременно, без лимитов;
+  • "очередь"   — DeliveryQueue с корзинами токенов и повторами.
+
+Затем — справедливость между группами: HOT_CHATS групп ставят
+по HOT_PER_CHAT сообщений (общий лимит бота не успевает за всеми),
+а через COLD_AFTER секунд еще COLD_CHATS групп — по одному сообщению.
+Измеряется, сколько ждут сообщения "тихих" групп.
+
+Запуск: python benchmarks/bench_delivery.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from telegram.error import RetryAfter
+
+from delivery import DeliveryQueue
+
+SCALE = 10              # во сколько раз ускорено "время Telegram"
+LATENCY = 0.1           # ответ Telegram на send_message, секунды
+GLOBAL_RATE = 30        # сообщений в секунду на бота
+GROUP_RATE = 20         # сообщений в минуту в группу
+CHATS = 80              # групп
+PER_CHAT = 5            # напоминаний на группу в одну минуту
+HOT_CHATS = 200
+HOT_PER_CHAT = 15
+COLD_CHATS = 20
+COLD_AFTER = 3.0        # секунды (ускоренного времени)
+
+
+class FakeTelegram:
+    """send_message с задержкой и лимитами Telegram (скользящее окно)"""
+
+    def __init__(self):
+        self.delivered = 0
+        self.rejected = 0
+        self._global = deque()
+        self._chats = defaultdict(deque)
+
+    @staticmethod
+    def _over_limit(window: deque, now: float, limit: int, period: float) -> bool:
+        while window and window[0] <= now - period:
+            window.popleft()
+        return len(window) >= limit
+
+    async def send_message(self, chat_id: int, text: str):
+        now = time.monotonic()
+        if (self._over_limit(self._global, now, GLOBAL_RATE * SCALE, 1)
+                or self._over_limit(self._chats[chat_id], now, GROUP_RATE, 60 / SCALE)):
+            self.rejected += 1
+            raise RetryAfter(1)
+        self._global.append(now)
+        self._chats[chat_id].append(now)
+        await asyncio.sleep(LATENCY / SCALE)
+        self.delivered += 1
+
+
+def messages():
+    return [(-1000 - chat, f"напоминание {n}") for n in range(PER_CHAT) for chat in range(CHATS)]
+
+
+async def sequential(bot):
+    for chat_id, text in messages():
+        try:
+            await bot.send_message(chat_id, text)
+        except RetryAfter:
+            pass
+
+
+async def all_at_once(bot):
+    async def send(chat_id, text):
+        try:
+            await bot.send_message(chat_id, text)
+        except RetryAfter:
+            pass
+    await asyncio.gather(*(send(chat_id, text) for chat_id, text in messages()))
+
+
+async def queued(bot):
+    queue = DeliveryQueue(
+        bot.send_message,
+        global_rate=GLOBAL_RATE * SCALE,
+        group_rate_per_minute=GROUP_RATE * SCALE,
+        concurrency=8,
+    )
+    queue.start()
+    for chat_id, text in messages():
+        queue.submit(chat_id, text)
+    await queue.stop(timeout=60)
+    return queue
+
+
+async def run(label, scenario):
+    bot = FakeTelegram()
+    start = time.perf_counter()
+    queue = await scenario(bot)
+    total = time.perf_counter() - start
+    line = (f"{label:<10} {total:6.2f} с | доставлено {bot.delivered:4d}, "
+            f"отклонено (429) {bot.rejected:4d}")
+    if queue is not None:
+        line += f" | пачка разобрана за {queue.last_drain_seconds:.2f} с"
+    print(line)
+
+
+async def fairness():
+    bot = FakeTelegram()
+    queue = DeliveryQueue(
+        bot.send_message,
+        global_rate=GLOBAL_RATE * SCALE,
+        group_rate_per_minute=GROUP_RATE * SCALE,
+        concurrency=8,
+    )
+    queue.start()
+    for n in range(HOT_PER_CHAT):
+        for chat in range(HOT_CHATS):
+            queue.submit(-1000 - chat, f"напоминание {n}")
+    await asyncio.sleep(COLD_AFTER)
+
+    waits = []
+
+    def on_done_for(submitted):
+        async def on_done(delivered: bool):
+            waits.append(time.monotonic() - submitted)
+        return on_done
+
+    backlog = queue.queue_depth
+    for chat in range(COLD_CHATS):
+        queue.submit(-5000 - chat, "напоминание", on_done_for(time.monotonic()))
+    await queue.stop(timeout=120)
+    waits.sort()
+    print(f"\n📊 {HOT_CHATS} групп по {HOT_PER_CHAT} сообщений, через {COLD_AFTER:.0f} с "
+          f"еще {COLD_CHATS} групп по одному (в очереди {backlog})")
+    print(f"тихие группы: ожидание медиана {waits[len(waits) // 2]:.2f} с, "
+          f"максимум {waits[-1]:.2f} с | всего разобрано за {queue.last_drain_seconds:.1f} с")
+
+
+async def main():
+    print(f"📊 {CHATS * PER_CHAT} сообщений в {CHATS} групп, лимиты {GLOBAL_RATE}/с и "
+          f"{GROUP_RATE}/мин на группу, время ускорено в {SCALE} раз\n")
+    await run("подряд", sequential)
+    await run("все сразу", all_at_once)
+    await run("очередь", queued)
+    await fairness()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: накладные расходы на сообщение в группе
+
+Синтетический лог группы: MESSAGES сообщений разной длины,
+из них ~1% — обращения к боту ("бот список", "Бот, найти ...").
+Каждое сообщение проходит выбор обработчика (MessageHandler.check_update)
+и, если обработчик выбран, разбор команды:
+  • "было" — filters.TEXT & filters.Chat, затем на каждом сообщении
+    lower() + re.sub + два регулярных выражения;
+  • "стало" — ADDRESSED_TO_BOT & filters.Chat: необращенные сообщения
+    отсекаются проверкой первых символов.
+
+Запуск: python benchmarks/bench_group_filter.py
+"""
+
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import MessageHandler, filters
+
+from group_commands import ADDRESSED_TO_BOT, parse_bot_command
+
+MESSAGES = 50_000
+ADDRESSED_SHARE = 0.01
+GROUP_CHAT_ID = -1002146448322
+
+WORDS = ["привет", "как", "дела", "завтра", "встреча", "в", "офисе", "ботинки", "купил",
+         "отчет", "готов", "смотрите", "таблицу", "👍", "ок", "спасибо", "созвон", "перенесли"]
+COMMANDS = ["бот список", "Бот, помощь", "бот найти встреча", "бот мои",
+            "бот напоминание Совещание 25.12 14:30", "бот! список"]
+
+
+def old_parse_bot_command(text: str):
+    """Прежний разбор — выполнялся для каждого сообщения группы"""
+    clean_text = re.sub(r'[^\w\s]', '', text.lower())
+    for pattern in (r'бот\s+(.+)', r'бот[!,.?]?\s*(.+)'):
+        match = re.match(pattern, clean_text)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+async def _noop(update, context):
+    pass
+
+
+def make_log(rng):
+    chat = Chat(GROUP_CHAT_ID, Chat.SUPERGROUP)
+    user = User(1, "Тест", False)
+    date = datetime.now(timezone.utc)
+    updates = []
+    for number in range(MESSAGES):
+        if rng.random() < ADDRESSED_SHARE:
+            text = rng.choice(COMMANDS)
+        else:
+            # Большинство сообщений короткие, некоторые — длинные простыни
+            length = rng.choice([3, 5, 8, 12, 20, 300])
+            text = " ".join(rng.choices(WORDS, k=length))
+        message = Message(number, date, chat, from_user=user, text=text)
+        updates.append(Update(number, message=message))
+    return updates
+
+
+def replay(label, handler, parse, updates):
+    started = time.perf_counter()
+    handled = 0
+    for update in updates:
+        if handler.check_update(update):
+            if parse(update.message.text):
+                handled += 1
+    elapsed = time.perf_counter() - started
+    print(f"{label:<6} {elapsed * 1e6 / len(updates):6.2f} мкс на сообщение | "
+          f"всего {elapsed * 1000:7.1f} мс | обработано команд {handled}")
+
+
+def main():
+    updates = make_log(random.Random(5))
+    print(f"📊 {MESSAGES} сообщений, обращений к боту ~{ADDRESSED_SHARE:.0%}\n")
+
+    old = MessageHandler(filters.TEXT & filters.Chat(chat_id=GROUP_CHAT_ID), _noop)
+    new = MessageHandler(ADDRESSED_TO_BOT & filters.Chat(chat_id=GROUP_CHAT_ID), _noop)
+    replay("было", old, old_parse_bot_command, updates)
+    replay("стало", new, parse_bot_command, updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: поиск по индексу напоминаний (/find, /mine, /list ДД.ММ-ДД.ММ)
+
+50 000 неотправленных напоминаний со случайным текстом из словаря
+в несколько тысяч слов, 200 авторов, сроки на год вперед.
+Измеряется построение индекса, типичные запросы и точечные изменения.
+
+Запуск: python benchmarks/bench_index.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import Reminder
+from storage import ReminderIndex
+
+REMINDERS = 50_000
+AUTHORS = 200
+REPEATS = 200
+
+COMMON = ["встреча", "совещание", "оплата", "счет", "проект", "отчет", "звонок",
+          "клиент", "ёлка", "праздник", "врач", "зарплата", "договор", "день", "рождения"]
+SYLLABLES = ["ка", "ро", "ми", "ла", "то", "ве", "ны", "за", "пу", "ше", "до", "ри"]
+
+
+def make_rows(rng):
+    vocabulary = COMMON + list({"".join(rng.choices(SYLLABLES, k=3)) for _ in range(5000)})
+    start = 1_800_000_000
+    rows = []
+    for reminder_id in range(1, REMINDERS + 1):
+        words = rng.sample(COMMON, 1) + rng.sample(vocabulary, 3)
+        author = f"user{rng.randrange(AUTHORS)}"
+        rows.append(Reminder(reminder_id, " ".join(words), start + rng.randrange(365 * 86400), author=author))
+    return rows, start
+
+
+def timed(label, func, repeats=REPEATS):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed = (time.perf_counter() - started) / repeats
+    size = len(result) if result is not None else 0
+    print(f"{label:<42} {elapsed * 1000:8.3f} мс  ({size} шт.)")
+
+
+def main():
+    rng = random.Random(7)
+    rows, start = make_rows(rng)
+    index = ReminderIndex()
+
+    started = time.perf_counter()
+    index.load(rows)
+    print(f"📊 {REMINDERS} напоминаний, индекс построен за {time.perf_counter() - started:.2f} с\n")
+
+    rare = rows[123].text.split()[2]
+    timed(f"/find {rare} (редкое слово)", lambda: index.select(words=rare))
+    timed(f"/find {rare[:4]} (начало слова)", lambda: index.select(words=rare[:4]))
+    timed("/find ёлка праздник (два частых слова)", lambda: index.select(words="елка праздник"))
+    timed("/mine (автор)", lambda: index.select(author="user42"))
+    week = (start + 30 * 86400, start + 37 * 86400)
+    timed("/list ДД.ММ-ДД.ММ (неделя)", lambda: index.select(start=week[0], end=week[1]))
+    timed("/list — страница 100", lambda: index.page(100, 10)[0])
+
+    started = time.perf_counter()
+    for offset in range(1000):
+        index.upsert(REMINDERS + offset + 1, start + offset, ["новое напоминание", '', '', '', 'bench', '', '', ''])
+    for offset in range(1000):
+        index.remove(REMINDERS + offset + 1)
+    print(f"\nДобавление + удаление: {(time.perf_counter() - started) / 2000 * 1e6:.1f} мкс на операцию")
+
+
+if __name__ == "__main__":
+    main()
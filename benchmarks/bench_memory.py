@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: память на напоминания — строки-списки против Reminder
+
+100 000 напоминаний в двух видах:
+  • "строки"   — списки из 8 строк, как их отдает gspread/SQLite
+                 (каждое значение — отдельный объект str);
+  • "Reminder" — записи с __slots__, разобранные один раз при загрузке.
+Память считается через tracemalloc (все объекты, включая строки),
+плюс время получения срока всех напоминаний: strptime колонки G
+при каждом обращении против готового epoch.
+
+Запуск: python benchmarks/bench_memory.py
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import STATUS_NOT_SENT, Reminder
+from recurrence import REPEAT_OPTIONS
+
+REMINDERS = 100_000
+AUTHORS = 200
+DATETIME_FORMAT = "%d.%m.%Y %H:%M"
+TZ = pytz.timezone('Europe/Moscow')
+
+WORDS = ["встреча", "оплата", "счет", "проект", "отчет", "звонок", "клиент", "врач", "договор"]
+
+
+def make_rows(rng):
+    """Строки A-H; каждое значение — новый объект str, как после разбора JSON/SQLite"""
+    start = 1_800_000_000
+    rows = []
+    for _ in range(REMINDERS):
+        due = datetime.fromtimestamp(start + rng.randrange(365 * 86400), TZ)
+        rows.append([
+            " ".join(rng.sample(WORDS, 3)) + f" {rng.randrange(1000)}",
+            due.strftime("%d.%m"),
+            due.strftime("%H:%M"),
+            "".join(rng.choice(REPEAT_OPTIONS)),
+            f"@user{rng.randrange(AUTHORS)}",
+            due.strftime(DATETIME_FORMAT),
+            due.strftime(DATETIME_FORMAT),
+            "".join(STATUS_NOT_SENT),
+        ])
+    return rows
+
+
+def parse_due(value: str) -> float:
+    return TZ.localize(datetime.strptime(value, DATETIME_FORMAT)).timestamp()
+
+
+def measure(build):
+    """Память (байты), которую занимает результат build()"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    print(f"📊 {REMINDERS} напоминаний, {AUTHORS} авторов\n")
+
+    rows, rows_size = measure(lambda: make_rows(random.Random(1)))
+    print(f"{'строки (list of lists)':<26} {rows_size / 2**20:7.1f} МБ  ({rows_size / REMINDERS:5.0f} Б на напоминание)")
+
+    # Reminder строятся из таких же "свежих" строк, сами строки после разбора не хранятся
+    def build_reminders():
+        source = make_rows(random.Random(1))
+        reminders = [
+            Reminder.from_row(reminder_id, row, parse_due(row[6]))
+            for reminder_id, row in enumerate(source, start=1)
+        ]
+        source.clear()
+        return reminders
+
+    reminders, reminders_size = measure(build_reminders)
+    print(f"{'Reminder (__slots__)':<26} {reminders_size / 2**20:7.1f} МБ  ({reminders_size / REMINDERS:5.0f} Б на напоминание)")
+    print(f"\nЭкономия памяти: {(1 - reminders_size / rows_size) * 100:.0f}%")
+
+    # Обход всех напоминаний с получением срока — как при постановке в планировщик
+    started = time.perf_counter()
+    for row in rows:
+        parse_due(row[6])
+    parse_each = time.perf_counter() - started
+    started = time.perf_counter()
+    for reminder in reminders:
+        datetime.fromtimestamp(reminder.due_at, TZ)
+    from_epoch = time.perf_counter() - started
+    print(f"Срок всех напоминаний: strptime {parse_each * 1000:.0f} мс, из epoch {from_epoch * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: цена метрик на горячих путях
+
+Замеры стоят на каждом обновлении, вызове Sheets и отправке,
+поэтому измеряется, сколько они добавляют:
+  • Histogram.observe и Counter.inc с метками;
+  • обработчик с @metrics.instrument против того же без обертки;
+  • выдача /metrics (render) после типичного набора серий.
+
+Запуск: python benchmarks/bench_metrics.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import metrics
+
+REPEATS = 200_000
+HANDLERS = ['add_command', 'list_command', 'delete_command', 'handle_repeat_selection', 'handle_group_message']
+
+
+def timed(label, func, repeats=REPEATS):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    elapsed = (time.perf_counter() - started) / repeats
+    print(f"{label:<38} {elapsed * 1e6:7.3f} мкс")
+    return elapsed
+
+
+async def handler(update, context):
+    return None
+
+
+async def run_handlers(func, repeats=REPEATS):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await func(None, None)
+    return (time.perf_counter() - started) / repeats
+
+
+async def main():
+    histogram = metrics.Histogram('bench_seconds', 'бенчмарк')
+    counter = metrics.Counter('bench_total', 'бенчмарк')
+    timed("Histogram.observe(handler=...)", lambda: histogram.observe(0.012, handler='list_command'))
+    timed("Counter.inc(outcome=...)", lambda: counter.inc(outcome='sent'))
+
+    bare = await run_handlers(handler)
+    wrapped = await run_handlers(metrics.instrument(handler))
+    print(f"{'обработчик без обертки':<38} {bare * 1e6:7.3f} мкс")
+    print(f"{'обработчик с @metrics.instrument':<38} {wrapped * 1e6:7.3f} мкс "
+          f"(+{(wrapped - bare) * 1e6:.3f})")
+
+    # Типичный набор серий: обработчики, операции gspread, исходы отправки
+    for name in HANDLERS:
+        metrics.HANDLER_SECONDS.observe(0.01, handler=name)
+    for operation in ['append_rows', 'batch_update', 'get_all_values', 'delete_rows']:
+        metrics.SHEETS_SECONDS.observe(0.3, operation=operation)
+        metrics.SHEETS_CALLS.inc(operation=operation, outcome='ok')
+    for outcome in ['sent', 'retry', 'rate_limited', 'failed']:
+        metrics.SENDS.inc(outcome=outcome)
+    metrics.SEND_SECONDS.observe(0.08)
+    size = len(metrics.render())
+    timed(f"render() — {size} байт", metrics.render, repeats=2_000)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: бот целиком без Telegram и Google
+
+Настоящее приложение из bot.build_application (те же обработчики,
+хранилище SQLite с зеркалом в таблице, планировщик и очередь отправки)
+работает с поддельными Telegram и Google Sheets из fakes.py:
+Bot API — HTTP-сервер на localhost, лист — в памяти с задержкой
+SHEETS_LATENCY и квотой SHEETS_QUOTA запросов в минуту.
+Обновления кладутся в очередь приложения так же, как их кладет вебхук.
+
+Сценарии:
+  • "диалог /add" — USERS пользователей за SPREAD секунд начинают /add
+    (текст, дата, время, кнопка): каждый ждет ответа бота на шаг
+    и THINK секунд "думает" перед следующим;
+  • "группы"      — GROUP_MESSAGES сообщений в GROUPS группах разом,
+    к боту обращена доля ADDRESSED_SHARE ("бот список", "бот найти ...");
+  • "рассылка"    — REMINDERS напоминаний с одним сроком в REMINDER_CHATS
+    группах: от срока до прихода sendMessage на сервер Telegram.
+Для каждого — пропускная способность и задержка p50/p99. Вывод самого
+бота собирается отдельно, в конце — число предупреждений и ошибок в нем.
+
+Запуск: python benchmarks/bench_offline.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Настройки бота читаются при импорте: отдельная база, все группы, без сервера метрик
+_workdir = tempfile.mkdtemp(prefix='bench_offline_')
+os.environ.update({
+    'BOT_TOKEN': '123456:OFFLINE',
+    'DATABASE_PATH': os.path.join(_workdir, 'reminders.db'),
+    'STORAGE_BACKEND': 'sqlite',
+    'GROUP_CHAT_IDS': '*',
+    'METRICS_PORT': '0',
+})
+
+from telegram import Update
+
+import bot
+import metrics
+from fakes import FakeTelegram, FakeWorksheet
+from models import Reminder
+from recurrence import REPEAT_OPTIONS
+
+USERS = 30
+SPREAD = 5.0            # пользователи начинают диалог в течение SPREAD секунд
+THINK = (0.5, 2.0)      # пауза пользователя между шагами, секунды
+GROUPS = 20
+GROUP_MESSAGES = 2000
+ADDRESSED_SHARE = 0.02
+REMINDERS = 300
+REMINDER_CHATS = 100
+SHEETS_LATENCY = 0.3
+SHEETS_JITTER = 0.1
+SHEETS_QUOTA = 60
+REPLY_TIMEOUT = 30
+TELEGRAM_RATE = 30      # сообщений в секунду на бота
+TELEGRAM_GROUP_RATE = 20  # сообщений в минуту в группу
+
+# Отчет — в настоящий stdout, вывод бота перехватывается
+OUT = sys.stdout
+warnings.filterwarnings("ignore", message="If 'per_message=False'")
+
+GROUP_WORDS = ["привет", "как", "дела", "завтра", "встреча", "в", "офисе", "отчет", "готов", "👍", "ок"]
+GROUP_COMMANDS = ["бот список", "бот найти встреча", "бот помощь", "бот мои"]
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def report(label, count, elapsed, latencies, failed=0):
+    line = f"{label:<13} {count:5} за {elapsed:6.2f} с | {count / elapsed:7.1f}/с"
+    if latencies:
+        line += (f" | p50 {statistics.median(latencies) * 1000:7.1f} мс"
+                 f" | p99 {percentile(latencies, 0.99) * 1000:7.1f} мс")
+    if failed:
+        line += f" | без ответа {failed}"
+    print(line, file=OUT, flush=True)
+
+
+class Harness:
+    """Приложение бота с поддельными Telegram и таблицей и генератор обновлений"""
+
+    def __init__(self, telegram: FakeTelegram, sheet: FakeWorksheet):
+        self.telegram = telegram
+        self.sheet = sheet
+        self.application = None
+        self._update_id = 0
+        self._message_id = 1_000_000
+        self.log = io.StringIO()
+
+    async def start(self):
+        await self.telegram.start()
+        self.application = bot.build_application(
+            self.sheet, base_url=self.telegram.base_url, polling=False
+        )
+        await self.application.initialize()
+        await self.application.post_init(self.application)
+        await self.application.start()
+
+    async def stop(self):
+        await self.application.stop()
+        await self.application.shutdown()
+        await self.application.post_shutdown(self.application)
+        await self.telegram.stop()
+
+    def _base(self, chat_id: int, user: dict) -> dict:
+        self._update_id += 1
+        self._message_id += 1
+        chat_type = 'private' if chat_id > 0 else 'supergroup'
+        return {
+            'message_id': self._message_id, 'date': int(time.time()), 'from': user,
+            'chat': {'id': chat_id, 'type': chat_type, 'title': f'Группа {chat_id}'},
+        }
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'Тест {user_id}', 'username': f'user{user_id}'}
+
+    async def send_text(self, chat_id: int, user_id: int, text: str) -> int:
+        """Кладет текстовое сообщение в очередь; возвращает его message_id"""
+        message = self._base(chat_id, self._user(user_id))
+        message['text'] = text
+        if text.startswith('/'):
+            command = text.split()[0]
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+        update = Update.de_json({'update_id': self._update_id, 'message': message}, self.application.bot)
+        await self.application.update_queue.put(update)
+        return message['message_id']
+
+    async def press(self, chat_id: int, user_id: int, data: str):
+        """Нажатие кнопки под последним сообщением бота"""
+        bot_user = self.application.bot.bot
+        message = self._base(chat_id, {'id': bot_user.id, 'is_bot': True, 'first_name': bot_user.first_name})
+        message['text'] = '📌 Выберите тип повторения:'
+        query = {
+            'id': str(self._update_id), 'from': self._user(user_id),
+            'chat_instance': str(chat_id), 'data': data, 'message': message,
+        }
+        update = Update.de_json({'update_id': self._update_id, 'callback_query': query}, self.application.bot)
+        await self.application.update_queue.put(update)
+
+    async def step(self, chat_id: int, action: Callable[[], Awaitable]) -> float:
+        """Шаг пользователя: действие и ожидание ответа бота; возвращает задержку"""
+        reply = self.telegram.expect(chat_id)
+        started = time.perf_counter()
+        await action()
+        sent = await asyncio.wait_for(reply, REPLY_TIMEOUT)
+        return sent.at - started
+
+
+async def add_dialogues(harness: Harness):
+    """Каждый пользователь проходит /add в личном чате и ждет ответа на каждый шаг"""
+    latencies, failed = [], 0
+
+    async def user(number: int):
+        nonlocal failed
+        rng = random.Random(number)
+        user_id = 10_000 + number
+        steps = [
+            lambda: harness.send_text(user_id, user_id, '/add'),
+            lambda: harness.send_text(user_id, user_id, f'Встреча {number}'),
+            lambda: harness.send_text(user_id, user_id, 'завтра'),
+            lambda: harness.send_text(user_id, user_id, '14:30'),
+            lambda: harness.press(user_id, user_id, 'repeat_0'),
+        ]
+        await asyncio.sleep(rng.uniform(0, SPREAD))
+        for action in steps:
+            try:
+                latencies.append(await harness.step(user_id, action))
+            except asyncio.TimeoutError:
+                failed += 1
+                return
+            await asyncio.sleep(rng.uniform(*THINK))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(number) for number in range(USERS)))
+    report("диалог /add", len(latencies), time.perf_counter() - started, latencies, failed)
+
+
+async def group_burst(harness: Harness):
+    """Поток сообщений в группах разом; задержка — для обращений к боту"""
+    rng = random.Random(5)
+    replies = []
+    started = time.perf_counter()
+    for number in range(GROUP_MESSAGES):
+        chat_id = -1_000_000 - rng.randrange(GROUPS)
+        user_id = 20_000 + rng.randrange(200)
+        if rng.random() < ADDRESSED_SHARE:
+            text = rng.choice(GROUP_COMMANDS)
+            # message_id этого сообщения будет следующим
+            reply = harness.telegram.expect(chat_id, harness._message_id + 1)
+            queued_at = time.perf_counter()
+            await harness.send_text(chat_id, user_id, text)
+            replies.append((queued_at, reply))
+        else:
+            await harness.send_text(chat_id, user_id, " ".join(rng.choices(GROUP_WORDS, k=rng.choice([3, 8, 20]))))
+    await harness.application.update_queue.join()
+    processed = time.perf_counter() - started
+
+    if replies:
+        await asyncio.wait([reply for _, reply in replies], timeout=REPLY_TIMEOUT)
+    latencies = [reply.result().at - queued_at for queued_at, reply in replies if reply.done()]
+    failed = len(replies) - len(latencies)
+    report("группы", GROUP_MESSAGES, processed, latencies, failed)
+
+
+async def mass_firing(harness: Harness):
+    """REMINDERS напоминаний на одну секунду — через хранилище и планировщик бота"""
+    application = harness.application
+    storage = application.bot_data['storage']
+    scheduler = application.bot_data['scheduler']
+    tz = bot.TIMEZONE
+    due = datetime.now(tz).replace(microsecond=0) + timedelta(seconds=5)
+    tags = {}
+    for number in range(REMINDERS):
+        chat_id = -2_000_000 - number % REMINDER_CHATS
+        text = f"Рассылка {number}"
+        reminder_id, moment = await bot.save_reminder_with_datetime(
+            storage, text, due, REPEAT_OPTIONS[0], "bench", chat_id
+        )
+        bot.schedule_reminder(scheduler, Reminder(
+            reminder_id, text, int(moment.timestamp()), 0, "bench", chat_id=chat_id
+        ), tz)
+        tags[text] = chat_id
+
+    # Срок в шкале perf_counter, в которой сервер отмечает приход сообщений
+    due_at = time.perf_counter() + (due.timestamp() - time.time())
+    first = len(harness.telegram.sent)
+    deadline = due_at + REMINDERS / TELEGRAM_RATE * 3 + 30
+    delivered = {}
+    while len(delivered) < REMINDERS and time.perf_counter() < deadline:
+        await asyncio.sleep(0.2)
+        for sent in harness.telegram.sent[first:]:
+            for line in sent.text.splitlines():
+                if line.startswith('📝 ') and line[2:].strip() in tags:
+                    delivered.setdefault(line[2:].strip(), sent.at)
+    latencies = [at - due_at for at in delivered.values()]
+    elapsed = max(delivered.values()) - due_at if delivered else 0.0
+    report("рассылка", len(delivered), max(elapsed, 1e-9), latencies, REMINDERS - len(delivered))
+
+
+async def main():
+    telegram = FakeTelegram(
+        os.environ['BOT_TOKEN'], global_rate=TELEGRAM_RATE, group_rate_per_minute=TELEGRAM_GROUP_RATE
+    )
+    sheet = FakeWorksheet(latency=SHEETS_LATENCY, jitter=SHEETS_JITTER, quota_per_minute=SHEETS_QUOTA)
+    harness = Harness(telegram, sheet)
+    print(f"📊 Sheets: {SHEETS_LATENCY * 1000:.0f}±{SHEETS_JITTER * 1000:.0f} мс, квота {SHEETS_QUOTA}/мин; "
+          f"Telegram: {TELEGRAM_RATE}/с, {TELEGRAM_GROUP_RATE}/мин на группу\n", flush=True)
+    with contextlib.redirect_stdout(harness.log), contextlib.redirect_stderr(harness.log):
+        await harness.start()
+        try:
+            await add_dialogues(harness)
+            await group_burst(harness)
+            await mass_firing(harness)
+        finally:
+            await harness.stop()
+
+    problems = [line for line in harness.log.getvalue().splitlines() if line.startswith(('⚠️', '❌'))]
+    sheets_calls = sum(sheet.calls.values())
+    print(f"\nSheets: запросов {sheets_calls} ({dict(sheet.calls)}), ошибок квоты {sheet.quota_errors}")
+    print(f"Telegram: вызовов {sum(telegram.calls.values())}, ответов 429: {telegram.rate_limited}")
+    print(f"Обработчики с исключениями: {int(sum(metrics.HANDLER_ERRORS._values.values()))}, "
+          f"предупреждений в логе бота: {len(problems)}")
+    for line in problems[:5]:
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: состояние диалогов /add в SQLite (persistence.py)
+
+  • "записи"     — USERS пользователей проходят /add (5 шагов с паузой
+    THINK): сколько изменений состояния передал PTB и сколько раз оно
+    записывалось в базу. Раньше каждое изменение было бы отдельной
+    записью, теперь — одна транзакция на интервал PERSISTENCE_INTERVAL;
+  • "перезапуск" — пользователи вводят текст и дату, бот
+    останавливается и запускается заново с той же базой, после чего
+    пользователи присылают время и нажимают кнопку: диалог должен
+    продолжиться, а напоминание — сохраниться с текстом, введенным
+    до перезапуска.
+Telegram и таблица — поддельные (fakes.py), приложение — настоящее
+(bot.build_application), как в bench_offline.py.
+
+Запуск: python benchmarks/bench_persistence.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_offline import Harness
+
+import bot
+from fakes import FakeTelegram, FakeWorksheet
+
+USERS = 30
+THINK = (0.2, 0.8)
+PERSISTENCE_INTERVAL = 1.0
+REPLY_TIMEOUT = 30
+
+
+def count_changes(application) -> dict:
+    """Подсчет изменений, которые PTB передает в хранилище состояний"""
+    persistence = application.persistence
+    counter = {'changes': 0}
+
+    def counted(method):
+        async def wrapper(*args, **kwargs):
+            counter['changes'] += 1
+            await method(*args, **kwargs)
+        return wrapper
+
+    persistence.update_user_data = counted(persistence.update_user_data)
+    persistence.update_conversation = counted(persistence.update_conversation)
+    return counter
+
+
+async def start(harness: Harness):
+    harness.application = bot.build_application(
+        harness.sheet, base_url=harness.telegram.base_url, polling=False
+    )
+    await harness.application.initialize()
+    await harness.application.post_init(harness.application)
+    await harness.application.start()
+
+
+async def stop(harness: Harness):
+    await harness.application.stop()
+    await harness.application.shutdown()
+    await harness.application.post_shutdown(harness.application)
+
+
+async def reply_to(harness: Harness, chat_id: int, action):
+    """Действие пользователя и ответ бота на него (None — ответа нет)"""
+    reply = harness.telegram.expect(chat_id)
+    await action()
+    try:
+        return await asyncio.wait_for(reply, REPLY_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+
+
+async def walk(harness: Harness, user_id: int, steps) -> list:
+    rng = random.Random(user_id)
+    replies = []
+    for action in steps:
+        replies.append(await reply_to(harness, user_id, action))
+        await asyncio.sleep(rng.uniform(*THINK))
+    return replies
+
+
+def user_steps(harness: Harness, user_id: int, texts, press=False):
+    steps = [lambda text=text: harness.send_text(user_id, user_id, text) for text in texts]
+    if press:
+        steps.append(lambda: harness.press(user_id, user_id, 'repeat_0'))
+    return steps
+
+
+def saved(reply, number: int) -> bool:
+    return reply is not None and reply.text.startswith('✅') and f'Встреча {number}' in reply.text
+
+
+async def writes(harness: Harness):
+    await start(harness)
+    counter = count_changes(harness.application)
+    transactions = harness.application.persistence.transactions
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        walk(harness, 30_000 + number, user_steps(
+            harness, 30_000 + number, ['/add', f'Встреча {number}', 'завтра', '14:30'], press=True
+        ))
+        for number in range(USERS)
+    ))
+    elapsed = time.perf_counter() - started
+    await stop(harness)
+    transactions = harness.application.persistence.transactions - transactions
+    completed = sum(saved(replies[-1], number) for number, replies in enumerate(results))
+    return (f"записи: диалогов {completed}/{USERS} за {elapsed:.1f} с | изменений состояния "
+            f"{counter['changes']} | транзакций в базе {transactions}")
+
+
+async def restart(harness: Harness):
+    await start(harness)
+    await asyncio.gather(*(
+        walk(harness, 40_000 + number, user_steps(
+            harness, 40_000 + number, ['/add', f'Встреча {number}', 'завтра']
+        ))
+        for number in range(USERS)
+    ))
+    await stop(harness)
+
+    await start(harness)
+    results = await asyncio.gather(*(
+        walk(harness, 40_000 + number, user_steps(harness, 40_000 + number, ['14:30'], press=True))
+        for number in range(USERS)
+    ))
+    await stop(harness)
+    completed = sum(saved(replies[-1], number) for number, replies in enumerate(results))
+    return f"перезапуск: диалогов продолжено после перезапуска {completed}/{USERS}"
+
+
+async def main():
+    bot.PERSISTENCE_INTERVAL = PERSISTENCE_INTERVAL
+    bot.DATABASE_PATH = os.path.join(os.path.dirname(os.environ['DATABASE_PATH']), 'persistence.db')
+    print(f"📊 Пользователей: {USERS}, состояние сохраняется раз в {PERSISTENCE_INTERVAL:.0f} с\n")
+    telegram = FakeTelegram(os.environ['BOT_TOKEN'], global_rate=None, group_rate_per_minute=None)
+    harness = Harness(telegram, FakeWorksheet(latency=0.01))
+    await telegram.start()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        lines = [await writes(harness), await restart(harness)]
+    await telegram.stop()
+    for line in lines:
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
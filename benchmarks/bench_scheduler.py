@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: планировщик на куче против колеса таймеров
+
+Сценарий "очень много напоминаний":
+  • REMINDERS напоминаний, разбросанных по месяцу вперед;
+  • из них DENSE приходится на одну "круглую" минуту (09:00);
+  • часть напоминаний отменяется (удаление через /del).
+Измеряется вставка, отмена и выборка созревших напоминаний
+без ожидания реального времени (pop_due вызывается с нужным now).
+
+Запуск: python benchmarks/bench_scheduler.py
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from scheduler import ReminderScheduler, TimerWheelScheduler
+
+REMINDERS = 100_000     # всего напоминаний
+DENSE = 20_000          # из них на одну минуту
+CANCELLED = 10_000      # отменяется
+SPAN_DAYS = 30          # горизонт планирования
+
+TZ = pytz.timezone('Europe/Moscow')
+
+
+async def _noop(key, payload):
+    pass
+
+
+def make_schedule(now: datetime):
+    """Одинаковый набор сроков для обоих планировщиков"""
+    rng = random.Random(42)
+    dense_at = (now + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    dues = [dense_at] * DENSE
+    dues += [now + timedelta(seconds=rng.randrange(60, SPAN_DAYS * 86400)) for _ in range(REMINDERS - DENSE)]
+    cancelled = rng.sample(range(REMINDERS), CANCELLED)
+    return dues, cancelled, dense_at
+
+
+def run(label, scheduler, dues, cancelled, dense_at):
+    start = time.perf_counter()
+    for key, due in enumerate(dues):
+        scheduler.schedule(key, due)
+    inserted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in cancelled:
+        scheduler.cancel(key)
+    cancel_time = time.perf_counter() - start
+
+    # Все, что созрело до плотной минуты, — "обычная" работа цикла
+    before = dense_at.timestamp() - 60
+    start = time.perf_counter()
+    fired_before = 0
+    step = before - 86400 * 0.5
+    while step < before:
+        fired_before += len(scheduler.pop_due(step))
+        step += 3600
+    fired_before += len(scheduler.pop_due(before))
+    drain_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fired_dense = len(scheduler.pop_due(dense_at.timestamp()))
+    dense_time = time.perf_counter() - start
+
+    print(
+        f"{label:<6} вставка {inserted * 1000:8.1f} мс | отмена {cancel_time * 1000:6.1f} мс | "
+        f"до 09:00 {fired_before:6d} шт. за {drain_time * 1000:7.1f} мс | "
+        f"09:00 {fired_dense:6d} шт. за {dense_time * 1000:6.1f} мс"
+    )
+
+
+def main():
+    now = datetime.now(TZ)
+    dues, cancelled, dense_at = make_schedule(now)
+    print(f"📊 {REMINDERS} напоминаний на {SPAN_DAYS} дней, {DENSE} на одну минуту, "
+          f"{CANCELLED} отменено\n")
+
+    run("heap", ReminderScheduler(_noop), dues, cancelled, dense_at)
+    run("wheel", TimerWheelScheduler(_noop), dues, cancelled, dense_at)
+
+
+if __name__ == "__main__":
+    main()
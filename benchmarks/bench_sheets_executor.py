@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: задержка обработчиков при медленной Google Таблице
+
+Сравнивает два варианта:
+  • "до"    — gspread вызывается прямо внутри async-обработчика
+  • "после" — вызовы идут через SheetsExecutor / ReminderRepository
+
+Параллельно с записями в таблицу запускаются "легкие" обработчики
+(как /help), которым таблица не нужна, и измеряется их задержка.
+
+Запуск: python benchmarks/bench_sheets_executor.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from storage import ReminderRepository, SheetsExecutor, SheetsWriteQueue
+
+SHEET_LATENCY = 0.2     # задержка одного запроса к таблице, секунды
+WRITERS = 10            # обработчиков, пишущих в таблицу
+LIGHT_HANDLERS = 50     # легких обработчиков
+
+
+class SlowSheet:
+    """Имитация gspread.Worksheet с фиксированной задержкой"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.rows = [['Текст', 'Дата', 'Время', 'Повторение', 'Кто добавил',
+                      'Когда добавлено', 'Время напоминания', 'Статус отправки']]
+
+    def get_all_values(self):
+        time.sleep(self.latency)
+        return [list(row) for row in self.rows]
+
+    def append_row(self, row):
+        time.sleep(self.latency)
+        self.rows.append(list(row))
+        n = len(self.rows)
+        return {'updates': {'updatedRange': f'Лист1!A{n}:H{n}'}}
+
+    def append_rows(self, rows):
+        time.sleep(self.latency)
+        first = len(self.rows) + 1
+        self.rows.extend(list(row) for row in rows)
+        return {'updates': {'updatedRange': f'Лист1!A{first}:H{len(self.rows)}'}}
+
+    def update(self, range_name, values):
+        time.sleep(self.latency)
+
+    def batch_update(self, data):
+        time.sleep(self.latency)
+
+
+ROW = ['Совещание', '25.12', '14:30', '❌ Не повторять', 'bench', '', '25.12.2026 14:30', '❌ Не отправлено']
+
+
+async def light_handler(arrived, latencies):
+    # Задержка считается от момента поступления обновления
+    await asyncio.sleep(0)
+    latencies.append(time.perf_counter() - arrived)
+
+
+async def run(label, writer):
+    latencies = []
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(writer()) for _ in range(WRITERS)]
+    tasks += [asyncio.create_task(light_handler(start, latencies)) for _ in range(LIGHT_HANDLERS)]
+    await asyncio.gather(*tasks)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<8} всего {total:6.2f} с | легкие обработчики p50 {p50:8.2f} мс, p99 {p99:8.2f} мс")
+
+
+async def main():
+    print(f"📊 Задержка таблицы {SHEET_LATENCY * 1000:.0f} мс, "
+          f"{WRITERS} записей, {LIGHT_HANDLERS} легких обработчиков\n")
+
+    sheet = SlowSheet(SHEET_LATENCY)
+
+    async def blocking_writer():
+        sheet.append_row(ROW)
+
+    await run("до", blocking_writer)
+
+    executor = SheetsExecutor(max_workers=4, timeout=30)
+    slow_sheet = SlowSheet(SHEET_LATENCY)
+    repo = ReminderRepository(slow_sheet, executor, SheetsWriteQueue(slow_sheet, executor))
+
+    async def executor_writer():
+        await repo.append(ROW)
+
+    await run("после", executor_writer)
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
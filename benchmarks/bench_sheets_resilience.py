@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: Google Sheets при сбоях (повторы и предохранитель)
+
+Поддельная таблица (benchmarks/fakes.py) с задержкой ответа и сбоями:
+  • "ошибки 503" — ERROR_RATE запросов падает случайно: чтения без
+    повторов и с повторами (успешных, задержка p50/p99);
+  • "сбой таблицы" — OUTAGE секунд таблица отвечает 503, а бот в это
+    время читает напоминания и добавляет строки: чтения обслуживает
+    кэш, запись ждет в очереди; после сбоя каждая строка должна
+    оказаться в таблице ровно один раз, а запросов за время сбоя —
+    единицы, а не по одному на операцию;
+  • "истек токен" — 401 до переподключения: запрос должен пройти
+    после одного reconnect().
+
+Запуск: python benchmarks/bench_sheets_resilience.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fakes import FakeWorksheet
+from sheets_client import CircuitBreaker
+from storage import ReminderRepository, SheetsExecutor, SheetsWriteQueue
+
+LATENCY = 0.02
+ERROR_RATE = 0.2
+READS = 200
+OUTAGE = 3.0
+BREAKER_RESET = 1.0
+WRITES = 50
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] if ordered else 0.0
+
+
+async def flaky_reads(retries):
+    sheet = FakeWorksheet(latency=LATENCY, error_rate=ERROR_RATE, seed=1)
+    # Предохранитель не мешает: проверяются только повторы
+    executor = SheetsExecutor(retries=retries, backoff=0.05, breaker=CircuitBreaker(failure_threshold=READS))
+    latencies, failed = [], 0
+    for _ in range(READS):
+        started = time.perf_counter()
+        try:
+            await executor.run(sheet.get_all_values)
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            failed += 1
+    executor.shutdown()
+    print(f"ошибки 503, повторов {retries}: успешно {len(latencies)}/{READS} | "
+          f"p50 {percentile(latencies, 0.5) * 1000:.0f} мс | p99 {percentile(latencies, 0.99) * 1000:.0f} мс | "
+          f"запросов {sheet.requests}")
+
+
+async def outage():
+    sheet = FakeWorksheet(latency=LATENCY)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=BREAKER_RESET)
+    executor = SheetsExecutor(retries=2, backoff=0.05, breaker=breaker)
+    writer = SheetsWriteQueue(sheet, executor, flush_interval=0.05)
+    repo = ReminderRepository(sheet, executor, writer, ttl=0)
+    await repo.refresh()
+
+    sheet.outage(OUTAGE)
+    requests_before = sheet.requests
+    started = time.perf_counter()
+
+    async def add(number):
+        await asyncio.sleep(number * OUTAGE / WRITES)
+        await repo.append([f'Строка {number}', '01.01', '09:00', '', '', '', '', ''])
+
+    async def read():
+        served = 0
+        while time.perf_counter() - started < OUTAGE:
+            await repo.get_all()
+            served += 1
+            await asyncio.sleep(0.1)
+        return served
+
+    reads, *_ = await asyncio.gather(read(), *(add(number) for number in range(WRITES)))
+    elapsed = time.perf_counter() - started
+    await writer.close()
+    executor.shutdown()
+
+    texts = [row[0] for row in sheet.rows[1:]]
+    duplicates = len(texts) - len(set(texts))
+    print(f"сбой таблицы {OUTAGE:.0f} с: чтений из кэша {reads}, строк записано {len(texts)}/{WRITES}, "
+          f"дублей {duplicates}, запись завершена через {elapsed:.1f} с")
+    print(f"  запросов к таблице {sheet.requests - requests_before}, "
+          f"предохранитель размыкался {breaker.opened} раз, сейчас {breaker.state}")
+
+
+async def expired_token():
+    sheet = FakeWorksheet(latency=LATENCY)
+    executor = SheetsExecutor(reconnect=sheet.reconnect)
+    sheet.expire_token()
+    rows = await executor.run(sheet.get_all_values)
+    executor.shutdown()
+    print(f"истек токен: строк прочитано {len(rows)}, переподключений {sheet.reconnects}")
+
+
+async def main():
+    print(f"📊 Таблица: {LATENCY * 1000:.0f} мс на запрос\n")
+    await flaky_reads(retries=0)
+    await flaky_reads(retries=3)
+    await outage()
+    await expired_token()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: холодный старт бота
+
+Подключение к Google Sheets (токен сервисного аккаунта, open_by_key,
+чтение заголовков) — несколько запросов к Google, CONNECT секунд.
+Сравнивается, когда бот отвечает на первое сообщение (/start,
+пришедшее сразу после запуска):
+  • "до"    — таблица подключается до запуска приложения, как раньше в main();
+  • "после" — приложение запускается сразу, таблица подключается в фоне
+    (post_init -> connect_sheets_in_background).
+Telegram и таблица — поддельные (fakes.py); время импортов — из
+метрики bot_startup_seconds.
+
+Запуск: python benchmarks/bench_startup.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+_workdir = tempfile.mkdtemp(prefix='bench_startup_')
+os.environ.update({
+    'BOT_TOKEN': '123456:STARTUP',
+    'STORAGE_BACKEND': 'sqlite',
+    'METRICS_PORT': '0',
+    # Содержимое не важно: подключение подменяется поддельным
+    'GOOGLE_CREDENTIALS_JSON': '{"type": "service_account"}',
+})
+
+from telegram import Update
+
+import bot
+import metrics
+from fakes import FakeTelegram, FakeWorksheet
+
+CONNECT = 2.0           # подключение к таблице, секунды
+SHEETS_LATENCY = 0.3
+
+warnings.filterwarnings('ignore', message=".*per_message.*")
+
+
+def slow_connect(credentials_info=None):
+    time.sleep(CONNECT)
+    return FakeWorksheet(latency=SHEETS_LATENCY)
+
+
+async def first_reply(lazy: bool) -> tuple:
+    """(запуск готов, первый ответ) — секунды от старта"""
+    telegram = FakeTelegram(os.environ['BOT_TOKEN'], global_rate=None, group_rate_per_minute=None)
+    await telegram.start()
+    bot.DATABASE_PATH = os.path.join(_workdir, f'{"lazy" if lazy else "blocking"}.db')
+
+    started = time.perf_counter()
+    if lazy:
+        application = bot.build_application(None, base_url=telegram.base_url, polling=False)
+    else:
+        sheet = await asyncio.get_running_loop().run_in_executor(None, slow_connect)
+        application = bot.build_application(sheet, base_url=telegram.base_url, polling=False)
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    ready = time.perf_counter() - started
+
+    reply = telegram.expect(42)
+    message = {
+        'message_id': 1, 'date': int(time.time()), 'text': '/start',
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Тест'},
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+    }
+    await application.update_queue.put(Update.de_json({'update_id': 1, 'message': message}, application.bot))
+    sent = await asyncio.wait_for(reply, 30)
+    answered = sent.at - started
+
+    task = application.bot_data.get('sheets_connect_task')
+    if task is not None:
+        await task
+
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+    await telegram.stop()
+    return ready, answered
+
+
+async def main():
+    print(f"📊 Подключение к таблице: {CONNECT:.1f} с, импорты: {metrics.STARTUP.stages['imports']:.2f} с\n")
+    bot.connect_google_sheets = slow_connect
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        blocking = await first_reply(lazy=False)
+        lazy = await first_reply(lazy=True)
+    for label, (ready, answered) in (("до", blocking), ("после", lazy)):
+        print(f"{label:<6} запуск готов через {ready:5.2f} с | первый ответ через {answered:5.2f} с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
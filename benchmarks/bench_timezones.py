@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: часовые пояса чатов
+
+Переходы на летнее/зимнее время и поиск пояса проверяются в
+tests/test_timezones.py. Здесь измеряется разбор колонки G (прежний
+strptime + localize на каждой строке против кэша) и получение объекта
+пояса по имени.
+
+Запуск: python benchmarks/bench_timezones.py
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import bot
+from timezones import get_timezone
+
+ROWS = 20_000
+REPEATS = 200_000
+
+
+def old_parse(value: str):
+    """Прежний разбор колонки G — на каждой строке при каждой синхронизации"""
+    try:
+        return bot.TIMEZONE.localize(datetime.strptime(value.strip(), bot.REMINDER_DATETIME_FORMAT)).timestamp()
+    except (ValueError, AttributeError):
+        return None
+
+
+def timed(label, func, inputs, repeats):
+    started = time.perf_counter()
+    for index in range(repeats):
+        func(inputs[index % len(inputs)])
+    elapsed = (time.perf_counter() - started) / repeats
+    print(f"{label:<42} {elapsed * 1e6:7.2f} мкс")
+
+
+def main():
+    # Колонка G таблицы: каждая синхронизация разбирает все строки заново
+    rng = random.Random(1)
+    column = [
+        datetime.fromtimestamp(time.time() + rng.randrange(86400 * 365), bot.TIMEZONE)
+        .strftime(bot.REMINDER_DATETIME_FORMAT)
+        for _ in range(ROWS)
+    ]
+    bot.parse_reminder_timestamp.cache_clear()
+    for value in column:
+        bot.parse_reminder_timestamp(value)
+    timed("колонка G — strptime + localize", old_parse, column, REPEATS)
+    timed("колонка G — кэш parse_reminder_timestamp", bot.parse_reminder_timestamp, column, REPEATS)
+
+    names = ['Europe/Moscow', 'Asia/Yekaterinburg', 'Europe/Berlin', 'America/New_York']
+    timed("пояс по имени — pytz.timezone", pytz.timezone, names, REPEATS)
+    timed("пояс по имени — get_timezone", get_timezone, names, REPEATS)
+
+
+if __name__ == "__main__":
+    main()
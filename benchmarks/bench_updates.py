@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+⏱️ БЕНЧМАРК: нагрузка на обработку обновлений
+
+CHATS пользователей одновременно проходят диалог /add (текст, дата,
+время, кнопка повтора) — по STEPS обновлений с паузами "на раздумье".
+Обработчики имитируют вызов Google Sheets: обычно FAST секунд,
+в SLOW_SHARE случаев — SLOW. Обновления идут через настоящие
+Application.process_update и ConversationHandler.
+
+Сравниваются:
+  • "подряд"   — обработка по умолчанию, по одному обновлению;
+  • "без порядка" — стандартный параллельный режим PTB
+    (concurrent_updates=CONCURRENCY), для сравнения: порядок не гарантирован;
+  • "по чатам" — ChatOrderedProcessor: чаты параллельно (до CONCURRENCY),
+    внутри чата по очереди.
+Измеряется задержка от поступления обновления до конца обработчика
+(p50/p99), а также проверяется, что каждый диалог прошел состояния
+в порядке поступления и лимит одновременной обработки не превышен.
+
+Запуск: python benchmarks/bench_updates.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from telegram import CallbackQuery, Chat, Message, MessageEntity, Update, User
+from telegram.ext import (
+    Application, CallbackQueryHandler, CommandHandler, ConversationHandler,
+    MessageHandler, SimpleUpdateProcessor, filters,
+)
+
+from processing import ChatOrderedProcessor
+
+# per_message=False — как в bot.py, предупреждение PTB об этом здесь не нужно
+warnings.filterwarnings("ignore", message="If 'per_message=False'")
+
+CHATS = 100
+STEPS = 5               # /add, текст, дата, время, кнопка
+THINK = (0.05, 0.4)     # пауза пользователя между сообщениями, секунды
+SPREAD = 2.0            # пользователи начинают диалог в течение SPREAD секунд
+FAST = 0.005
+SLOW = 0.2
+SLOW_SHARE = 0.05
+CONCURRENCY = 16
+
+WAITING_TEXT, WAITING_DATE, WAITING_TIME, WAITING_REPEAT = range(4)
+
+
+class Run:
+    """Состояние прогона: задержки, журнал диалогов, одновременность"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.arrived = {}
+        self.latencies = []
+        self.journal = {}
+        self.active = 0
+        self.peak = 0
+
+    async def work(self, update: Update, step: str):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(SLOW if self.rng.random() < SLOW_SHARE else FAST)
+        finally:
+            self.active -= 1
+        self.journal.setdefault(update.effective_chat.id, []).append(step)
+        self.latencies.append(time.perf_counter() - self.arrived[update.update_id])
+
+
+def build_application(run: Run, processor) -> Application:
+    builder = Application.builder().token("123:bench").updater(None)
+    if processor is not None:
+        builder = builder.concurrent_updates(processor)
+    application = builder.build()
+    # Без сети: вместо getMe — готовый бот (имя нужно CommandHandler для "/add")
+    application.bot._bot_user = User(1, "Бот", True, username="bench_bot")
+    application.bot._initialized = True
+
+    async def add(update, context):
+        await run.work(update, "add")
+        return WAITING_TEXT
+
+    async def text(update, context):
+        context.user_data['text'] = update.message.text
+        await run.work(update, "text")
+        return WAITING_DATE
+
+    async def date(update, context):
+        await run.work(update, "date")
+        return WAITING_TIME
+
+    async def when(update, context):
+        await run.work(update, "time")
+        return WAITING_REPEAT
+
+    async def repeat(update, context):
+        # Текст из первого шага должен принадлежать этому же чату
+        saved = context.user_data.pop('text', None)
+        await run.work(update, "saved" if saved == f"текст {update.effective_chat.id}" else "lost")
+        return ConversationHandler.END
+
+    text_filter = filters.TEXT & ~filters.COMMAND
+    application.add_handler(ConversationHandler(
+        entry_points=[CommandHandler('add', add)],
+        states={
+            WAITING_TEXT: [MessageHandler(text_filter, text)],
+            WAITING_DATE: [MessageHandler(text_filter, date)],
+            WAITING_TIME: [MessageHandler(text_filter, when)],
+            WAITING_REPEAT: [CallbackQueryHandler(repeat, pattern='^repeat_')],
+        },
+        fallbacks=[],
+        per_chat=True,
+        per_user=True,
+        per_message=False
+    ))
+    return application
+
+
+def make_dialogues(rng: random.Random, bot):
+    """(момент поступления, Update) для всех диалогов, по времени"""
+    arrivals = []
+    now = datetime.now(timezone.utc)
+    update_id = 0
+    for number in range(CHATS):
+        user = User(1000 + number, "Тест", False)
+        chat = Chat(user.id, Chat.PRIVATE)
+        moment = rng.uniform(0, SPREAD)
+        texts = ["/add", f"текст {chat.id}", "25.12", "14:30"]
+        for step in range(STEPS):
+            update_id += 1
+            if step < len(texts):
+                entities = [MessageEntity(MessageEntity.BOT_COMMAND, 0, 4)] if step == 0 else None
+                message = Message(update_id, now, chat, from_user=user, text=texts[step], entities=entities)
+                message.set_bot(bot)
+                update = Update(update_id, message=message)
+            else:
+                message = Message(update_id, now, chat, from_user=user, text="Повтор?")
+                query = CallbackQuery(str(update_id), user, "bench", message=message, data="repeat_0")
+                query.set_bot(bot)
+                update = Update(update_id, callback_query=query)
+            arrivals.append((moment, update))
+            moment += rng.uniform(*THINK)
+    arrivals.sort(key=lambda item: item[0])
+    return arrivals
+
+
+async def replay(label: str, processor):
+    """Поступление обновлений по расписанию — как цикл обновлений Application"""
+    run = Run(seed=3)
+    application = build_application(run, processor)
+    arrivals = make_dialogues(random.Random(11), application.bot)
+    concurrent = application.update_processor.max_concurrent_updates > 1
+    tasks = []
+    await application.initialize()
+
+    started = time.perf_counter()
+    for moment, update in arrivals:
+        # Задержка считается от момента поступления, включая ожидание в очереди
+        run.arrived[update.update_id] = started + moment
+        delay = run.arrived[update.update_id] - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        handling = application.update_processor.process_update(update, application.process_update(update))
+        if concurrent:
+            tasks.append(asyncio.create_task(handling))
+        else:
+            await handling
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await application.shutdown()
+
+    expected = ["add", "text", "date", "time", "saved"]
+    broken = sum(1 for steps in run.journal.values() if steps != expected)
+    latencies = sorted(run.latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<11} p50 {statistics.median(latencies) * 1000:7.1f} мс | p99 {p99 * 1000:7.1f} мс | "
+          f"всего {elapsed:5.2f} с | одновременно до {run.peak:2} | "
+          f"диалогов {len(run.journal)}, нарушено {broken}")
+    return broken == 0 and len(run.journal) == CHATS and run.peak <= (CONCURRENCY if concurrent else 1)
+
+
+async def main():
+    print(f"📊 {CHATS} диалогов по {STEPS} обновлений, обработчик {FAST * 1000:.0f} мс, "
+          f"{SLOW_SHARE:.0%} — {SLOW * 1000:.0f} мс\n")
+    ok = await replay("подряд", None)
+    await replay("без порядка", SimpleUpdateProcessor(CONCURRENCY))
+    ok &= await replay("по чатам", ChatOrderedProcessor(CONCURRENCY))
+    if not ok:
+        print("❌ Порядок диалогов или лимит нарушены")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,350 @@
+"""
+🧪 ПОДДЕЛЬНЫЕ TELEGRAM И GOOGLE SHEETS ДЛЯ БЕНЧМАРКОВ
+
+FakeWorksheet — лист gspread в памяти: те же методы, что вызывает бот
+(get_all_values, append_rows, batch_update, row_values,
+spreadsheet.batch_update, spreadsheet.get_lastUpdateTime), с задержкой
+ответа и ошибками квоты (APIError 429, как у настоящего Sheets API),
+а также сбоями: outage() — 503 на каждый запрос, expire_token() — 401,
+пока не вызван reconnect().
+Методы вызываются из пула потоков SheetsExecutor, поэтому задержка —
+time.sleep, а изменения листа — под замком.
+
+FakeTelegram — сервер Bot API на aiohttp: бот ходит в него по HTTP
+через base_url, как в настоящий api.telegram.org. Ответы на sendMessage
+и editMessageText записываются, лимиты Telegram (общий и на группу)
+проверяются скользящим окном — при превышении ответ 429 с retry_after.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+from aiohttp import web
+from gspread.exceptions import APIError
+
+HEADER = ['Текст', 'Дата', 'Время', 'Повторение', 'Кто добавил', 'Когда добавлено',
+          'Время напоминания', 'Статус отправки', 'ID']
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Бот', 'username': 'bench_bot'}
+
+_A1_CELL = re.compile(r'^([A-Z]+)(\d+)')
+
+
+def _api_error(code: int, status: str, message: str, retry_after: Optional[float] = None) -> APIError:
+    response = requests.Response()
+    response.status_code = code
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    response._content = json.dumps({'error': {'code': code, 'message': message, 'status': status}}).encode()
+    return APIError(response)
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+class _Window:
+    """Скользящее окно: не больше limit событий за period секунд"""
+
+    def __init__(self, limit: float, period: float):
+        self.limit = limit
+        self.period = period
+        self._events: Deque[float] = deque()
+
+    def allow(self, now: float) -> Optional[float]:
+        """None — событие учтено; иначе через сколько секунд освободится место"""
+        while self._events and self._events[0] <= now - self.period:
+            self._events.popleft()
+        if len(self._events) >= self.limit:
+            return self._events[0] + self.period - now
+        self._events.append(now)
+        return None
+
+
+# ========== GOOGLE SHEETS ==========
+class FakeSpreadsheet:
+    def __init__(self, worksheet: 'FakeWorksheet'):
+        self.worksheet = worksheet
+        self.title = 'Напоминания (тест)'
+        self.sheet1 = worksheet
+
+    def get_lastUpdateTime(self) -> str:
+        self.worksheet._request('get_lastUpdateTime')
+        return str(self.worksheet.modified)
+
+    def batch_update(self, body: dict):
+        """Только deleteDimension — им бот сжимает лист"""
+        self.worksheet._request('spreadsheet.batch_update')
+        with self.worksheet.lock:
+            for request in body.get('requests', []):
+                span = request['deleteDimension']['range']
+                del self.worksheet.rows[span['startIndex']:span['endIndex']]
+            self.worksheet.modified += 1
+        return {}
+
+
+class FakeWorksheet:
+    """
+    Лист в памяти. latency (+- jitter) — время ответа, quota_per_minute —
+    лимит запросов в минуту (None — без лимита), error_rate — доля
+    случайных ошибок 503.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        quota_per_minute: Optional[int] = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.id = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rows: List[List[str]] = [list(HEADER)]
+        self.modified = 0
+        self.lock = threading.Lock()
+        self.spreadsheet = FakeSpreadsheet(self)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.quota_errors = 0
+        self.failures = 0
+        self.requests = 0
+        self.reconnects = 0
+        self._down_until = 0.0
+        self._token_expired = False
+        self._quota = _Window(quota_per_minute, 60) if quota_per_minute else None
+        self._rng = random.Random(seed)
+
+    def outage(self, seconds: float):
+        """Следующие seconds секунд таблица отвечает 503"""
+        self._down_until = time.monotonic() + seconds
+
+    def expire_token(self):
+        """Токен недействителен (401), пока не вызван reconnect()"""
+        self._token_expired = True
+
+    def reconnect(self):
+        with self.lock:
+            self.reconnects += 1
+            self._token_expired = False
+
+    def _request(self, name: str):
+        with self.lock:
+            self.calls[name] += 1
+            self.requests += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate or time.monotonic() < self._down_until
+            expired = self._token_expired
+            wait = self._quota.allow(time.monotonic()) if self._quota is not None else None
+        time.sleep(delay)
+        if expired:
+            raise _api_error(401, 'UNAUTHENTICATED', 'Request had invalid authentication credentials.')
+        if wait is not None:
+            with self.lock:
+                self.quota_errors += 1
+            raise _api_error(
+                429, 'RESOURCE_EXHAUSTED', 'Quota exceeded for quota metric "Write requests"',
+                retry_after=round(wait, 1)
+            )
+        if failed:
+            with self.lock:
+                self.failures += 1
+            raise _api_error(503, 'UNAVAILABLE', 'The service is currently unavailable.')
+
+    def _write(self, range_name: str, values: List[list]):
+        match = _A1_CELL.match(range_name.split('!')[-1])
+        column, first = _column_index(match.group(1)), int(match.group(2))
+        for offset, values_row in enumerate(values):
+            while len(self.rows) < first + offset:
+                self.rows.append([''] * len(HEADER))
+            row = self.rows[first + offset - 1]
+            row.extend([''] * (column + len(values_row) - len(row)))
+            for position, value in enumerate(values_row):
+                row[column + position] = str(value)
+
+    def get_all_values(self) -> List[List[str]]:
+        self._request('get_all_values')
+        with self.lock:
+            return [list(row) for row in self.rows]
+
+    def row_values(self, row_number: int) -> List[str]:
+        self._request('row_values')
+        with self.lock:
+            return list(self.rows[row_number - 1]) if row_number <= len(self.rows) else []
+
+    def append_rows(self, rows: List[List[str]], **kwargs) -> dict:
+        self._request('append_rows')
+        with self.lock:
+            first = len(self.rows) + 1
+            self.rows.extend([str(value) for value in row] for row in rows)
+            self.modified += 1
+            return {'updates': {'updatedRange': f'Лист1!A{first}:I{len(self.rows)}'}}
+
+    def batch_update(self, data: List[dict], **kwargs) -> dict:
+        self._request('batch_update')
+        with self.lock:
+            for item in data:
+                self._write(item['range'], item['values'])
+            self.modified += 1
+            return {}
+
+    def update(self, range_name: str, values: List[list], **kwargs) -> dict:
+        self._request('update')
+        with self.lock:
+            self._write(range_name, values)
+            self.modified += 1
+            return {}
+
+
+# ========== TELEGRAM BOT API ==========
+class SentMessage(NamedTuple):
+    method: str
+    chat_id: int
+    text: str
+    reply_to: Optional[int]
+    at: float
+    message_id: Optional[int] = None    # ID отправленного (или измененного) сообщения
+
+
+class FakeTelegram:
+    """
+    Сервер Bot API. expect(chat_id, message_id) — future, который завершится
+    первым ответом бота в этот чат (на сообщение message_id, если бот отвечает
+    цитатой, как в группах; в личных чатах — по очереди ожиданий).
+    """
+
+    def __init__(
+        self,
+        token: str,
+        latency: float = 0.0,
+        global_rate: Optional[float] = 30,
+        group_rate_per_minute: Optional[float] = 20,
+        port: int = 0,
+    ):
+        self.token = token
+        self.latency = latency
+        self.port = port
+        self.sent: List[SentMessage] = []
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.rate_limited = 0
+        self._global = _Window(global_rate, 1) if global_rate else None
+        self._group_rate = group_rate_per_minute
+        self._groups: Dict[int, _Window] = {}
+        self._message_id = 0
+        self._exact: Dict[Tuple[int, int], asyncio.Future] = {}
+        self._waiting: Dict[int, Deque[asyncio.Future]] = defaultdict(deque)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/bot'
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expect(self, chat_id: int, message_id: Optional[int] = None) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if message_id is None:
+            self._waiting[chat_id].append(future)
+        else:
+            self._exact[(chat_id, message_id)] = future
+        return future
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        if request.content_type == 'application/json':
+            return await request.json()
+        params = {}
+        for name, value in (await request.post()).items():
+            try:
+                params[name] = json.loads(value)
+            except (TypeError, ValueError):
+                params[name] = value
+        return params
+
+    def _message(self, chat_id: int, text: str, message_id: Optional[int] = None) -> dict:
+        if message_id is None:
+            self._message_id += 1
+            message_id = self._message_id
+        chat_type = 'private' if chat_id > 0 else 'supergroup'
+        return {
+            'message_id': message_id, 'date': int(time.time()), 'text': text,
+            'chat': {'id': chat_id, 'type': chat_type}, 'from': BOT_USER,
+        }
+
+    def _over_limit(self, chat_id: int) -> Optional[float]:
+        now = time.monotonic()
+        if chat_id < 0 and self._group_rate:
+            window = self._groups.get(chat_id)
+            if window is None:
+                window = self._groups[chat_id] = _Window(self._group_rate, 60)
+            wait = window.allow(now)
+            if wait is not None:
+                return wait
+        if self._global is not None:
+            return self._global.allow(now)
+        return None
+
+    def _record(self, method: str, chat_id: int, text: str, reply_to: Optional[int], message_id: Optional[int] = None):
+        self.sent.append(SentMessage(method, chat_id, text, reply_to, time.perf_counter(), message_id))
+        future = self._exact.pop((chat_id, reply_to), None) if reply_to is not None else None
+        if future is None:
+            waiting = self._waiting.get(chat_id)
+            future = waiting.popleft() if waiting else None
+        if future is not None and not future.done():
+            future.set_result(self.sent[-1])
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = await self._params(request)
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': BOT_USER})
+        if method == 'sendMessage':
+            chat_id = int(params['chat_id'])
+            wait = self._over_limit(chat_id)
+            if wait is not None:
+                self.rate_limited += 1
+                retry_after = max(1, round(wait))
+                return web.json_response({
+                    'ok': False, 'error_code': 429,
+                    'description': f'Too Many Requests: retry after {retry_after}',
+                    'parameters': {'retry_after': retry_after},
+                }, status=429)
+            reply = params.get('reply_parameters') or {}
+            message = self._message(chat_id, params.get('text', ''))
+            self._record(method, chat_id, params.get('text', ''), reply.get('message_id'), message['message_id'])
+            return web.json_response({'ok': True, 'result': message})
+        if method == 'editMessageText':
+            chat_id = int(params['chat_id'])
+            message = self._message(chat_id, params.get('text', ''), int(params['message_id']))
+            self._record(method, chat_id, params.get('text', ''), None, message['message_id'])
+            return web.json_response({'ok': True, 'result': message})
+        if method == 'getUpdates':
+            return web.json_response({'ok': True, 'result': []})
+        # answerCallbackQuery, setWebhook, deleteWebhook и прочее
+        return web.json_response({'ok': True, 'result': True})
@@ -1,18 +1,27 @@
 #!/usr/bin/env python3
 """
 🤖 ТЕЛЕГРАМ БОТ НАПОМИНАНИЙ
-Упрощенная версия без JobQueue для начала
+Напоминания хранятся в SQLite (файл DATABASE_PATH, по умолчанию
+reminders.db) и отправляются в чаты встроенным планировщиком (scheduler.py).
+Google Таблица необязательна: если задан GOOGLE_CREDENTIALS_JSON,
+она служит зеркалом базы, а ручные правки в ней синхронизируются обратно (sync.py).
+STORAGE_BACKEND="sheets" — прежний режим без базы: таблица — единственное хранилище.
 """
 
 import os
 import json
 import asyncio
-import pytz
-import re
+import functools
+import time
+import traceback
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+# Отсчет времени запуска: дальше идут тяжелые импорты (telegram, gspread, google-auth)
+_IMPORTS_STARTED = time.perf_counter()
+
+from telegram import Chat, Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -26,6 +35,35 @@ import gspread
 from google.oauth2.service_account import Credentials
 import nest_asyncio
 
+import metrics
+from dateparse import parse_when, split_when
+from delivery import DeliveryQueue
+from group_commands import ADDRESSED_TO_BOT, parse_bot_command
+from models import Reminder
+from recurrence import REPEAT_OPTIONS, Occurrence, rule_for
+from scheduler import BaseScheduler, create_scheduler
+from storage import (
+    STATUS_NOT_SENT,
+    STATUS_SENT,
+    ChatRegistry,
+    DeliveryOutbox,
+    PartitionedIndex,
+    ReminderIndex,
+    ReminderRepository,
+    SheetsExecutor,
+    SheetsMirror,
+    SheetsCompactor,
+    SheetsReminderStorage,
+    SheetsWriteQueue,
+    SQLiteReminderStorage,
+)
+from sheets_client import CircuitBreaker, backoff_delay, is_transient, reconnect, use_pooled_session
+from sync import SheetsSync
+from timezones import DEFAULT_TIMEZONE, describe_timezone, find_timezone, get_timezone
+from persistence import SQLitePersistence
+from processing import ChatOrderedProcessor
+from webhook import WebhookServer, serve_webhook
+
 # Загружаем переменные из .env файла
 from dotenv import load_dotenv
 load_dotenv()
@@ -33,158 +71,199 @@ load_dotenv()
 # Применяем nest_asyncio для совместимости
 nest_asyncio.apply()
 
+metrics.STARTUP.started = _IMPORTS_STARTED
+# Без вывода: bot импортируют и тесты; в лог время попадет из main()
+metrics.STARTUP.mark('imports', quiet=True)
+
 # ========== НАСТРОЙКИ ==========
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 SPREADSHEET_ID = os.environ.get("SPREADSHEET_ID", "1hN3zFqE3fsb1nLwH3kj2t-5OlzhAIR8A_LMxLaskkd8")
 GROUP_CHAT_ID = int(os.environ.get("GROUP_CHAT_ID", "-1002146448322"))
-TIMEZONE = pytz.timezone('Europe/Moscow')
+# Группы, которые обслуживает бот: ID через запятую или "*" — любая группа, куда его добавили.
+# У каждой группы свой раздел напоминаний; личные чаты работают с разделом GROUP_CHAT_ID
+GROUP_CHAT_IDS = os.environ.get("GROUP_CHAT_IDS", str(GROUP_CHAT_ID))
+# Куда отправлять напоминания раздела, если не в сам чат: "ID раздела:ID чата,..."
+CHAT_TARGETS = os.environ.get("CHAT_TARGETS", "")
+# Часовой пояс по умолчанию; в нем же записаны даты в таблице (колонки B, C, F, G).
+# У чата может быть свой пояс — команда /tz
+TIMEZONE = get_timezone(os.environ.get("TIMEZONE", DEFAULT_TIMEZONE))
+# Хранилище: "sqlite" (основное, таблица — зеркало) или "sheets" (только таблица)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite")
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "reminders.db")
+# Как долго кэш таблицы считается актуальным (секунды)
+REMINDER_CACHE_TTL = float(os.environ.get("REMINDER_CACHE_TTL", "300"))
+# Пул потоков для запросов к Google Sheets и таймаут одного запроса (секунды)
+SHEETS_WORKERS = int(os.environ.get("SHEETS_WORKERS", "4"))
+SHEETS_TIMEOUT = float(os.environ.get("SHEETS_TIMEOUT", "30"))
+# Повторы при 429/5xx: сколько раз, начальная и наибольшая задержка (секунды)
+SHEETS_RETRIES = int(os.environ.get("SHEETS_RETRIES", "3"))
+SHEETS_BACKOFF = float(os.environ.get("SHEETS_BACKOFF", "0.5"))
+SHEETS_MAX_DELAY = float(os.environ.get("SHEETS_MAX_DELAY", "30"))
+# Предохранитель: после скольких ошибок подряд перестать ходить в таблицу и на сколько секунд
+SHEETS_BREAKER_FAILURES = int(os.environ.get("SHEETS_BREAKER_FAILURES", "5"))
+SHEETS_BREAKER_RESET = float(os.environ.get("SHEETS_BREAKER_RESET", "30"))
+# Пакетная запись: максимум операций в пачке и задержка перед отправкой (секунды)
+SHEETS_BATCH_SIZE = int(os.environ.get("SHEETS_BATCH_SIZE", "50"))
+SHEETS_FLUSH_INTERVAL = float(os.environ.get("SHEETS_FLUSH_INTERVAL", "0.5"))
+# Планировщик: "heap" (мин-куча) или "wheel" (колесо таймеров для очень большого числа напоминаний)
+SCHEDULER_MODE = os.environ.get("SCHEDULER_MODE", "heap")
+# Отправка напоминаний: параллельных запросов, лимиты Telegram и число повторов
+DELIVERY_CONCURRENCY = int(os.environ.get("DELIVERY_CONCURRENCY", "8"))
+DELIVERY_GLOBAL_RATE = float(os.environ.get("DELIVERY_GLOBAL_RATE", "30"))        # сообщений в секунду
+DELIVERY_GROUP_RATE = float(os.environ.get("DELIVERY_GROUP_RATE", "20"))          # сообщений в минуту в группу
+DELIVERY_MAX_RETRIES = int(os.environ.get("DELIVERY_MAX_RETRIES", "5"))
+# Напоминаний на одной странице /list
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", "10"))
+# Сколько последних отфильтрованных списков помнить для кнопок листания
+LIST_VIEWS_KEPT = 50
+# Как часто удалять из таблицы пустые строки после удаления напоминаний (секунды)
+SHEETS_COMPACT_INTERVAL = float(os.environ.get("SHEETS_COMPACT_INTERVAL", "3600"))
+# Как часто проверять ручные правки таблицы (секунды)
+SHEETS_SYNC_INTERVAL = float(os.environ.get("SHEETS_SYNC_INTERVAL", "60"))
+
+# Незавершенные диалоги /add переживают перезапуск: как часто сохранять их состояние (секунды)
+# и сколько хранить брошенный диалог (часы)
+PERSISTENCE_INTERVAL = float(os.environ.get("PERSISTENCE_INTERVAL", "5"))
+DIALOG_MAX_AGE_HOURS = float(os.environ.get("DIALOG_MAX_AGE_HOURS", "24"))
+
+# Сколько обновлений обрабатывается одновременно (разные чаты; внутри чата — по очереди)
+UPDATE_CONCURRENCY = int(os.environ.get("UPDATE_CONCURRENCY", "16"))
+
+# Получение обновлений: "polling" (опрос Telegram) или "webhook" (свой HTTP-сервер, webhook.py)
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+# Вебхук: публичный адрес (пусто — вебхук не регистрируется, для локальной проверки),
+# путь, секрет для заголовка X-Telegram-Bot-Api-Secret-Token и порт (Koyeb передает PORT)
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBHOOK_PORT = int(os.environ.get("PORT", "8000"))
+# Метрики Prometheus (GET /metrics): в режиме вебхука — на сервере вебхука,
+# в режиме опроса — на отдельном локальном сервере (0 — не запускать)
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9100"))
+# Обработчикам нужны только сообщения и нажатия кнопок — остальное Telegram не присылает
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
 
 # Состояния для диалога
 (WAITING_TEXT, WAITING_DATE, WAITING_TIME, WAITING_REPEAT) = range(4)
 
-# Варианты повторения
-REPEAT_OPTIONS = [
-    "❌ Не повторять",
-    "🔄 Каждый день",
-    "📅 Каждую неделю",
-    "🎄 Каждый год",
-    "⏰ За день до",
-    "📝 За 3 дня до",
-    "🗓️ За неделю до",
-    "📆 Понедельник",
-    "📆 Вторник",
-    "📆 Среда",
-    "📆 Четверг",
-    "📆 Пятница",
-    "📆 Суббота",
-    "📆 Воскресенье"
-]
+# Формат полной даты напоминания (колонка G)
+REMINDER_DATETIME_FORMAT = "%d.%m.%Y %H:%M"
 
-# Дни недели для парсинга
-WEEKDAYS_RU = {
-    'понедельник': 0,
-    'вторник': 1,
-    'среда': 2,
-    'четверг': 3,
-    'пятница': 4,
-    'суббота': 5,
-    'воскресенье': 6,
-    'пн': 0, 'вт': 1, 'ср': 2, 'чт': 3, 'пт': 4, 'сб': 5, 'вс': 6
-}
+# Подсказка по формату даты и времени
+WHEN_EXAMPLES = "25.12 14:30, завтра в 9, в пятницу 14:30, через 2 часа, 25 декабря"
 
-# ========== СОЗДАНИЕ ФАЙЛА CREDENTIALS ИЗ ПЕРЕМЕННЫХ ОКРУЖЕНИЯ ==========
-def create_credentials_from_env():
+# ========== ПОДКЛЮЧЕНИЕ К GOOGLE SHEETS ==========
+# drive.metadata.readonly — чтобы дешево узнавать время изменения таблицы
+GOOGLE_SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.metadata.readonly'
+]
+SHEET_HEADERS = [
+    'Текст',               # A
+    'Дата',                # B (ДД.ММ)
+    'Время',               # C (ЧЧ:ММ)
+    'Повторение',          # D
+    'Кто добавил',         # E
+    'Когда добавлено',     # F
+    'Время напоминания',   # G (полная дата ДД.ММ.ГГГГ ЧЧ:ММ)
+    'Статус отправки',     # H
+    'ID'                   # I (постоянный номер для /del)
+]
+
+def credentials_info_from_env() -> Optional[Dict]:
     """
-    Создает файл credentials из переменной окружения GOOGLE_CREDENTIALS_JSON.
+    Учетные данные сервисного аккаунта из переменной окружения
+    GOOGLE_CREDENTIALS_JSON — в памяти, без временного файла.
     """
-    try:
-        # Получаем JSON строку из переменной окружения
-        credentials_json = os.environ.get("GOOGLE_CREDENTIALS_JSON")
+    # Получаем JSON строку из переменной окружения
+    credentials_json = os.environ.get("GOOGLE_CREDENTIALS_JSON")
 
-        if not credentials_json:
-            print("❌ Переменная окружения GOOGLE_CREDENTIALS_JSON не найдена.")
-            print("ℹ️  Установите GOOGLE_CREDENTIALS_JSON в настройках сервера")
-            return None
+    if not credentials_json:
+        print("❌ Переменная окружения GOOGLE_CREDENTIALS_JSON не найдена.")
+        print("ℹ️  Установите GOOGLE_CREDENTIALS_JSON в настройках сервера")
+        return None
 
-        # Парсим JSON
+    try:
         credentials_data = json.loads(credentials_json)
-
-        # Важно: заменяем \\n на \n в приватном ключе
-        if 'private_key' in credentials_data:
-            credentials_data['private_key'] = credentials_data['private_key'].replace('\\n', '\n')
-
-        # Сохраняем во временный файл
-        creds_file = "/tmp/credentials.json"
-        with open(creds_file, 'w') as f:
-            json.dump(credentials_data, f, indent=2)
-
-        print(f"✅ Файл {creds_file} создан из переменной окружения")
-        return creds_file
-
     except json.JSONDecodeError as e:
         print(f"❌ Ошибка парсинга JSON из переменной окружения: {e}")
         return None
-    except Exception as e:
-        print(f"❌ Ошибка создания файла credentials: {e}")
-        return None
 
-def setup_google_sheets():
-    """Настраивает подключение к Google Sheets"""
-    try:
-        # Создаем файл с учетными данными из переменной окружения
-        creds_file = create_credentials_from_env()
-        if not creds_file:
-            print("⚠️  Не удалось создать файл credentials. Проверьте переменную GOOGLE_CREDENTIALS_JSON.")
-            return None
-
-        # Подключаемся к Google Sheets
-        scope = ['https://www.googleapis.com/auth/spreadsheets']
-        creds = Credentials.from_service_account_file(creds_file, scopes=scope)
-        client = gspread.authorize(creds)
-
-        # Открываем таблицу
-        spreadsheet = client.open_by_key(SPREADSHEET_ID)
-        sheet = spreadsheet.sheet1
-
-        # Проверяем заголовки
-        headers = sheet.row_values(1)
-        if len(headers) < 8:
-            sheet.update('A1:H1', [[
-                'Текст',               # A
-                'Дата',                # B (ДД.ММ)
-                'Время',               # C (ЧЧ:ММ)
-                'Повторение',          # D
-                'Кто добавил',         # E
-                'Когда добавлено',     # F
-                'Время напоминания',   # G (полная дата ДД.ММ.ГГГГ ЧЧ:ММ)
-                'Статус отправки'      # H
-            ]])
-            print("✅ Созданы заголовки таблицы")
-
-        print("✅ Подключение к Google Sheets установлено")
-        print(f"📊 Таблица: {spreadsheet.title}")
-        print(f"🔗 Ссылка: https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}")
-
-        return sheet
+    # Важно: заменяем \\n на \n в приватном ключе
+    if 'private_key' in credentials_data:
+        credentials_data['private_key'] = credentials_data['private_key'].replace('\\n', '\n')
+    return credentials_data
 
-    except Exception as e:
-        print(f"❌ Ошибка подключения к Google Sheets: {e}")
-        print(f"\n🔧 Проверьте доступ для сервисного аккаунта")
-        print(f"📊 Ссылка на таблицу: https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}")
-        return None
-
-# ========== ФУНКЦИИ ДЛЯ РАБОТЫ С ТАБЛИЦЕЙ ==========
-def save_reminder_with_datetime(sheet, text, date, time, repeat, username="Неизвестно"):
-    """Сохраняет напоминание с вычислением datetime для планировщика"""
-    try:
-        # Текущее время в UTC+3
-        now_utc3 = datetime.now(TIMEZONE)
-        created = now_utc3.strftime("%d.%m.%Y %H:%M")
-
-        # Преобразуем дату и время из пользовательского ввода
+def connect_google_sheets(credentials_info: Dict):
+    """
+    Подключается к таблице и возвращает первый лист.
+    Блокирующие вызовы gspread — запускается в пуле SheetsExecutor.
+    """
+    creds = Credentials.from_service_account_info(credentials_info, scopes=GOOGLE_SCOPES)
+    client = gspread.authorize(creds)
+    # Пул соединений на все потоки SheetsExecutor и таймаут на уровне HTTP,
+    # чтобы зависший запрос не занимал поток дольше SHEETS_TIMEOUT
+    use_pooled_session(client.http_client, SHEETS_WORKERS)
+    client.http_client.set_timeout(SHEETS_TIMEOUT)
+
+    spreadsheet = client.open_by_key(SPREADSHEET_ID)
+    print(f"📊 Таблица: {spreadsheet.title}")
+    print(f"🔗 Ссылка: https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}")
+    return spreadsheet.sheet1
+
+def ensure_sheet_headers(sheet):
+    """Записывает заголовки, если их нет (блокирующий вызов — из пула)"""
+    headers = sheet.row_values(1)
+    if len(headers) < len(SHEET_HEADERS):
+        sheet.update('A1:I1', [SHEET_HEADERS])
+        print("✅ Созданы заголовки таблицы")
+
+async def connect_sheets_in_background(application: Application, credentials_info: Dict):
+    """
+    Подключение к таблице после запуска: бот уже принимает обновления,
+    а таблица подключается в фоне. Временные ошибки — повтор с растущей
+    паузой, ошибки доступа (ключ, права, ID таблицы) — без повторов.
+    """
+    executor = application.bot_data['sheets_executor']
+    attempt = 0
+    while True:
+        started = time.perf_counter()
         try:
-            # Пользователь вводит только день и месяц, используем текущий год
-            reminder_date_str = f"{date}.{now_utc3.year}"
-            reminder_datetime_naive = datetime.strptime(f"{reminder_date_str} {time}", "%d.%m.%Y %H:%M")
-
-            # Привязываем часовой пояс +3
-            reminder_datetime = TIMEZONE.localize(reminder_datetime_naive)
-
-            # Если время уже прошло сегодня, планируем на следующий год
-            if reminder_datetime <= now_utc3:
-                reminder_date_str = f"{date}.{now_utc3.year + 1}"
-                reminder_datetime_naive = datetime.strptime(f"{reminder_date_str} {time}", "%d.%m.%Y %H:%M")
-                reminder_datetime = TIMEZONE.localize(reminder_datetime_naive)
-
-            # Форматируем для хранения
-            reminder_datetime_str = reminder_datetime.strftime("%d.%m.%Y %H:%M")
-
+            sheet = await executor.run(connect_google_sheets, credentials_info)
+            await executor.run(ensure_sheet_headers, sheet)
+            break
         except Exception as e:
-            print(f"⚠️ Ошибка преобразования даты: {e}")
-            reminder_datetime = None
-            reminder_datetime_str = f"{date}.{now_utc3.year} {time}"
-
-        # Добавляем строку в таблицу (8 колонок!)
+            if not is_transient(e):
+                print(f"❌ Ошибка подключения к Google Sheets: {e}")
+                print(f"\n🔧 Проверьте доступ для сервисного аккаунта")
+                print(f"📊 Ссылка на таблицу: https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}")
+                return
+            delay = max(executor.breaker.retry_in, backoff_delay(attempt, SHEETS_BACKOFF * 4, SHEETS_MAX_DELAY))
+            attempt += 1
+            print(f"⚠️ Google Sheets пока недоступна ({e}), повтор через {delay:.0f} с")
+            await asyncio.sleep(delay)
+
+    print(f"✅ Подключение к Google Sheets установлено за {time.perf_counter() - started:.2f} с")
+    metrics.STARTUP.mark('sheets_connected')
+    await attach_sheet(application, sheet)
+
+# ========== ФУНКЦИИ ДЛЯ РАБОТЫ С ХРАНИЛИЩЕМ ==========
+async def save_reminder_with_datetime(storage, text, when: datetime, repeat, username="Неизвестно", chat_id=None):
+    """Сохраняет напоминание на момент when (уже разобранный dateparse) в раздел chat_id"""
+    try:
+        # Текущее время в поясе таблицы
+        now = datetime.now(TIMEZONE)
+        created = now.strftime(REMINDER_DATETIME_FORMAT)
+
+        # Для дней недели — ближайший такой день, начиная с указанной даты
+        # (when — в поясе чата; в таблицу срок пишется в поясе по умолчанию)
+        reminder_datetime = rule_for(repeat).align(when)
+        sheet_datetime = reminder_datetime.astimezone(TIMEZONE)
+        date = sheet_datetime.strftime("%d.%m")
+        time = sheet_datetime.strftime("%H:%M")
+
+        # Строка в формате таблицы (8 колонок!)
         row_data = [
             text,               # A: Текст
             date,               # B: Дата (ДД.ММ)
@@ -192,180 +271,391 @@ def save_reminder_with_datetime(sheet, text, date, time, repeat, username="Не
             repeat,             # D: Повторение
             username,           # E: Кто добавил
             created,            # F: Когда добавлено
-            reminder_datetime_str,  # G: Время напоминания (полная дата)
-            "❌ Не отправлено"  # H: Статус отправки
+            sheet_datetime.strftime(REMINDER_DATETIME_FORMAT),  # G: Время напоминания (полная дата)
+            STATUS_NOT_SENT     # H: Статус отправки
         ]
-        sheet.append_row(row_data)
+        reminder_id = await storage.save(row_data, reminder_datetime.timestamp(), chat_id)
 
-        # Получаем номер строки
-        all_data = sheet.get_all_values()
-        row_number = len(all_data)
-
-        print(f"📝 Сохранено в строку #{row_number}: {text} на {date} {time} (UTC+3)")
-        return row_number, reminder_datetime
+        print(f"📝 Сохранено напоминание #{reminder_id}: {text} на {date} {time} ({TIMEZONE})")
+        return reminder_id, reminder_datetime
 
     except Exception as e:
-        print(f"❌ Ошибка сохранения в таблицу: {e}")
+        print(f"❌ Ошибка сохранения напоминания: {e}")
         return None, None
 
-def get_all_reminders(sheet):
-    """Получает все напоминания из таблицы"""
+async def get_all_reminders(storage):
+    """Получает все напоминания: список пар (ID, строка)"""
     try:
-        data = sheet.get_all_values()
-        if len(data) > 1:
-            return data[1:]
-        return []
+        return await storage.list_all()
     except Exception as e:
-        print(f"❌ Ошибка чтения из таблицы: {e}")
+        print(f"❌ Ошибка чтения напоминаний: {e}")
         return []
 
-def delete_from_sheets(sheet, row_number):
-    """Удаляет напоминание из таблицы"""
+async def delete_reminder(storage, reminder_id, chat_id=None):
+    """Удаляет напоминание раздела chat_id; False, если его нет или произошла ошибка"""
     try:
-        sheet.update(f'A{row_number}:H{row_number}', [['', '', '', '', '', '', '', '']])
-        print(f"🗑️ Удалена строка #{row_number}")
-        return True
+        deleted = await storage.delete(reminder_id, chat_id)
+        if deleted:
+            print(f"🗑️ Удалено напоминание #{reminder_id}")
+        return deleted
     except Exception as e:
-        print(f"❌ Ошибка удаления из таблицы: {e}")
+        print(f"❌ Ошибка удаления напоминания: {e}")
         return False
 
-def update_reminder_status(sheet, row_number, status):
+async def update_reminder_status(storage, reminder_id, status):
     """Обновляет статус отправки напоминания"""
     try:
-        sheet.update(f'H{row_number}', [[status]])
+        await storage.mark_sent(reminder_id, status)
         return True
     except Exception as e:
         print(f"❌ Ошибка обновления статуса: {e}")
         return False
 
-# ========== ФУНКЦИИ ДЛЯ РАБОТЫ С ГРУППОЙ ==========
-def parse_bot_command(text: str) -> Optional[str]:
-    """Парсит обращение к боту в группе"""
-    # Убираем знаки препинания и приводим к нижнему регистру
-    clean_text = re.sub(r'[^\w\s]', '', text.lower())
-    
-    # Паттерны обращения к боту
-    patterns = [
-        r'бот\s+(.+)',           # "бот помощь", "бот напоминание"
-        r'бот[!,.?]?\s*(.+)',    # "бот, помощь", "бот! помощь"
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, clean_text)
-        if match:
-            return match.group(1).strip()
-    
-    return None
+async def reschedule_reminder(storage, reminder_id, due: datetime):
+    """Переносит повторяющееся напоминание на следующее срабатывание"""
+    try:
+        await storage.reschedule(
+            reminder_id, due.timestamp(), due.astimezone(TIMEZONE).strftime(REMINDER_DATETIME_FORMAT)
+        )
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка переноса напоминания: {e}")
+        return False
+
+def parse_reminder_datetime(value: str) -> Optional[datetime]:
+    """Парсит колонку G (ДД.ММ.ГГГГ ЧЧ:ММ, пояс по умолчанию) в datetime с часовым поясом"""
+    try:
+        return TIMEZONE.localize(datetime.strptime(value.strip(), REMINDER_DATETIME_FORMAT))
+    except (ValueError, AttributeError):
+        return None
+
+@functools.lru_cache(maxsize=65536)
+def parse_reminder_timestamp(value: str) -> Optional[float]:
+    """
+    То же, что parse_reminder_datetime, но в секундах epoch.
+    Колонку G разбирают импорт, синхронизация и хранилище без SQLite
+    на каждой строке таблицы — результат кэшируется по тексту.
+    """
+    reminder_datetime = parse_reminder_datetime(value)
+    return reminder_datetime.timestamp() if reminder_datetime else None
+
+def reminder_from_row(reminder_id: int, row: List[str], chat_id: Optional[int] = None) -> Reminder:
+    """Разбирает строку из хранилища (срок — из колонки G)"""
+    return Reminder.from_row(reminder_id, row, parse_reminder_timestamp(row[6]) if len(row) >= 7 else None, chat_id)
+
+def due_datetime(reminder: Reminder, tz=None) -> Optional[datetime]:
+    """Срок напоминания в поясе tz (по умолчанию — в поясе бота)"""
+    if reminder.due_at is None:
+        return None
+    return datetime.fromtimestamp(reminder.due_at, tz or TIMEZONE)
+
+def format_due(reminder: Reminder, tz=None) -> str:
+    """Срок для показа — в том же виде, что в колонке G, но в поясе tz"""
+    due = due_datetime(reminder, tz)
+    return due.strftime(REMINDER_DATETIME_FORMAT) if due else "—"
+
+# ========== ЧАТЫ И РАЗДЕЛЫ ==========
+def parse_chat_ids(value: str) -> Optional[set]:
+    """GROUP_CHAT_IDS -> множество ID групп; None — любая группа"""
+    if value.strip() == '*':
+        return None
+    return {int(part) for part in value.split(',') if part.strip()} | {GROUP_CHAT_ID}
+
+def parse_chat_targets(value: str) -> Dict[int, int]:
+    """CHAT_TARGETS "раздел:цель,..." -> {раздел: цель}"""
+    targets = {}
+    for pair in value.split(','):
+        if pair.strip():
+            chat_id, target_chat_id = pair.split(':')
+            targets[int(chat_id)] = int(target_chat_id)
+    return targets
+
+def served_chats_filter() -> filters.BaseFilter:
+    """Группы из GROUP_CHAT_IDS (или любые группы при "*")"""
+    # В таблице разделов нет — без SQLite бот обслуживает одну группу
+    if STORAGE_BACKEND == "sheets":
+        return filters.Chat(chat_id=GROUP_CHAT_ID)
+    chat_ids = parse_chat_ids(GROUP_CHAT_IDS)
+    return filters.ChatType.GROUPS if chat_ids is None else filters.Chat(chat_id=chat_ids)
+
+def chat_partition(update: Update) -> int:
+    """Раздел напоминаний для обновления: группа — свой, личный чат — GROUP_CHAT_ID"""
+    chat = update.effective_chat
+    if chat is None or chat.type == Chat.PRIVATE:
+        return GROUP_CHAT_ID
+    return chat.id
+
+def partition_timezone(registry: Optional[ChatRegistry], chat_id: Optional[int]):
+    """Пояс раздела: в нем считаются повторы "по часам" и показываются отправленные напоминания"""
+    chat_id = GROUP_CHAT_ID if chat_id is None else chat_id
+    return registry.timezone(chat_id) if registry else TIMEZONE
+
+def chat_timezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Пояс для ввода дат и списков: свой пояс чата (в личном чате — пользователя), иначе пояс раздела"""
+    registry = context.application.bot_data.get('chats')
+    if not registry:
+        return TIMEZONE
+    chat = update.effective_chat
+    if chat is None:
+        return registry.timezone(GROUP_CHAT_ID)
+    return registry.timezone(chat.id, chat_partition(update))
+
+def delivery_target(application: Application, chat_id: Optional[int]) -> int:
+    """Чат, куда отправляются напоминания раздела chat_id"""
+    chat_id = GROUP_CHAT_ID if chat_id is None else chat_id
+    registry = application.bot_data.get('chats')
+    return registry.target(chat_id) if registry else chat_id
+
+# ========== ОТПРАВКА НАПОМИНАНИЙ ==========
+def schedule_reminder(scheduler: BaseScheduler, reminder: Reminder, tz=None):
+    """Ставит в планировщик ближайшее срабатывание (предварительное или основное); tz — пояс раздела"""
+    occurrence = reminder.rule.first_fire(due_datetime(reminder, tz), datetime.now(tz or TIMEZONE))
+    scheduler.schedule(reminder.id, occurrence.when, (reminder, occurrence))
+
+async def load_reminders_into_scheduler(
+    storage, scheduler: BaseScheduler, skip: Iterable[int] = (), registry: Optional[ChatRegistry] = None
+) -> int:
+    """Один раз читает неотправленные напоминания и ставит их в планировщик (кроме skip)"""
+    skip = set(skip)
+    due_reminders = [reminder for reminder in await storage.query_due() if reminder.id not in skip]
+    for reminder in due_reminders:
+        schedule_reminder(scheduler, reminder, partition_timezone(registry, reminder.chat_id))
+    return len(due_reminders)
+
+def format_reminder_message(reminder: Reminder, occurrence: Optional[Occurrence] = None, tz=None) -> str:
+    """Формирует текст напоминания для отправки в группу (срок — в поясе tz)"""
+    if occurrence and occurrence.is_pre_alert:
+        message = f"⏰ Предварительное напоминание!\n\n📝 {reminder.text}\n📅 Событие: {format_due(reminder, tz)}"
+    else:
+        message = f"🔔 Напоминание!\n\n📝 {reminder.text}\n⏰ {format_due(reminder, tz)}"
+    if reminder.author:
+        message += f"\n👤 Добавил: {reminder.author}"
+    return message
+
+async def advance_reminder(application: Application, reminder: Reminder, occurrence: Occurrence) -> bool:
+    """
+    Ставит следующее срабатывание после отправки.
+    Возвращает True, если повторов больше нет и напоминание нужно пометить отправленным.
+    """
+    storage = application.bot_data.get('storage')
+    scheduler = application.bot_data.get('scheduler')
+    if not storage:
+        return False
+    # Пока сообщение ждало в очереди, напоминание могли удалить или перенести
+    if reminder.id in scheduler or await storage.get(reminder.id) is None:
+        return False
+
+    # Следующее срабатывание по правилу повторения (срок уже разобран — без strptime)
+    tz = partition_timezone(application.bot_data.get('chats'), reminder.chat_id)
+    anchor = due_datetime(reminder, tz)
+    following = None
+    if anchor:
+        following = reminder.rule.fire_after(anchor, occurrence, datetime.now(tz))
+
+    if following is None:
+        return True
+    if following.is_pre_alert or following.when == anchor:
+        # После предварительного — основное, колонка G не меняется
+        scheduler.schedule(reminder.id, following.when, (reminder, following))
+    else:
+        await reschedule_reminder(storage, reminder.id, following.when)
+        schedule_reminder(scheduler, reminder.moved(following.when.timestamp()), tz)
+    return False
+
+def make_send_callback(application: Application):
+    """
+    Создает колбэк планировщика: напоминание записывается в outbox,
+    ставится в очередь отправки, а после доставки помечается отправленным
+    или переносится на следующий повтор и удаляется из outbox
+    """
+    async def send_due_reminder(reminder_id: int, payload):
+        reminder, occurrence = payload
+        text = format_reminder_message(
+            reminder, occurrence, partition_timezone(application.bot_data.get('chats'), reminder.chat_id)
+        )
+        target = delivery_target(application, reminder.chat_id)
+        outbox = application.bot_data['outbox']
+        entry_id = outbox.add(reminder_id, occurrence.when.timestamp(), occurrence.is_pre_alert, target, text)
 
+        async def on_done(delivered: bool):
+            if delivered:
+                metrics.DELIVERY_LAG.observe(max(0.0, time.time() - occurrence.when.timestamp()))
+                print(f"🔔 Отправлено напоминание #{reminder_id}: {reminder.text}")
+            # Недоставленное одноразовое напоминание остается неотправленным
+            if await advance_reminder(application, reminder, occurrence) and delivered:
+                await update_reminder_status(application.bot_data['storage'], reminder_id, STATUS_SENT)
+            outbox.ack(entry_id)
+
+        application.bot_data['delivery'].submit(target, text, on_done)
+
+    return send_due_reminder
+
+async def catch_up_missed(application: Application) -> List[int]:
+    """
+    Досылает то, что было пропущено, пока бот не работал:
+    неподтвержденные сообщения из outbox и просроченные напоминания.
+    Отправка идет в фоне одной пачкой через очередь, статусы (колонка H)
+    обновляются одним запросом. Возвращает ID напоминаний,
+    которые не нужно ставить в планировщик.
+    """
+    storage = application.bot_data.get('storage')
+    outbox = application.bot_data['outbox']
+    pending = outbox.pending()
+    overdue = await storage.query_due(until=time.time()) if storage else []
+
+    # Просроченные тоже сначала попадают в outbox
+    queued = {entry.reminder_id for entry in pending}
+    new_ids = outbox.add_many([
+        (reminder.id, reminder.due_at, False, delivery_target(application, reminder.chat_id),
+         format_reminder_message(reminder, tz=partition_timezone(application.bot_data.get('chats'), reminder.chat_id)))
+        for reminder in overdue
+        if reminder.id not in queued
+    ])
+    entries = outbox.pending() if new_ids else pending
+    if not entries:
+        return []
+
+    print(f"📨 Досылаю пропущенные напоминания: {len(entries)}")
+    application.bot_data['catch_up_task'] = asyncio.create_task(deliver_missed(application, entries))
+    return [reminder.id for reminder in overdue]
+
+async def deliver_missed(application: Application, entries):
+    """Отправляет пачку из outbox и разом помечает одноразовые напоминания отправленными"""
+    storage = application.bot_data.get('storage')
+    delivery = application.bot_data['delivery']
+    to_mark, done = [], []
+
+    async def submit(entry):
+        finished = asyncio.get_running_loop().create_future()
+        row = await storage.get(entry.reminder_id) if storage else None
+        reminder = reminder_from_row(entry.reminder_id, row, storage.chat_of(entry.reminder_id)) if row else None
+        tz = partition_timezone(application.bot_data.get('chats'), reminder.chat_id if reminder else None)
+        occurrence = Occurrence(datetime.fromtimestamp(entry.occurrence_at, tz), entry.is_pre_alert)
+
+        async def on_done(delivered: bool):
+            try:
+                if reminder is not None:
+                    needs_mark = await advance_reminder(application, reminder, occurrence)
+                    if needs_mark and delivered:
+                        to_mark.append(entry.reminder_id)
+                done.append(entry.id)
+            except Exception as e:
+                # Запись остается в outbox и будет дослана при следующем запуске
+                print(f"❌ Досылка: не удалось обновить напоминание {entry.reminder_id}: {e}")
+            finally:
+                # Иначе gather ниже ждал бы вечно и не подтвердил всю пачку
+                finished.set_result(delivered)
+
+        delivery.submit(entry.chat_id, entry.text, on_done)
+        return finished
+
+    futures = [await submit(entry) for entry in entries]
+    results = await asyncio.gather(*futures)
+
+    if storage and to_mark:
+        await storage.mark_sent_many(to_mark, STATUS_SENT)
+    # Подтверждаем только после обновления статусов
+    application.bot_data['outbox'].ack_many(done)
+    print(f"✅ Досылка завершена: доставлено {sum(results)} из {len(results)}")
+
+def make_sync_upsert_callback(scheduler: BaseScheduler, storage, registry: Optional[ChatRegistry] = None):
+    """Колбэк синхронизации: переставляет напоминание, измененное в таблице"""
+    def on_upsert(reminder_id: int, due_at: Optional[float], row: List[str]):
+        reminder = Reminder.from_row(reminder_id, row, due_at, storage.chat_of(reminder_id))
+        if reminder.due_at is None or reminder.sent:
+            scheduler.cancel(reminder_id)
+        else:
+            schedule_reminder(scheduler, reminder, partition_timezone(registry, reminder.chat_id))
+
+    return on_upsert
+
+# ========== ДОБАВЛЕНИЕ НАПОМИНАНИЙ ==========
+def repeat_keyboard() -> InlineKeyboardMarkup:
+    """Кнопки вариантов повторения, по два в ряд"""
+    keyboard = []
+    for i in range(0, len(REPEAT_OPTIONS), 2):
+        keyboard.append([
+            InlineKeyboardButton(REPEAT_OPTIONS[j], callback_data=f'repeat_{j}')
+            for j in range(i, min(i + 2, len(REPEAT_OPTIONS)))
+        ])
+    return InlineKeyboardMarkup(keyboard)
+
+def describe_when(moment: datetime) -> str:
+    """Строки "Дата" и "Время" для подтверждений"""
+    return f"📅 Дата: {moment.strftime('%d.%m.%Y')}\n⏰ Время: {moment.strftime('%H:%M')}"
+
+# ========== ФУНКЦИИ ДЛЯ РАБОТЫ С ГРУППОЙ ==========
+@metrics.instrument
 async def handle_group_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка сообщений в группе с обращениями к боту"""
-    if update.message.chat.id != GROUP_CHAT_ID:
-        return
-    
+    """
+    Обработка сообщений в группе с обращениями к боту.
+    Сюда попадают только сообщения, прошедшие фильтр ADDRESSED_TO_BOT.
+    """
     text = update.message.text
-    if not text:
+    parsed = parse_bot_command(text)
+    if not parsed:
         return
-    
-    # Парсим команду
-    command = parse_bot_command(text)
-    if not command:
+    keyword, args = parsed
+
+    print(f"📨 Команда из группы: {keyword} {args}".rstrip())
+
+    handler = GROUP_COMMANDS.get(keyword)
+    if handler is not None:
+        await handler(update, context, args)
         return
-    
-    print(f"📨 Команда из группы: {command}")
-    
-    # Обработка команд
-    if command in ['помощь', 'help']:
-        await help_command(update, context)
-    elif command in ['список', 'list']:
-        await list_command(update, context)
-    elif command in ['напоминание', 'добавить', 'add']:
-        # Запрашиваем данные для добавления напоминания
-        await update.message.reply_text(
-            "📝 Для добавления напоминания напишите в формате:\n"
-            "бот напоминание Текст Дата(ДД.ММ) Время(ЧЧ:ММ) [Повторение]\n\n"
-            "Пример: бот напоминание Совещание 25.12 14:30"
-        )
-    elif 'напоминание' in command:
-        # Парсим напоминание из текста
-        await add_reminder_from_group(update, context, command)
+
+    # "бот создай напоминание Текст Когда" — ключевое слово не первым
+    position = text.lower().find('напоминание')
+    if position >= 0:
+        await add_reminder_from_group(update, context, text[position + len('напоминание'):].strip())
     else:
-        await update.message.reply_text(f"🤔 Не понял команду: {command}")
+        await update.message.reply_text(f"🤔 Не понял команду: {keyword}")
 
-async def add_reminder_from_group(update: Update, context: ContextTypes.DEFAULT_TYPE, command: str):
-    """Добавляет напоминание из команды в группе"""
+async def add_reminder_from_group(update: Update, context: ContextTypes.DEFAULT_TYPE, message: str):
+    """Добавляет напоминание из команды в группе: message — "Текст Когда" как написан"""
     try:
-        # Парсим команду: "бот напоминание Текст Дата Время"
-        parts = command.replace('напоминание', '').strip().split()
-        
-        if len(parts) < 3:
+        now = datetime.now(chat_timezone(update, context))
+        parsed = split_when(message, now)
+        if parsed is None or not parsed[0]:
             await update.message.reply_text(
                 "❌ Неправильный формат. Используйте:\n"
-                "бот напоминание Текст Дата(ДД.ММ) Время(ЧЧ:ММ)\n"
-                "Пример: бот напоминание Совещание 25.12 14:30"
+                "бот напоминание Текст Когда\n"
+                f"Когда: {WHEN_EXAMPLES}\n"
+                "Пример: бот напоминание Совещание завтра в 14:30"
             )
             return
-        
-        text = parts[0]
-        date = parts[1]
-        time = parts[2]
-        
-        # Проверки формата
-        if len(date) != 5 or date[2] != '.':
-            await update.message.reply_text("❌ Неправильный формат даты. Используйте ДД.ММ")
-            return
-        
-        if len(time) != 5 or time[2] != ':':
-            await update.message.reply_text("❌ Неправильный формат времени. Используйте ЧЧ:ММ")
-            return
-        
+        text, when = parsed
+
         # Проверяем, что время еще не прошло
-        now_utc3 = datetime.now(TIMEZONE)
-        try:
-            reminder_date_str = f"{date}.{now_utc3.year}"
-            reminder_datetime_naive = datetime.strptime(f"{reminder_date_str} {time}", "%d.%m.%Y %H:%M")
-            reminder_datetime = TIMEZONE.localize(reminder_datetime_naive)
-            
-            if reminder_datetime <= now_utc3:
-                await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
-                return
-        except:
-            pass
-        
-        # Сохраняем для быстрого добавления
-        context.user_data['quick_add'] = {
-            'text': text,
-            'date': date,
-            'time': time
-        }
-        
-        # Показываем варианты повторения
-        keyboard = []
-        for i in range(0, len(REPEAT_OPTIONS), 2):
-            row = []
-            if i < len(REPEAT_OPTIONS):
-                row.append(InlineKeyboardButton(REPEAT_OPTIONS[i], callback_data=f'repeat_{i}'))
-            if i+1 < len(REPEAT_OPTIONS):
-                row.append(InlineKeyboardButton(REPEAT_OPTIONS[i+1], callback_data=f'repeat_{i+1}'))
-            keyboard.append(row)
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
+        if when.moment <= now:
+            await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
+            return
+
+        prompt = await update.message.reply_text(
             f"✅ Напоминание:\n"
             f"📝 Текст: {text}\n"
-            f"📅 Дата: {date}\n"
-            f"⏰ Время: {time}\n\n"
+            f"{describe_when(when.moment)}\n\n"
             f"📌 Выберите тип повторения:",
-            reply_markup=reply_markup
+            reply_markup=repeat_keyboard()
         )
-        
+
+        # Сохраняем для быстрого добавления: кнопки под prompt — только для автора
+        context.user_data['quick_add'] = {
+            'text': text,
+            'when': when.moment,
+            'author': update.effective_user.id,
+            'message_id': prompt.message_id
+        }
+
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка при добавлении напоминания: {e}")
 
 # ========== КОМАНДЫ БОТА ==========
+@metrics.instrument
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /start - приветствие"""
     try:
+        target = delivery_target(context.application, chat_partition(update))
         welcome_text = f"""
 👋 Привет! Я бот для напоминаний.
 
@@ -377,22 +667,27 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 📋 Доступные команды:
 /start - показать это сообщение
 /add - добавить новое напоминание
-/list - посмотреть все напоминания
+/list - предстоящие напоминания (по страницам)
+/list 25.12-31.12 - напоминания за период
+/find слова - поиск по тексту
+/mine - ваши напоминания
 /del - удалить напоминание
 /help - помощь
 /test - тестовая отправка в группу
+/tz Пояс - часовой пояс (например, /tz Asia/Yekaterinburg)
 
 📊 Google Таблица:
 https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}
 
 💬 Группа для напоминаний:
-ID: {GROUP_CHAT_ID}
+ID: {target}
 
 ➕ Быстрое добавление:
-/add Текст Дата(ДД.ММ) Время(ЧЧ:ММ)
+/add Текст Когда
 
-🎯 Пример:
+🎯 Примеры:
 /add Совещание 25.12 14:30
+/add Позвонить маме завтра в 9
 
 🎉 Напоминание будет сохранено в таблицу и отправлено в группу!
 """
@@ -402,7 +697,7 @@ ID: {GROUP_CHAT_ID}
         # Отправляем приветствие в группу
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=target,
                 text="👋 Привет, я включился и готов напоминать вам о ваших забытых событиях!"
             )
             print("✅ Приветствие отправлено в группу")
@@ -415,13 +710,17 @@ ID: {GROUP_CHAT_ID}
         traceback.print_exc()
         await update.message.reply_text("❌ Внутренняя ошибка бота")
 
+@metrics.instrument
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /help - помощь"""
     help_text = """
 ℹ️ **Помощь по использованию бота**
 
-📝 **Формат даты:** ДД.ММ (например: 25.12)
-⏰ **Формат времени:** ЧЧ:ММ (например: 14:30)
+📅 **Когда напомнить:**
+• 25.12 14:30 или 25 декабря в 14:30
+• завтра в 9, послезавтра в 7 вечера
+• в пятницу 14:30, во вторник в 10
+• через 2 часа, через полчаса, через 3 дня
 
 🔁 **Типы повторения:**
 • ❌ Не повторять - одноразовое напоминание
@@ -429,177 +728,149 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • 📅 Каждую неделю - каждую неделю
 • 🎄 Каждый год - каждый год
 • 📆 Дни недели - каждый указанный день
+• ⏰ За день / 3 дня / неделю до - событие и предварительное напоминание
 
 📌 **Советы:**
-• Для быстрого добавления: /add Текст Дата Время
-• Пример: /add Встреча 25.12 14:30
+• Для быстрого добавления: /add Текст Когда
+• Пример: /add Встреча с клиентом завтра в 14:30
 • Все данные сохраняются в Google Таблицу
+• Даты понимаются в часовом поясе чата, сменить его: /tz Asia/Yekaterinburg
 
 👥 **Команды в группе:**
 • "бот помощь" - показать справку
-• "бот список" - показать все напоминания
-• "бот напоминание Текст Дата Время" - добавить напоминание
+• "бот список" - показать предстоящие напоминания
+• "бот найти слова" - поиск по тексту
+• "бот мои" - ваши напоминания
+• "бот пояс Asia/Yekaterinburg" - часовой пояс группы
+• "бот напоминание Текст Когда" - добавить напоминание
 
 🛠️ **Проблемы?**
 Если что-то не работает, просто перезапустите бота.
 """
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
+@metrics.instrument
 async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Начало добавления напоминания"""
     # Проверяем, есть ли аргументы в команде
-    if context.args and len(context.args) >= 3:
-        # Быстрое добавление: /add Текст Дата Время
-        try:
-            text = context.args[0]
-            date = context.args[1]
-            time = context.args[2]
-
-            # Простые проверки формата
-            if len(date) != 5 or date[2] != '.':
-                await update.message.reply_text("❌ Неправильный формат даты. Используйте ДД.ММ (например: 25.12)")
-                return
-            if len(time) != 5 or time[2] != ':':
-                await update.message.reply_text("❌ Неправильный формат времени. Используйте ЧЧ:ММ (например: 14:30)")
-                return
-            
-            # Проверяем, что время еще не прошло
-            now_utc3 = datetime.now(TIMEZONE)
-            try:
-                reminder_date_str = f"{date}.{now_utc3.year}"
-                reminder_datetime_naive = datetime.strptime(f"{reminder_date_str} {time}", "%d.%m.%Y %H:%M")
-                reminder_datetime = TIMEZONE.localize(reminder_datetime_naive)
-                
-                if reminder_datetime <= now_utc3:
-                    await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
-                    return
-            except:
-                pass
-
-            # Сохраняем для быстрого добавления
-            context.user_data['quick_add'] = {
-                'text': text,
-                'date': date,
-                'time': time
-            }
-
-            # Показываем варианты повторения
-            keyboard = []
-            for i in range(0, len(REPEAT_OPTIONS), 2):
-                row = []
-                if i < len(REPEAT_OPTIONS):
-                    row.append(InlineKeyboardButton(REPEAT_OPTIONS[i], callback_data=f'repeat_{i}'))
-                if i+1 < len(REPEAT_OPTIONS):
-                    row.append(InlineKeyboardButton(REPEAT_OPTIONS[i+1], callback_data=f'repeat_{i+1}'))
-                keyboard.append(row)
-
-            reply_markup = InlineKeyboardMarkup(keyboard)
+    if context.args:
+        # Быстрое добавление: /add Текст Когда
+        message = ' '.join(context.args)
+        now = datetime.now(chat_timezone(update, context))
+        parsed = split_when(message, now)
+        if parsed is None or not parsed[0]:
+            when = parse_when(message, now)
+            if when is not None:
+                # Сообщение целиком — дата ("/add завтра в 9"): спросим текст
+                context.user_data['pending_when'] = when
+                await update.message.reply_text("📝 Введите текст напоминания:")
+                return WAITING_TEXT
+            # Даты нет — это только текст, остальное спросим
+            context.user_data['text'] = message
+            await update.message.reply_text(f"📅 Когда напомнить? Например: {WHEN_EXAMPLES}")
+            return WAITING_DATE
+        text, when = parsed
 
-            await update.message.reply_text(
-                f"✅ Быстрое добавление:\n"
-                f"📝 Текст: {text}\n"
-                f"📅 Дата: {date}\n"
-                f"⏰ Время: {time}\n\n"
-                f"📌 Выберите тип повторения:",
-                reply_markup=reply_markup
-            )
+        # Проверяем, что время еще не прошло
+        if when.moment <= now:
+            await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
+            return ConversationHandler.END
 
-            return WAITING_REPEAT
+        # Сохраняем для быстрого добавления
+        context.user_data['quick_add'] = {
+            'text': text,
+            'when': when.moment
+        }
 
-        except Exception as e:
-            await update.message.reply_text(f"❌ Ошибка: {e}")
-            return ConversationHandler.END
+        await update.message.reply_text(
+            f"✅ Быстрое добавление:\n"
+            f"📝 Текст: {text}\n"
+            f"{describe_when(when.moment)}\n\n"
+            f"📌 Выберите тип повторения:",
+            reply_markup=repeat_keyboard()
+        )
+        return WAITING_REPEAT
 
     # Если нет аргументов, начинаем обычный диалог
+    context.user_data.pop('pending_when', None)
     await update.message.reply_text("📝 Введите текст напоминания:")
     return WAITING_TEXT
 
+@metrics.instrument
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка текста напоминания"""
     text = update.message.text
     context.user_data['text'] = text
-    await update.message.reply_text("📅 Теперь введите дату в формате ДД.ММ (например: 25.12):")
+
+    # Дату уже указали в "/add завтра в 9"
+    when = context.user_data.pop('pending_when', None)
+    if when is not None:
+        if when.has_time:
+            return await confirm_when(update, context, when.moment)
+        context.user_data['date'] = when.moment.date()
+        await update.message.reply_text("⏰ Во сколько? Например: 14:30, в 9, в 7 вечера")
+        return WAITING_TIME
+
+    await update.message.reply_text(f"📅 Когда напомнить? Например: {WHEN_EXAMPLES}")
     return WAITING_DATE
 
+@metrics.instrument
 async def handle_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка даты"""
-    date = update.message.text
-    if len(date) != 5 or date[2] != '.':
-        await update.message.reply_text("❌ Неправильный формат. Используйте ДД.ММ (например: 25.12)")
+    """Обработка даты (можно сразу со временем: "завтра в 9")"""
+    when = parse_when(update.message.text, datetime.now(chat_timezone(update, context)))
+    if when is None:
+        await update.message.reply_text(f"❌ Не понял дату. Например: {WHEN_EXAMPLES}")
         return WAITING_DATE
 
-    context.user_data['date'] = date
-    await update.message.reply_text("⏰ Теперь введите время в формате ЧЧ:ММ (например: 14:30):")
-    return WAITING_TIME
+    if not when.has_time:
+        context.user_data['date'] = when.moment.date()
+        await update.message.reply_text("⏰ Во сколько? Например: 14:30, в 9, в 7 вечера")
+        return WAITING_TIME
+
+    return await confirm_when(update, context, when.moment)
 
+@metrics.instrument
 async def handle_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработка времени"""
-    time = update.message.text
-    if len(time) != 5 or time[2] != ':':
-        await update.message.reply_text("❌ Неправильный формат. Используйте ЧЧ:ММ (например: 14:30)")
+    """Обработка времени для уже выбранной даты"""
+    when = parse_when(
+        update.message.text, datetime.now(chat_timezone(update, context)), day=context.user_data['date']
+    )
+    if when is None or not when.has_time:
+        await update.message.reply_text("❌ Не понял время. Например: 14:30, в 9, в 7 вечера")
         return WAITING_TIME
-    
-    # Проверяем, что время еще не прошло
-    date = context.user_data['date']
-    now_utc3 = datetime.now(TIMEZONE)
-    try:
-        reminder_date_str = f"{date}.{now_utc3.year}"
-        reminder_datetime_naive = datetime.strptime(f"{reminder_date_str} {time}", "%d.%m.%Y %H:%M")
-        reminder_datetime = TIMEZONE.localize(reminder_datetime_naive)
-        
-        if reminder_datetime <= now_utc3:
-            await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
-            return WAITING_DATE
-    except:
-        pass
-
-    context.user_data['time'] = time
 
-    # Показываем варианты повторения
-    keyboard = []
-    for i in range(0, len(REPEAT_OPTIONS), 2):
-        row = []
-        if i < len(REPEAT_OPTIONS):
-            row.append(InlineKeyboardButton(REPEAT_OPTIONS[i], callback_data=f'repeat_{i}'))
-        if i+1 < len(REPEAT_OPTIONS):
-            row.append(InlineKeyboardButton(REPEAT_OPTIONS[i+1], callback_data=f'repeat_{i+1}'))
-        keyboard.append(row)
+    return await confirm_when(update, context, when.moment)
 
-    reply_markup = InlineKeyboardMarkup(keyboard)
+async def confirm_when(update: Update, context: ContextTypes.DEFAULT_TYPE, moment: datetime):
+    """Проверяет, что момент в будущем, и предлагает выбрать повторение"""
+    if moment <= datetime.now(moment.tzinfo):
+        await update.message.reply_text("❌ Время для этой даты уже прошло. Укажите будущую дату.")
+        return WAITING_DATE
 
+    context.user_data['when'] = moment
     await update.message.reply_text(
         f"📝 Текст: {context.user_data['text']}\n"
-        f"📅 Дата: {context.user_data['date']}\n"
-        f"⏰ Время: {context.user_data['time']}\n\n"
+        f"{describe_when(moment)}\n\n"
         f"📌 Выберите тип повторения:",
-        reply_markup=reply_markup
+        reply_markup=repeat_keyboard()
     )
 
     return WAITING_REPEAT
 
+@metrics.instrument
 async def show_repeat_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показывает варианты повторения"""
     query = update.callback_query
     await query.answer()
 
-    keyboard = []
-    for i in range(0, len(REPEAT_OPTIONS), 2):
-        row = []
-        if i < len(REPEAT_OPTIONS):
-            row.append(InlineKeyboardButton(REPEAT_OPTIONS[i], callback_data=f'repeat_{i}'))
-        if i+1 < len(REPEAT_OPTIONS):
-            row.append(InlineKeyboardButton(REPEAT_OPTIONS[i+1], callback_data=f'repeat_{i+1}'))
-        keyboard.append(row)
-
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
     await query.edit_message_text(
         text="📌 Выберите тип повторения:",
-        reply_markup=reply_markup
+        reply_markup=repeat_keyboard()
     )
 
     return WAITING_REPEAT
 
+@metrics.instrument
 async def handle_repeat_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработка выбора повторения"""
     query = update.callback_query
@@ -611,136 +882,282 @@ async def handle_repeat_selection(update: Update, context: ContextTypes.DEFAULT_
     # Получаем данные
     if 'quick_add' in context.user_data:
         # Быстрое добавление
-        data = context.user_data['quick_add']
+        data = context.user_data.pop('quick_add')
         text = data['text']
-        date = data['date']
-        time = data['time']
-        del context.user_data['quick_add']
+        when = data['when']
     else:
         # Обычное добавление
         text = context.user_data['text']
-        date = context.user_data['date']
-        time = context.user_data['time']
+        when = context.user_data['when']
 
     # Получаем имя пользователя
     username = update.effective_user.username
     if not username:
         username = update.effective_user.first_name or "Неизвестно"
 
-    # Получаем объект таблицы
-    sheet = context.application.bot_data.get('sheet')
-    if not sheet:
-        await query.edit_message_text("❌ Не удалось подключиться к Google Sheets")
+    # Получаем хранилище напоминаний
+    storage = context.application.bot_data.get('storage')
+    if not storage:
+        await query.edit_message_text("❌ Хранилище напоминаний недоступно")
         return ConversationHandler.END
 
-    # Сохраняем напоминание в таблицу
-    row_number, reminder_datetime = save_reminder_with_datetime(
-        sheet, text, date, time, repeat_text, username
+    # Сохраняем напоминание в раздел чата, где его добавили
+    chat_id = chat_partition(update)
+    reminder_id, reminder_datetime = await save_reminder_with_datetime(
+        storage, text, when, repeat_text, username, chat_id
     )
 
-    if not row_number:
-        await query.edit_message_text("❌ Не удалось сохранить напоминание в таблицу")
+    if not reminder_id:
+        await query.edit_message_text("❌ Не удалось сохранить напоминание")
         return ConversationHandler.END
 
+    # Ставим напоминание в планировщик
+    scheduler = context.application.bot_data.get('scheduler')
+    registry = context.application.bot_data.get('chats')
+    if scheduler is not None and reminder_datetime:
+        schedule_reminder(scheduler, Reminder(
+            reminder_id, text, int(reminder_datetime.timestamp()), repeat_index, username, chat_id=chat_id
+        ), partition_timezone(registry, chat_id))
+
+    if registry is not None and registry.register(chat_id, update.effective_chat.title or ''):
+        print(f"➕ Новый чат с напоминаниями: {chat_id}")
+
     # Отправляем подтверждение
     await query.edit_message_text(
         f"✅ Напоминание сохранено!\n\n"
         f"📝 Текст: {text}\n"
-        f"📅 Дата: {date}\n"
-        f"⏰ Время: {time}\n"
+        f"{describe_when(reminder_datetime)}\n"
         f"🔁 Повторение: {repeat_text}\n"
         f"👤 Добавил: {username}\n\n"
-        f"📊 Сохранено в строку #{row_number}\n\n"
-        f"⚠️  Внимание: JobQueue не настроен.\n"
-        f"📌 Напоминания будут сохраняться в таблицу,\n"
-        f"но автоматическая отправка в группу не работает.\n"
-        f"🔧 Для включения автоматической отправки\n"
-        f"нужно настроить JobQueue."
+        f"📊 Номер напоминания: #{reminder_id}\n"
+        f"🔔 Напоминание будет отправлено в группу в указанное время"
     )
 
     return ConversationHandler.END
 
-async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /list - список всех напоминаний"""
-    sheet = context.application.bot_data.get('sheet')
-    if not sheet:
-        await update.message.reply_text("❌ Не удалось подключиться к Google Sheets")
+@metrics.instrument
+async def handle_quick_add_repeat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Кнопка повторения вне диалога /add: быстрое добавление из группы
+    ("бот напоминание Текст Когда") не открывает диалог
+    """
+    query = update.callback_query
+    data = context.user_data.get('quick_add')
+    # У нажавшего может лежать свое, более старое быстрое добавление —
+    # сохраняем, только если это его кнопки под его сообщением
+    if (
+        not data
+        or data.get('author') != query.from_user.id
+        or query.message is None
+        or data.get('message_id') != query.message.message_id
+    ):
+        await query.answer("⌛ Нечего сохранять: добавьте напоминание заново")
         return
+    await handle_repeat_selection(update, context)
+
+def parse_date_range(value: str, tz=None):
+    """
+    "ДД.ММ" или "ДД.ММ-ДД.ММ" (год можно указать: ДД.ММ.ГГГГ) -> (начало, конец) в epoch,
+    конец не включается. Без года берется ближайший период, который еще не прошел.
+    Границы дней — по поясу tz (по умолчанию — пояс бота).
+    """
+    tz = tz or TIMEZONE
+    parts = value.split('-')
+    if len(parts) > 2:
+        return None
+    try:
+        days = []
+        for part in parts:
+            fields = part.strip().split('.')
+            if len(fields) == 2:
+                day, month, year = int(fields[0]), int(fields[1]), None
+            elif len(fields) == 3:
+                day, month, year = int(fields[0]), int(fields[1]), int(fields[2])
+            else:
+                return None
+            days.append((day, month, year))
+
+        today = datetime.now(tz).date()
+        first, last = days[0], days[-1]
+        start_year = first[2] or today.year
+        start = datetime(start_year, first[1], first[0])
+        end = datetime(last[2] or start_year, last[1], last[0])
+        if last[2] is None and end < start:
+            end = end.replace(year=end.year + 1)
+        if first[2] is None and last[2] is None and end.date() < today:
+            start, end = start.replace(year=start.year + 1), end.replace(year=end.year + 1)
+    except ValueError:
+        return None
 
-    reminders = get_all_reminders(sheet)
+    return (
+        tz.localize(start).timestamp(),
+        tz.localize(end + timedelta(days=1)).timestamp(),
+    )
 
+def render_list_page(index: ReminderIndex, page: int, view: Optional[Dict] = None, tz=None):
+    """Текст и кнопки одной страницы /list; view — условия отбора и заголовок, сроки — в поясе tz"""
+    view = view or {}
+    criteria = {key: view[key] for key in ('words', 'author', 'start', 'end') if key in view}
+    keys = index.select(**criteria) if criteria else None
+    reminders, page, pages = index.page(page, LIST_PAGE_SIZE, keys)
     if not reminders:
-        await update.message.reply_text("📭 Напоминаний пока нет")
+        return view.get('empty', "📭 Предстоящих напоминаний нет"), None
+
+    total = len(index) if keys is None else len(keys)
+    response = f"{view.get('title', '📋 Предстоящие напоминания')} ({total}):\n\n"
+    for reminder in reminders:
+        text = reminder.text if len(reminder.text) <= 200 else reminder.text[:200] + "…"
+        response += f"{reminder.id}. {text} | {format_due(reminder, tz)} | {reminder.repeat_text}\n"
+        response += f"   👤 {reminder.author} | 📅 {reminder.created}\n\n"
+
+    if pages == 1:
+        return response, None
+    # Средняя кнопка перерисовывает текущую страницу
+    navigation = [
+        InlineKeyboardButton("◀️", callback_data=f'list_page_{(page - 1) % pages}'),
+        InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f'list_page_{page}'),
+        InlineKeyboardButton("▶️", callback_data=f'list_page_{(page + 1) % pages}'),
+    ]
+    return response, InlineKeyboardMarkup([navigation])
+
+async def reply_reminder_list(update: Update, context: ContextTypes.DEFAULT_TYPE, view: Optional[Dict] = None):
+    """Отвечает первой страницей списка и запоминает условия отбора для кнопок"""
+    storage = context.application.bot_data.get('storage')
+    if not storage:
+        await update.message.reply_text("❌ Хранилище напоминаний недоступно")
         return
 
-    response = "📋 Все напоминания:\n\n"
-    for i, reminder in enumerate(reminders, 1):
-        if len(reminder) >= 4:
-            response += f"{i}. {reminder[0]} | {reminder[1]} {reminder[2]} | {reminder[3]}\n"
-            if len(reminder) >= 6:
-                response += f"   👤 {reminder[4]} | 📅 {reminder[5]}\n"
-            response += "\n"
-
-    # Разбиваем сообщение, если оно слишком длинное
-    if len(response) > 4000:
-        parts = [response[i:i+4000] for i in range(0, len(response), 4000)]
-        for part in parts:
-            await update.message.reply_text(part)
-    else:
-        await update.message.reply_text(response)
+    await storage.refresh_index()
+    text, reply_markup = render_list_page(
+        storage.index.for_chat(chat_partition(update)), 0, view, chat_timezone(update, context)
+    )
+    message = await update.message.reply_text(text, reply_markup=reply_markup)
+
+    if view and reply_markup:
+        views = context.chat_data.setdefault('list_views', {})
+        views[message.message_id] = view
+        while len(views) > LIST_VIEWS_KEPT:
+            del views[next(iter(views))]
+
+@metrics.instrument
+async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /list [ДД.ММ-ДД.ММ] - предстоящие напоминания по страницам"""
+    if not context.args:
+        await reply_reminder_list(update, context)
+        return
+
+    period = parse_date_range(''.join(context.args), chat_timezone(update, context))
+    if period is None:
+        await update.message.reply_text(
+            "❌ Неверный период. Используйте: `/list 25.12` или `/list 25.12-31.12`",
+            parse_mode='Markdown'
+        )
+        return
+
+    await reply_reminder_list(update, context, {
+        'start': period[0],
+        'end': period[1],
+        'title': f"📅 Напоминания за {' '.join(context.args)}",
+        'empty': "📭 В этот период напоминаний нет",
+    })
+
+@metrics.instrument
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE, words: Optional[str] = None):
+    """Команда /find слова - поиск по тексту напоминаний (по началу слов)"""
+    words = words if words is not None else ' '.join(context.args or [])
+    if not words.strip():
+        await update.message.reply_text("❌ Укажите, что искать.\nПример: `/find встреча`", parse_mode='Markdown')
+        return
 
+    await reply_reminder_list(update, context, {
+        'words': words,
+        'title': f"🔍 Найдено по «{words}»",
+        'empty': f"📭 По запросу «{words}» ничего не найдено",
+    })
+
+@metrics.instrument
+async def mine_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /mine - напоминания, добавленные вами"""
+    # Автор сохраняется так же — username, иначе имя
+    author = update.effective_user.username or update.effective_user.first_name or "Неизвестно"
+    await reply_reminder_list(update, context, {
+        'author': author,
+        'title': "👤 Ваши напоминания",
+        'empty': "📭 У вас нет предстоящих напоминаний",
+    })
+
+@metrics.instrument
+async def list_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Кнопки листания /list, /find, /mine - редактируют то же сообщение"""
+    query = update.callback_query
+    await query.answer()
+
+    storage = context.application.bot_data.get('storage')
+    if not storage:
+        return
+
+    await storage.refresh_index()
+    view = context.chat_data.get('list_views', {}).get(query.message.message_id)
+    index = storage.index.for_chat(chat_partition(update))
+    text, reply_markup = render_list_page(
+        index, int(query.data[len('list_page_'):]), view, chat_timezone(update, context)
+    )
+    try:
+        await query.edit_message_text(text=text, reply_markup=reply_markup)
+    except BadRequest as e:
+        # Страница не изменилась с прошлого нажатия
+        if "not modified" not in str(e):
+            raise
+
+@metrics.instrument
 async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /del - очистка напоминания БЕЗ подтверждения"""
     if not context.args:
         await update.message.reply_text(
-            "❌ Укажите номер строки для очистки\nПример: `/del 2`",
+            "❌ Укажите номер напоминания из /list\nПример: `/del 2`",
             parse_mode='Markdown'
         )
         return
 
     try:
-        # 1. Получаем номер строки из аргумента
-        row_number = int(context.args[0])
+        # 1. Получаем номер напоминания из аргумента
+        reminder_id = int(context.args[0])
 
-        # 2. Проверяем, что номер положительный (можно удалять с 1)
-        if row_number < 1:
-            await update.message.reply_text("❌ Номер строки должен быть положительным")
+        # 2. Проверяем, что номер положительный
+        if reminder_id < 1:
+            await update.message.reply_text("❌ Номер напоминания должен быть положительным")
             return
 
-        # 3. Получаем объект таблицы
-        sheet = context.application.bot_data.get('sheet')
-        if not sheet:
-            await update.message.reply_text("❌ Не удалось подключиться к Google Sheets")
+        # 3. Получаем хранилище напоминаний
+        storage = context.application.bot_data.get('storage')
+        if not storage:
+            await update.message.reply_text("❌ Хранилище напоминаний недоступно")
             return
 
-        # 4. Получаем все данные для проверки
-        all_data = sheet.get_all_values()
-
-        # Строка 0 в all_data = Заголовок (строка 1 в таблице). Поэтому проверяем row_number > len(all_data)-1
-        if row_number > (len(all_data) - 1):  # -1, так как заголовок не считаем
-            await update.message.reply_text(f"❌ Строка #{row_number} не найдена")
+        # 4. Удаляем (таблица-зеркало очистится в фоне); напоминания других чатов не трогаем
+        if not await delete_reminder(storage, reminder_id, chat_partition(update)):
+            await update.message.reply_text(f"❌ Напоминание #{reminder_id} не найдено")
             return
 
-        # 5. ОЧИСТКА СТРОКИ (БЕЗ УДАЛЕНИЯ ИЗ ТАБЛИЦЫ)
-        sheet_row_to_clear = row_number + 1  # Преобразуем ввод пользователя (начиная с 1) в номер строки в таблице
-
-        # Обновляем строку в Google Sheets, затирая данные в столбцах A-F
-        empty_row = ['', '', '', '', '', '', '', '']
-        sheet.update(f'A{sheet_row_to_clear}:H{sheet_row_to_clear}', [empty_row])
+        # 5. Убираем напоминание из планировщика
+        scheduler = context.application.bot_data.get('scheduler')
+        if scheduler is not None:
+            scheduler.cancel(reminder_id)
 
         # 6. Отправляем сообщение об успехе
-        await update.message.reply_text(f"✅ Напоминание в строке #{row_number} очищено")
+        await update.message.reply_text(f"✅ Напоминание #{reminder_id} удалено")
 
     except ValueError:
-        await update.message.reply_text("❌ Неверный формат. Используйте: `/del номер_строки`", parse_mode='Markdown')
+        await update.message.reply_text("❌ Неверный формат. Используйте: `/del номер`", parse_mode='Markdown')
     except Exception as e:
         await update.message.reply_text(f"❌ Произошла ошибка при очистке: `{e}`")
 
+@metrics.instrument
 async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Команда /test - тестовая отправка в группу"""
     try:
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=delivery_target(context.application, chat_partition(update)),
             text="🧪 Тестовое сообщение от бота!\n"
                  f"📅 Дата: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n"
                  f"👤 От: {update.effective_user.username or update.effective_user.first_name}"
@@ -749,53 +1166,389 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка отправки: {e}")
 
+@metrics.instrument
+async def tz_command(update: Update, context: ContextTypes.DEFAULT_TYPE, name: Optional[str] = None):
+    """Команда /tz [пояс] - часовой пояс чата (в личном чате — ваш)"""
+    registry = context.application.bot_data.get('chats')
+    if not registry:
+        await update.message.reply_text("❌ Настройки чатов недоступны")
+        return
+
+    name = name if name is not None else ' '.join(context.args or [])
+    if not name.strip():
+        await update.message.reply_text(
+            f"🌍 Часовой пояс: {describe_timezone(chat_timezone(update, context))}\n"
+            "Изменить: /tz Asia/Yekaterinburg"
+        )
+        return
+
+    zone = find_timezone(name)
+    if zone is None:
+        await update.message.reply_text(
+            f"❌ Неизвестный часовой пояс: {name}\n"
+            "Укажите пояс IANA, например: Europe/Moscow, Asia/Yekaterinburg, Europe/Berlin"
+        )
+        return
+
+    registry.set_timezone(update.effective_chat.id, zone)
+    owner = "Ваш часовой пояс" if update.effective_chat.type == Chat.PRIVATE else "Часовой пояс чата"
+    await update.message.reply_text(f"✅ {owner}: {describe_timezone(get_timezone(zone))}")
+    print(f"🌍 Чат {update.effective_chat.id}: часовой пояс {zone}")
+
+@metrics.instrument
 async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отмена диалога"""
     await update.message.reply_text("❌ Диалог отменен")
     context.user_data.clear()
     return ConversationHandler.END
 
+# ========== КОМАНДЫ ИЗ ГРУППЫ ==========
+# Обработчик получает аргументы — все, что написано после команды
+async def group_help(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    await help_command(update, context)
+
+async def group_list(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    await reply_reminder_list(update, context)
+
+async def group_find(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    await find_command(update, context, args)
+
+async def group_mine(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    await mine_command(update, context)
+
+async def group_tz(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    await tz_command(update, context, args)
+
+async def group_add(update: Update, context: ContextTypes.DEFAULT_TYPE, args: str):
+    if args:
+        await add_reminder_from_group(update, context, args)
+        return
+    # Запрашиваем данные для добавления напоминания
+    await update.message.reply_text(
+        "📝 Для добавления напоминания напишите в формате:\n"
+        "бот напоминание Текст Когда\n"
+        f"Когда: {WHEN_EXAMPLES}\n\n"
+        "Пример: бот напоминание Совещание 25.12 14:30"
+    )
+
+# Первое слово после "бот" -> обработчик
+GROUP_COMMANDS = {
+    'помощь': group_help,
+    'help': group_help,
+    'список': group_list,
+    'list': group_list,
+    'найти': group_find,
+    'мои': group_mine,
+    'mine': group_mine,
+    'пояс': group_tz,
+    'tz': group_tz,
+    'напоминание': group_add,
+    'добавить': group_add,
+    'add': group_add,
+}
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик ошибок"""
-    print(f"⚠️ Ошибка: {context.error}")
+    """Обработчик ошибок: полный traceback в лог, тип ошибки — в метрики"""
+    error = context.error
+    metrics.UPDATE_ERRORS.inc(type=type(error).__name__)
+    chat = update.effective_chat.id if isinstance(update, Update) and update.effective_chat else None
+    print(f"⚠️ Ошибка ({type(error).__name__}, чат {chat}): {error}")
+    print(''.join(traceback.format_exception(error)).rstrip())
     if update and update.effective_message:
         await update.effective_message.reply_text("❌ Произошла ошибка при обработке команды")
 
-# ========== ОСНОВНАЯ ФУНКЦИЯ ==========
-def main():
-    """Основная функция для запуска бота"""
-    print("🤖 Запуск Telegram бота напоминаний...")
-    print(f"📅 Дата запуска: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
-    print(f"🌍 Часовой пояс: {TIMEZONE}")
-    
-    # Проверяем обязательные переменные окружения
-    required_env_vars = ['BOT_TOKEN', 'GOOGLE_CREDENTIALS_JSON']
-    missing_vars = [var for var in required_env_vars if not os.environ.get(var)]
-    
-    if missing_vars:
-        print(f"❌ ОШИБКА: Не установлены обязательные переменные окружения:")
-        for var in missing_vars:
-            print(f"   - {var}")
-        print("\nℹ️  Установите переменные окружения:")
-        print("   export BOT_TOKEN='ваш_токен'")
-        print("   export GOOGLE_CREDENTIALS_JSON='ваш_json'")
-        return
+# ========== ЗАПУСК И ОСТАНОВКА ПЛАНИРОВЩИКА ==========
+async def load_reminders(application: Application):
+    """Строит индекс, досылает пропущенное и ставит напоминания в планировщик"""
+    storage = application.bot_data['storage']
+    await storage.refresh_index()
 
-    # Настраиваем подключение к Google Sheets
-    sheet = setup_google_sheets()
-    if not sheet:
-        print("⚠️  Предупреждение: Не удалось подключиться к Google Sheets")
-        print("ℹ️  Бот будет работать, но без сохранения в таблицу")
+    # Пропущенное за время простоя уходит одной пачкой, а не через планировщик
+    missed = await catch_up_missed(application)
 
-    # Создаем приложение бота
-    application = Application.builder().token(BOT_TOKEN).build()
+    count = await load_reminders_into_scheduler(
+        storage, application.bot_data['scheduler'], skip=missed, registry=application.bot_data.get('chats')
+    )
+    print(f"⏰ Загружено напоминаний в планировщик: {count}")
 
-    # Сохраняем объект sheet в данные бота
+async def attach_sheet(application: Application, sheet):
+    """
+    Подключает таблицу к работающему боту: очередь записи и кэш,
+    зеркало SQLite (или само хранилище в режиме "sheets"),
+    синхронизацию и сжатие таблицы.
+    """
+    bot_data = application.bot_data
+    executor = bot_data['sheets_executor']
+    # Переподключаться умеет только настоящий лист gspread, не поддельный из бенчмарков
+    if isinstance(sheet, gspread.Worksheet):
+        executor.reconnect = functools.partial(reconnect, sheet, SHEETS_WORKERS)
+    writer = SheetsWriteQueue(
+        sheet, executor,
+        max_batch=SHEETS_BATCH_SIZE,
+        flush_interval=SHEETS_FLUSH_INTERVAL
+    )
+    repo = ReminderRepository(sheet, executor, writer, ttl=REMINDER_CACHE_TTL)
+    bot_data['sheet'] = sheet
+    bot_data['reminders'] = repo
+    scheduler = bot_data['scheduler']
+
+    sync = None
+    if STORAGE_BACKEND == "sheets":
+        storage = SheetsReminderStorage(repo, parse_reminder_timestamp, default_chat_id=GROUP_CHAT_ID)
+        storage.index = PartitionedIndex(GROUP_CHAT_ID)
+        bot_data['storage'] = storage
+        await load_reminders(application)
+    else:
+        storage = bot_data['storage']
+        storage.attach_mirror(SheetsMirror(repo))
+        storage.on_sheet_removed = scheduler.cancel
+        # Первый запуск с SQLite: переносим существующие строки из таблицы
+        if bot_data.pop('import_from_sheet', False):
+            rows = await repo.get_all()
+            imported = storage.import_rows([
+                (index, row, parse_reminder_timestamp(row[6]) if len(row) >= 7 else None)
+                for index, row in enumerate(rows, start=2)
+            ])
+            print(f"📥 Импортировано напоминаний из Google Таблицы: {imported}")
+            await load_reminders(application)
+
+        # Фоновая синхронизация с ручными правками таблицы
+        sync = SheetsSync(
+            storage, repo, storage.mirror,
+            parse_due=parse_reminder_timestamp,
+            on_upsert=make_sync_upsert_callback(scheduler, storage, bot_data.get('chats')),
+            on_remove=scheduler.cancel,
+            interval=SHEETS_SYNC_INTERVAL
+        )
+        bot_data['sheets_sync'] = sync
+        sync.start()
+        print(f"🔁 Синхронизация с Google Таблицей каждые {SHEETS_SYNC_INTERVAL:.0f} с")
+
+    # Сжатие таблицы: затертые строки удаляются одним запросом
+    compactor = SheetsCompactor(storage, repo, interval=SHEETS_COMPACT_INTERVAL, sync=sync)
+    bot_data['sheets_compactor'] = compactor
+    compactor.start()
+
+def register_gauges(application: Application):
+    """Датчики очередей читаются при каждом запросе /metrics"""
+    bot_data = application.bot_data
+    processor = application.update_processor
+    metrics.SCHEDULED.set_function(lambda: len(bot_data['scheduler']))
+    metrics.DELIVERY_QUEUE.set_function(lambda: bot_data['delivery'].queue_depth)
+    if isinstance(processor, ChatOrderedProcessor):
+        metrics.UPDATES_WAITING.set_function(lambda: processor.metrics()['updates_waiting'])
+        metrics.UPDATES_IN_FLIGHT.set_function(lambda: processor.in_flight)
+    # Таблица подключается в фоне — кэш ищется при каждом чтении
+    metrics.SHEETS_WRITES_PENDING.set_function(
+        lambda: bot_data['reminders'].writer.pending if bot_data.get('reminders') else 0
+    )
+    breaker = bot_data['sheets_executor'].breaker
+    metrics.SHEETS_CIRCUIT_OPEN.set_function(lambda: int(breaker.state == CircuitBreaker.OPEN))
+
+async def post_init(application: Application):
+    """Загружает напоминания из хранилища и запускает планировщик и очередь отправки"""
+    async def send(chat_id: int, text: str):
+        await application.bot.send_message(chat_id=chat_id, text=text)
+
+    delivery = DeliveryQueue(
+        send,
+        global_rate=DELIVERY_GLOBAL_RATE,
+        group_rate_per_minute=DELIVERY_GROUP_RATE,
+        concurrency=DELIVERY_CONCURRENCY,
+        max_retries=DELIVERY_MAX_RETRIES
+    )
+    application.bot_data['delivery'] = delivery
+    delivery.start()
+
+    scheduler = create_scheduler(SCHEDULER_MODE, make_send_callback(application))
+    application.bot_data['scheduler'] = scheduler
+
+    storage = application.bot_data.get('storage')
+    sheet = application.bot_data.get('sheet')
+    credentials_info = credentials_info_from_env() if sheet is None else None
+
+    # Напоминания из SQLite загружаются сразу; из таблицы — когда она подключится.
+    # Первый запуск с пустой базой ждет таблицу: из нее переносятся строки
+    sheet_expected = sheet is not None or bool(credentials_info)
+    if isinstance(storage, SQLiteReminderStorage) and sheet_expected and storage.count() == 0:
+        application.bot_data['import_from_sheet'] = True
+    elif storage:
+        await load_reminders(application)
+    scheduler.start()
+    print(f"✅ Планировщик напоминаний запущен (режим: {SCHEDULER_MODE})")
+
+    if sheet is not None:
+        # Лист передан готовым (бенчмарки) — подключать нечего
+        await attach_sheet(application, sheet)
+    elif credentials_info:
+        # Подключение к таблице не задерживает прием обновлений
+        application.bot_data['sheets_connect_task'] = asyncio.create_task(
+            connect_sheets_in_background(application, credentials_info)
+        )
+    else:
+        print("⚠️  Предупреждение: Google Sheets не подключена")
+        print("ℹ️  Напоминания сохраняются только в локальную базу")
+
+    register_gauges(application)
+    # В режиме вебхука /metrics отдает сервер вебхука
+    if BOT_MODE != "webhook" and METRICS_PORT:
+        server = WebhookServer(
+            application, None, host=METRICS_HOST, port=METRICS_PORT,
+            health=lambda: health_status(application)
+        )
+        await server.start()
+        application.bot_data['metrics_server'] = server
+    metrics.STARTUP.mark('ready')
+
+async def post_shutdown(application: Application):
+    """Останавливает планировщик, синхронизацию и отправку, закрывает хранилище и пул потоков"""
+    server = application.bot_data.get('metrics_server')
+    if server:
+        await server.stop()
+
+    connect_task = application.bot_data.get('sheets_connect_task')
+    if connect_task and not connect_task.done():
+        connect_task.cancel()
+
+    sync = application.bot_data.get('sheets_sync')
+    if sync:
+        await sync.stop()
+
+    compactor = application.bot_data.get('sheets_compactor')
+    if compactor:
+        await compactor.stop()
+
+    scheduler = application.bot_data.get('scheduler')
+    if scheduler is not None:
+        await scheduler.stop()
+        print("🛑 Планировщик напоминаний остановлен")
+
+    # Дожидаемся сообщений, уже поставленных в очередь;
+    # неотправленные останутся в outbox до следующего запуска
+    delivery = application.bot_data.get('delivery')
+    if delivery:
+        await delivery.stop()
+    catch_up = application.bot_data.get('catch_up_task')
+    if catch_up and not catch_up.done():
+        catch_up.cancel()
+
+    storage = application.bot_data.get('storage')
+    if storage:
+        await storage.close()
+
+    executor = application.bot_data.get('sheets_executor')
+    if executor:
+        executor.shutdown()
+
+    outbox = application.bot_data.get('outbox')
+    if outbox:
+        outbox.close()
+
+    registry = application.bot_data.get('chats')
+    if registry:
+        registry.close()
+
+    # Состояние диалогов PTB уже записал при остановке (flush)
+    if isinstance(application.persistence, SQLitePersistence):
+        application.persistence.close()
+
+def sheets_state(application: Application) -> str:
+    """Состояние таблицы: подключается, disabled или состояние предохранителя"""
+    if application.bot_data.get('reminders'):
+        return application.bot_data['sheets_executor'].breaker.state
+    task = application.bot_data.get('sheets_connect_task')
+    return 'connecting' if task is not None and not task.done() else 'disabled'
+
+def health_status(application: Application) -> Dict:
+    """Состояние для GET /health"""
+    scheduler = application.bot_data.get('scheduler')
+    delivery = application.bot_data.get('delivery')
+    return {
+        'scheduled': len(scheduler) if scheduler is not None else 0,
+        'delivery_queue': delivery.queue_depth if delivery else 0,
+        # Глубина очереди, отправлено/ошибок/повторов и время разбора последней пачки
+        'delivery': delivery.metrics() if delivery else {},
+        'sheets': sheets_state(application),
+        **application.update_processor.metrics(),
+    }
+
+# ========== ОСНОВНАЯ ФУНКЦИЯ ==========
+def create_storage():
+    """
+    Создает хранилище по STORAGE_BACKEND. В режиме "sheets" хранилища
+    нет, пока не подключится таблица (attach_sheet).
+    """
+    if STORAGE_BACKEND == "sheets":
+        return None
+    storage = SQLiteReminderStorage(DATABASE_PATH, default_chat_id=GROUP_CHAT_ID)
+    print(f"💾 Локальная база напоминаний: {DATABASE_PATH}")
+    return storage
+
+def build_application(
+    sheet=None,
+    token: Optional[str] = None,
+    base_url: Optional[str] = None,
+    polling: bool = True
+) -> Application:
+    """
+    Собирает приложение: хранилище, реестр чатов и обработчики.
+    sheet — готовый лист (бенчмарки); без него таблица подключается
+    в фоне после запуска по GOOGLE_CREDENTIALS_JSON.
+    base_url — другой адрес Bot API (бенчмарки с поддельным Telegram),
+    polling=False — без встроенного Updater (вебхук).
+    """
+    builder = (
+        Application.builder()
+        .token(token or BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .concurrent_updates(ChatOrderedProcessor(
+            UPDATE_CONCURRENCY, on_first_update=lambda: metrics.STARTUP.mark('first_update')
+        ))
+        .persistence(SQLitePersistence(
+            DATABASE_PATH,
+            update_interval=PERSISTENCE_INTERVAL,
+            max_age=DIALOG_MAX_AGE_HOURS * 3600
+        ))
+    )
+    if base_url:
+        builder = builder.base_url(base_url)
+    if not polling:
+        # Обновления принимает свой сервер, встроенный Updater не нужен
+        builder = builder.updater(None)
+    application = builder.build()
+
+    # Готовый лист (бенчмарки) подключится в post_init; без него таблица
+    # подключается в фоне после запуска — кэш и зеркало появятся тогда же
     application.bot_data['sheet'] = sheet
+    application.bot_data['reminders'] = None
+    executor = SheetsExecutor(
+        max_workers=SHEETS_WORKERS,
+        timeout=SHEETS_TIMEOUT,
+        retries=SHEETS_RETRIES,
+        backoff=SHEETS_BACKOFF,
+        max_delay=SHEETS_MAX_DELAY,
+        breaker=CircuitBreaker(SHEETS_BREAKER_FAILURES, SHEETS_BREAKER_RESET),
+    )
+    application.bot_data['sheets_executor'] = executor
+    storage = create_storage()
+    application.bot_data['storage'] = storage
+    if storage:
+        storage.index = PartitionedIndex(GROUP_CHAT_ID)
+    application.bot_data['outbox'] = DeliveryOutbox(DATABASE_PATH)
+    registry = ChatRegistry(DATABASE_PATH, TIMEZONE.zone)
+    for chat_id, target_chat_id in parse_chat_targets(CHAT_TARGETS).items():
+        registry.set_target(chat_id, target_chat_id)
+    application.bot_data['chats'] = registry
+    print(f"💬 Группы: {GROUP_CHAT_IDS}, известных чатов: {len(registry.chats())}")
+
+    # Команды работают в личных чатах и в обслуживаемых группах
+    served_chats = served_chats_filter()
+    served = filters.ChatType.PRIVATE | served_chats
 
     # Создаем ConversationHandler для диалога добавления
     conv_handler = ConversationHandler(
-        entry_points=[CommandHandler('add', add_command)],
+        entry_points=[CommandHandler('add', add_command, filters=served)],
         states={
             WAITING_TEXT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text)],
             WAITING_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_date)],
@@ -808,32 +1561,74 @@ def main():
         fallbacks=[CommandHandler('cancel', cancel_command)],
         per_chat=True,
         per_user=True,
-        per_message=False
+        per_message=False,
+        # Состояние диалога сохраняется в SQLite (persistence.py)
+        name='add_reminder',
+        persistent=True
     )
 
     # Регистрируем обработчики команд
     application.add_handler(conv_handler)
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("list", list_command))
-    application.add_handler(CommandHandler("del", delete_command))
-    application.add_handler(CommandHandler("test", test_command))
-
-    # Обработчик сообщений в группе
+    # Выбор повторения после "бот напоминание ..." в группе — диалог для него не открыт
+    application.add_handler(CallbackQueryHandler(handle_quick_add_repeat, pattern=r'^repeat_\d+$'))
+    application.add_handler(CommandHandler("start", start_command, filters=served))
+    application.add_handler(CommandHandler("help", help_command, filters=served))
+    application.add_handler(CommandHandler("list", list_command, filters=served))
+    application.add_handler(CommandHandler("find", find_command, filters=served))
+    application.add_handler(CommandHandler("mine", mine_command, filters=served))
+    application.add_handler(CallbackQueryHandler(list_page_callback, pattern=r'^list_page_\d+$'))
+    application.add_handler(CommandHandler("del", delete_command, filters=served))
+    application.add_handler(CommandHandler("test", test_command, filters=served))
+    application.add_handler(CommandHandler("tz", tz_command, filters=served))
+
+    # Обработчик сообщений в группе: необращенные к боту отсекаются
+    # дешевым фильтром еще до вызова обработчика
     application.add_handler(MessageHandler(
-        filters.TEXT & filters.Chat(chat_id=GROUP_CHAT_ID),
+        ADDRESSED_TO_BOT & served_chats,
         handle_group_message
     ))
 
     # Регистрируем обработчик ошибок
     application.add_error_handler(error_handler)
+    return application
+
+def main():
+    """Основная функция для запуска бота"""
+    print("🤖 Запуск Telegram бота напоминаний...")
+    print(f"📅 Дата запуска: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+    print(f"🌍 Часовой пояс: {TIMEZONE}")
+    metrics.STARTUP.report('imports')
+    
+    # Проверяем обязательные переменные окружения
+    # (без SQLite таблица — единственное хранилище, значит без нее никак)
+    required_env_vars = ['BOT_TOKEN']
+    if STORAGE_BACKEND == "sheets":
+        required_env_vars.append('GOOGLE_CREDENTIALS_JSON')
+    missing_vars = [var for var in required_env_vars if not os.environ.get(var)]
+    
+    if missing_vars:
+        print(f"❌ ОШИБКА: Не установлены обязательные переменные окружения:")
+        for var in missing_vars:
+            print(f"   - {var}")
+        print("\nℹ️  Установите переменные окружения:")
+        print("   export BOT_TOKEN='ваш_токен'")
+        print("   export GOOGLE_CREDENTIALS_JSON='ваш_json'")
+        return
 
-    print("✅ Бот инициализирован. Запускаю...")
-    print("⚠️  JobQueue не настроен. Напоминания сохраняются в таблицу,")
-    print("   но автоматическая отправка в группу не работает.")
+    # Google Sheets подключается в фоне уже после запуска (post_init)
+    application = build_application(None, polling=BOT_MODE != "webhook")
+    print(f"✅ Бот инициализирован. Запускаю (режим: {BOT_MODE})...")
 
     # Запускаем бота
-    application.run_polling(allowed_updates=Update.ALL_TYPES, stop_signals=None)
+    if BOT_MODE == "webhook":
+        server = WebhookServer(
+            application, WEBHOOK_PATH, WEBHOOK_SECRET,
+            port=WEBHOOK_PORT,
+            health=lambda: health_status(application)
+        )
+        asyncio.run(serve_webhook(application, server, WEBHOOK_URL, ALLOWED_UPDATES))
+    else:
+        application.run_polling(allowed_updates=ALLOWED_UPDATES, stop_signals=None)
 
 # ========== ТОЧКА ВХОДА ==========
 if __name__ == "__main__":
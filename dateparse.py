@@ -0,0 +1,313 @@
+"""
+🗓️ РАЗБОР ДАТЫ И ВРЕМЕНИ НА РУССКОМ
+Понимает привычный формат и обычную речь:
+  • "25.12 14:30", "25.12.2027 9:00", "14:30";
+  • "завтра в 9", "послезавтра в 7 вечера", "сегодня в полдень";
+  • "в пятницу 14:30", "во вторник в 10", "пн 9:15";
+  • "25 декабря", "1 января 2027 в 12:00";
+  • "через 2 часа", "через полчаса", "через 3 дня в 10".
+Выражение разбирается слева направо заранее скомпилированными
+регулярными выражениями: на каждой позиции пробуются компоненты
+(день, время), слова переводятся в числа по таблицам. Самый частый
+вид "Текст ДД.ММ ЧЧ:ММ" обрабатывается одним выражением без перебора.
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import pytz
+
+# Время по умолчанию, если указан только день ("25 декабря", "завтра")
+DEFAULT_TIME = time(9, 0)
+
+# Сколько последних (или первых) слов сообщения может занимать дата и время
+MAX_WHEN_WORDS = 7
+
+# Дни недели: именительный и винительный падежи ("в среду"), сокращения
+WEEKDAYS_RU = {
+    'понедельник': 0,
+    'вторник': 1,
+    'среда': 2, 'среду': 2,
+    'четверг': 3,
+    'пятница': 4, 'пятницу': 4,
+    'суббота': 5, 'субботу': 5,
+    'воскресенье': 6,
+    'пн': 0, 'вт': 1, 'ср': 2, 'чт': 3, 'пт': 4, 'сб': 5, 'вс': 6
+}
+
+# Месяцы: родительный падеж ("25 декабря") и сокращения
+MONTHS_RU = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4, 'мая': 5, 'июня': 6,
+    'июля': 7, 'августа': 8, 'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12,
+    'янв': 1, 'фев': 2, 'мар': 3, 'апр': 4, 'июн': 6, 'июл': 7,
+    'авг': 8, 'сен': 9, 'сент': 9, 'окт': 10, 'ноя': 11, 'нояб': 11, 'дек': 12,
+}
+
+# "сегодня" / "завтра" / "послезавтра" -> сдвиг в днях
+DAY_WORDS = {'сегодня': 0, 'завтра': 1, 'послезавтра': 2}
+
+# Единицы для "через N ...", в секундах
+UNITS = {
+    'минуту': 60, 'минуты': 60, 'минут': 60, 'мин': 60,
+    'час': 3600, 'часа': 3600, 'часов': 3600, 'ч': 3600,
+    'день': 86400, 'дня': 86400, 'дней': 86400, 'сутки': 86400,
+    'неделю': 604800, 'недели': 604800, 'недель': 604800,
+    'полчаса': 1800,
+}
+
+# "в полдень", "в полночь"
+CLOCK_WORDS = {'полдень': time(12, 0), 'полночь': time(0, 0)}
+
+_END = r'(?=\s|$)'
+_PART_OF_DAY = r'(?:\s+(?P<part>утра|дня|вечера|ночи))?'
+
+_RELATIVE = re.compile(r'через\s+(?:(?P<count>\d{1,4})\s*)?(?P<unit>[а-я]+)' + _END)
+_DAY_WORD = re.compile(r'(?P<word>[а-я]+)' + _END)
+_WEEKDAY = re.compile(r'(?:во?\s+)?(?P<word>[а-я]+)' + _END)
+_NUMERIC_DATE = re.compile(r'(?P<day>\d{1,2})\.(?P<month>\d{1,2})(?:\.(?P<year>\d{4}|\d{2}))?' + _END)
+_WORD_DATE = re.compile(r'(?P<day>\d{1,2})\s+(?P<month>[а-я]+)\.?(?:\s+(?P<year>\d{4})(?:\s*г(?:ода|\.)?)?)?' + _END)
+_CLOCK = re.compile(r'(?:во?\s+)?(?P<hour>\d{1,2}):(?P<minute>\d{2})' + _PART_OF_DAY + _END)
+_HOUR = re.compile(r'во?\s+(?P<hour>\d{1,2})(?:\s+час(?:а|ов)?)?' + _PART_OF_DAY + _END)
+_CLOCK_WORD = re.compile(r'(?:в\s+)?(?P<word>полдень|полночь)' + _END)
+_SEPARATOR = re.compile(r'[\s,]*')
+
+# Быстрый путь: "ДД.ММ ЧЧ:ММ" и "Текст ДД.ММ ЧЧ:ММ"
+_FAST_WHEN = re.compile(r'(?P<day>\d{1,2})\.(?P<month>\d{1,2})\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})')
+_FAST_MESSAGE = re.compile(
+    r'(?P<text>.*\S)\s+(?P<day>\d{1,2})\.(?P<month>\d{1,2})\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})',
+    re.DOTALL
+)
+
+
+class When(NamedTuple):
+    """Разобранный момент: когда, был ли указан день и было ли указано время"""
+    moment: datetime
+    has_date: bool
+    has_time: bool
+
+
+def _normalize(phrase: str) -> str:
+    return ' '.join(phrase.lower().replace('ё', 'е').replace(',', ' ').split()).rstrip('.!?')
+
+
+def _at(now: datetime, day: date, clock: time) -> datetime:
+    """День + время по часам пояса, в котором задан now"""
+    zone_name = getattr(now.tzinfo, 'zone', None)
+    if zone_name:
+        tz = pytz.timezone(zone_name)
+        return tz.normalize(tz.localize(datetime.combine(day, clock)))
+    return datetime.combine(day, clock, tzinfo=now.tzinfo)
+
+
+def _year(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    year = int(value)
+    return year + 2000 if year < 100 else year
+
+
+def _clock(hour: int, minute: int, part: Optional[str]) -> Optional[time]:
+    if part in ('дня', 'вечера') and hour < 12:
+        hour += 12
+    elif part == 'ночи' and hour == 12:
+        hour = 0
+    elif part == 'утра' and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def _ceil_minute(moment: datetime) -> datetime:
+    """Напоминания срабатывают с точностью до минуты — округляем вверх"""
+    if moment.second or moment.microsecond:
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    return moment
+
+
+# ---------- компоненты выражения ----------
+# Каждый разбирает совпадение в {"day": ...} / {"clock": ...} / {"delta": ...}
+# или возвращает None, если слово не из таблицы
+
+def _relative(match, now):
+    seconds = UNITS.get(match.group('unit'))
+    count = match.group('count')
+    if seconds is None or (count is not None and match.group('unit') == 'полчаса'):
+        return None
+    delta = timedelta(seconds=seconds * int(count or 1))
+    if seconds < 86400:
+        # "через 2 часа" — точный момент, день и время уже определены
+        return {'moment': _ceil_minute(now + delta)}
+    return {'day': (now + delta).date(), 'delta': delta}
+
+
+def _day_word(match, now):
+    shift = DAY_WORDS.get(match.group('word'))
+    return None if shift is None else {'day': now.date() + timedelta(days=shift)}
+
+
+def _weekday(match, now):
+    weekday = WEEKDAYS_RU.get(match.group('word'))
+    if weekday is None:
+        return None
+    return {'day': now.date() + timedelta(days=(weekday - now.weekday()) % 7), 'weekday': True}
+
+
+def _numeric_date(match, now):
+    return _calendar_date(int(match.group('day')), int(match.group('month')), _year(match.group('year')), now)
+
+
+def _word_date(match, now):
+    month = MONTHS_RU.get(match.group('month'))
+    if month is None:
+        return None
+    return _calendar_date(int(match.group('day')), month, _year(match.group('year')), now)
+
+
+def _calendar_date(day: int, month: int, year: Optional[int], now: datetime):
+    try:
+        return {'day': date(year or now.year, month, day), 'year': year is not None}
+    except ValueError:
+        return None
+
+
+def _clock_match(match, now):
+    clock = _clock(int(match.group('hour')), int(match.group('minute')), match.group('part'))
+    return None if clock is None else {'clock': clock}
+
+
+def _hour_match(match, now):
+    clock = _clock(int(match.group('hour')), 0, match.group('part'))
+    return None if clock is None else {'clock': clock}
+
+
+def _clock_word(match, now):
+    return {'clock': CLOCK_WORDS[match.group('word')]}
+
+
+# (слот, выражение, разбор): в выражении каждый слот встречается не больше раза
+_COMPONENTS = (
+    ('day', _RELATIVE, _relative),
+    ('day', _DAY_WORD, _day_word),
+    ('day', _NUMERIC_DATE, _numeric_date),
+    ('day', _WORD_DATE, _word_date),
+    ('clock', _CLOCK, _clock_match),
+    ('clock', _HOUR, _hour_match),
+    ('clock', _CLOCK_WORD, _clock_word),
+    ('day', _WEEKDAY, _weekday),
+)
+
+
+def _scan(phrase: str, now: datetime) -> Optional[Dict]:
+    """Разбирает все выражение целиком; None — если хоть что-то не распознано"""
+    found: Dict = {}
+    position = 0
+    while position < len(phrase):
+        for slot, pattern, parse in _COMPONENTS:
+            if slot in found or 'moment' in found:
+                continue
+            match = pattern.match(phrase, position)
+            if not match:
+                continue
+            parsed = parse(match, now)
+            if parsed is None:
+                continue
+            if 'moment' in parsed and found:
+                return None
+            found.update(parsed)
+            position = _SEPARATOR.match(phrase, match.end()).end()
+            break
+        else:
+            return None
+    return found or None
+
+
+def _resolve(found: Dict, now: datetime, day: Optional[date]) -> When:
+    if 'moment' in found:
+        return When(found['moment'], True, True)
+
+    has_time = 'clock' in found
+    clock = found.get('clock')
+
+    if 'day' in found:
+        target = found['day']
+        if clock is None:
+            # "через 3 дня" — в то же время, "завтра" / "25 декабря" — утром
+            clock = _ceil_minute(now).time() if 'delta' in found else DEFAULT_TIME
+        moment = _at(now, target, clock)
+        if moment <= now:
+            if found.get('weekday'):
+                moment = _at(now, target + timedelta(days=7), clock)
+            elif found.get('year') is False:
+                # Дата без года уже прошла — значит, в следующем году
+                try:
+                    moment = _at(now, target.replace(year=target.year + 1), clock)
+                except ValueError:
+                    # 29 февраля
+                    pass
+        return When(moment, True, has_time)
+
+    # Только время: в указанный день, иначе сегодня или завтра
+    if day is not None:
+        return When(_at(now, day, clock), False, True)
+    moment = _at(now, now.date(), clock)
+    if moment <= now:
+        moment = _at(now, now.date() + timedelta(days=1), clock)
+    return When(moment, False, True)
+
+
+def _fast(match, now: datetime, day: Optional[date] = None) -> Optional[When]:
+    parsed = _calendar_date(int(match.group('day')), int(match.group('month')), None, now)
+    clock = _clock(int(match.group('hour')), int(match.group('minute')), None)
+    if parsed is None or clock is None:
+        return None
+    parsed['clock'] = clock
+    return _resolve(parsed, now, day)
+
+
+def parse_when(phrase: str, now: datetime, day: Optional[date] = None) -> Optional[When]:
+    """
+    Разбирает выражение даты/времени целиком ("завтра в 9", "25.12 14:30").
+    now — текущее время с часовым поясом; day — день для выражения,
+    в котором есть только время (ответ на вопрос "во сколько?").
+    Прошедший момент возвращается как есть — проверяет вызывающий.
+    """
+    phrase = _normalize(phrase)
+    if not phrase:
+        return None
+    match = _FAST_WHEN.fullmatch(phrase)
+    if match:
+        return _fast(match, now, day)
+    found = _scan(phrase, now)
+    return None if found is None else _resolve(found, now, day)
+
+
+def split_when(message: str, now: datetime) -> Optional[Tuple[str, When]]:
+    """
+    Делит сообщение на текст напоминания и дату/время в конце или в начале:
+    "Позвонить маме завтра в 9" -> ("Позвонить маме", завтра 09:00).
+    Текст сохраняет регистр и знаки; None — даты нет или нет текста.
+    """
+    message = message.strip()
+    match = _FAST_MESSAGE.fullmatch(message)
+    if match:
+        when = _fast(match, now)
+        if when is not None:
+            return match.group('text'), when
+
+    words = message.split()
+    if len(words) <= MAX_WHEN_WORDS and parse_when(message, now) is not None:
+        # Все сообщение — дата ("завтра в 9"), текста нет
+        return None
+    longest = min(MAX_WHEN_WORDS, len(words) - 1)
+    # Сначала дата в конце ("Совещание завтра в 10"), потом в начале ("завтра в 10 совещание")
+    for count in range(longest, 0, -1):
+        when = parse_when(' '.join(words[-count:]), now)
+        if when is not None:
+            return ' '.join(words[:-count]), when
+    for count in range(longest, 0, -1):
+        when = parse_when(' '.join(words[:count]), now)
+        if when is not None:
+            return ' '.join(words[count:]), when
+    return None
@@ -0,0 +1,322 @@
+"""
+📬 ОЧЕРЕДЬ ОТПРАВКИ СООБЩЕНИЙ
+Когда на одну минуту приходится много напоминаний, они уходят
+параллельно, но не быстрее лимитов Telegram:
+  • ~30 сообщений в секунду на бота (общий лимит);
+  • ~20 сообщений в минуту в одну группу, ~1 в секунду в личный чат.
+Лимиты соблюдаются корзинами токенов (общей и отдельной на каждый чат)
+емкостью в один токен: Telegram считает сообщения в скользящем окне,
+и корзина с запасом на всплеск превысила бы лимит в первом же окне.
+Число одновременных запросов ограничено числом воркеров; чат,
+которому корзина пока не дает токен, откладывается и не занимает воркер.
+У каждого чата своя очередь, а воркеры берут сообщения из чатов
+по кругу: сотни напоминаний одной группы не задерживают остальные.
+Внутри чата сообщения уходят по одному и в порядке постановки.
+Ответ 429 (RetryAfter) приостанавливает отправку на указанное время,
+сетевые ошибки повторяются с экспоненциальной задержкой.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+import metrics
+
+# Отправка: (ID чата, текст)
+SendFunc = Callable[[int, str], Awaitable[Any]]
+# Вызывается после отправки: True — доставлено, False — не удалось
+DoneCallback = Callable[[bool], Awaitable[None]]
+
+
+class TokenBucket:
+    """
+    Корзина токенов: rate токенов в секунду, не больше capacity подряд.
+    Токен резервируется сразу (баланс может уйти в минус), а вызывающий
+    ждет своей очереди — так порядок запросов сохраняется без блокировок.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Резервирует токен; возвращает, сколько секунд ждать"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Не выдавать токены ближайшие seconds секунд (после ответа 429)"""
+        self.reserve()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class _Delivery:
+    __slots__ = ('chat_id', 'text', 'on_done', 'attempt', 'reserved')
+
+    def __init__(self, chat_id: int, text: str, on_done: Optional[DoneCallback]):
+        self.chat_id = chat_id
+        self.text = text
+        self.on_done = on_done
+        self.attempt = 0
+        self.reserved = False   # токен чата уже зарезервирован
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    # В новых версиях python-telegram-bot retry_after — timedelta
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class DeliveryQueue:
+    """
+    Очередь отправки с лимитами Telegram, повторами и метриками.
+    Чат с сообщениями находится ровно в одном месте: в кольце готовых
+    чатов (_ready), среди отложенных по таймеру (_parked) или у воркера.
+    """
+
+    def __init__(
+        self,
+        send: SendFunc,
+        global_rate: float = 30,
+        group_rate_per_minute: float = 20,
+        private_rate: float = 1,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+    ):
+        self._send = send
+        self._global = TokenBucket(global_rate)
+        self._group_rate = group_rate_per_minute / 60
+        self._private_rate = private_rate
+        self._chats: Dict[int, TokenBucket] = {}
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._ready: Optional[asyncio.Queue] = None            # ID чатов по кругу
+        self._pending: Dict[int, Deque[_Delivery]] = {}        # очереди чатов с сообщениями
+        self._parked: Dict[int, asyncio.TimerHandle] = {}
+        self._workers = []
+        self._callbacks = set()                                 # задачи on_done, еще не завершенные
+        self._waiting = 0
+        self._in_flight = 0
+        self._burst_started: Optional[float] = None
+        self._burst_size = 0
+
+        # Счетчики для метрик
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.last_drain_seconds = 0.0
+        self.last_burst_size = 0
+
+    # ---------- фоновые воркеры ----------
+    def start(self):
+        if self._ready is None:
+            self._ready = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 10):
+        """Дожидается отправки очереди (не дольше timeout) и останавливает воркеров"""
+        if self._ready is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self.queue_depth and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.queue_depth:
+            print(f"⚠️ Не отправлено сообщений при остановке: {self.queue_depth}")
+
+        for timer in self._parked.values():
+            timer.cancel()
+        self._parked.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Отметки об отправке (запись в хранилище) не теряем
+        if self._callbacks:
+            await asyncio.gather(*self._callbacks, return_exceptions=True)
+        self._ready = None
+        self._pending.clear()
+        self._waiting = 0
+
+    def submit(self, chat_id: int, text: str, on_done: Optional[DoneCallback] = None):
+        """Ставит сообщение в очередь; on_done вызывается после отправки или отказа"""
+        if self._burst_started is None:
+            self._burst_started = time.monotonic()
+            self._burst_size = 0
+        self._burst_size += 1
+        self._waiting += 1
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            # Чат без сообщений становится в конец круга
+            self._pending[chat_id] = deque([_Delivery(chat_id, text, on_done)])
+            self._ready.put_nowait(chat_id)
+        else:
+            pending.append(_Delivery(chat_id, text, on_done))
+
+    # ---------- метрики ----------
+    @property
+    def queue_depth(self) -> int:
+        """Сообщения в очереди, отложенные и в процессе отправки"""
+        return self._waiting + self._in_flight
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            'queue_depth': self.queue_depth,
+            'chats_waiting': len(self._pending),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'last_drain_seconds': self.last_drain_seconds,
+            'last_burst_size': self.last_burst_size,
+        }
+
+    # ---------- отправка ----------
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                bucket = TokenBucket(self._group_rate)
+            else:
+                bucket = TokenBucket(self._private_rate)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _park(self, chat_id: int, delay: float):
+        """Возвращает чат в круг через delay секунд"""
+        self._parked[chat_id] = asyncio.get_running_loop().call_later(delay, self._unpark, chat_id)
+
+    def _unpark(self, chat_id: int):
+        del self._parked[chat_id]
+        self._ready.put_nowait(chat_id)
+
+    def _defer(self, delivery: _Delivery, delay: float):
+        """Повтор: сообщение снова первое в своем чате, чат ждет delay секунд"""
+        self._pending[delivery.chat_id].appendleft(delivery)
+        self._waiting += 1
+        self._park(delivery.chat_id, delay)
+
+    def _release(self, chat_id: int):
+        """Сообщение чата обработано: чат — в конец круга или из очереди"""
+        if self._pending[chat_id]:
+            self._ready.put_nowait(chat_id)
+        else:
+            del self._pending[chat_id]
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._ready.get()
+            pending = self._pending[chat_id]
+            delivery = pending[0]
+
+            if not delivery.reserved:
+                delay = self._chat_bucket(chat_id).reserve()
+                if delay > 0:
+                    # Чат исчерпал лимит — ждет без воркера, остальные чаты идут дальше
+                    delivery.reserved = True
+                    self._park(chat_id, delay)
+                    continue
+            delivery.reserved = False
+            pending.popleft()
+            self._waiting -= 1
+
+            self._in_flight += 1
+            try:
+                delivered = await self._attempt(delivery)
+            finally:
+                self._in_flight -= 1
+
+            if delivered is not None:
+                self._release(chat_id)
+                if delivery.on_done is not None:
+                    # Запись в хранилище — отдельной задачей: воркер сразу берет следующий чат
+                    task = asyncio.create_task(self._complete(delivery.on_done, delivered))
+                    self._callbacks.add(task)
+                    task.add_done_callback(self._callbacks.discard)
+
+            if self.queue_depth == 0 and self._burst_started is not None:
+                self._finish_burst()
+
+    @staticmethod
+    async def _complete(on_done: DoneCallback, delivered: bool):
+        try:
+            await on_done(delivered)
+        except Exception as e:
+            print(f"❌ Ошибка обработки отправленного сообщения: {e}")
+
+    async def _attempt(self, delivery: _Delivery) -> Optional[bool]:
+        """Одна попытка отправки: True/False — итог, None — сообщение отложено для повтора"""
+        await self._global.acquire()
+        started = time.perf_counter()
+        try:
+            await self._send(delivery.chat_id, delivery.text)
+            self.sent += 1
+            metrics.SENDS.inc(outcome='sent')
+            return True
+        except RetryAfter as e:
+            # 429: Telegram сам говорит, сколько ждать; это не считается попыткой
+            seconds = _retry_after_seconds(e)
+            self.rate_limited += 1
+            metrics.SENDS.inc(outcome='rate_limited')
+            print(f"⏳ Лимит Telegram, пауза {seconds:.0f} с (чат {delivery.chat_id})")
+            self._chat_bucket(delivery.chat_id).pause(seconds)
+            self._global.pause(seconds)
+            self._defer(delivery, 0)
+            return None
+        except BadRequest as e:
+            # Наследник NetworkError, но повтор не поможет
+            self.failed += 1
+            metrics.SENDS.inc(outcome='failed')
+            print(f"❌ Telegram отклонил сообщение в чат {delivery.chat_id}: {e}")
+            return False
+        except NetworkError as e:
+            delivery.attempt += 1
+            if delivery.attempt > self.max_retries:
+                self.failed += 1
+                metrics.SENDS.inc(outcome='failed')
+                print(f"❌ Сообщение в чат {delivery.chat_id} не отправлено после {self.max_retries} повторов: {e}")
+                return False
+            self.retries += 1
+            metrics.SENDS.inc(outcome='retry')
+            delay = self.backoff * 2 ** (delivery.attempt - 1)
+            self._defer(delivery, delay * random.uniform(0.5, 1.5))
+            return None
+        except Exception as e:
+            # Forbidden и т.п. — повтор не поможет
+            self.failed += 1
+            metrics.SENDS.inc(outcome='failed')
+            print(f"❌ Ошибка отправки в чат {delivery.chat_id}: {e}")
+            return False
+        finally:
+            metrics.SEND_SECONDS.observe(time.perf_counter() - started)
+
+    def _finish_burst(self):
+        self.last_drain_seconds = time.monotonic() - self._burst_started
+        self.last_burst_size = self._burst_size
+        self._burst_started = None
+        metrics.DELIVERY_DRAIN.observe(self.last_drain_seconds)
+        if self.last_burst_size > 1:
+            print(
+                f"📬 Очередь отправки разобрана: {self.last_burst_size} сообщений "
+                f"за {self.last_drain_seconds:.1f} с"
+            )
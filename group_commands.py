@@ -0,0 +1,53 @@
+"""
+💬 ОБРАЩЕНИЯ К БОТУ В ГРУППЕ
+В группе бот реагирует только на сообщения, которые начинаются
+со слова "бот": "бот помощь", "Бот, найти встреча", "бот! список".
+Почти весь поток группы к боту не обращается, поэтому фильтр
+ADDRESSED_TO_BOT отбрасывает такие сообщения проверкой первых
+четырех символов — еще при выборе обработчика, без регулярных
+выражений и без копирования текста.
+"""
+
+from typing import Optional, Tuple
+
+from telegram.ext import filters
+
+BOT_WORD = 'бот'
+
+# Знаки между обращением и командой: "бот, ...", "бот! ...", "бот: ..."
+_ADDRESS_PUNCTUATION = ' \t\n,.!?:;-—'
+_KEYWORD_PUNCTUATION = '.,!?:;'
+
+
+def is_addressed(text: str) -> bool:
+    """Начинается ли сообщение со слова "бот" ("ботинки" — не обращение)"""
+    head = text[:4].lower()
+    return head[:3] == BOT_WORD and (len(head) == 3 or not head[3].isalnum())
+
+
+class AddressedToBot(filters.MessageFilter):
+    """Фильтр PTB: текстовые сообщения, обращенные к боту"""
+
+    __slots__ = ()
+
+    def filter(self, message) -> bool:
+        text = message.text
+        return bool(text) and is_addressed(text)
+
+
+ADDRESSED_TO_BOT = AddressedToBot(name='AddressedToBot')
+
+
+def parse_bot_command(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Обращение к боту -> (команда, аргументы):
+    "Бот, найти Встреча 25.12" -> ("найти", "Встреча 25.12").
+    Команда — первое слово в нижнем регистре, аргументы — как написаны.
+    """
+    if not is_addressed(text):
+        return None
+    parts = text[len(BOT_WORD):].lstrip(_ADDRESS_PUNCTUATION).split(maxsplit=1)
+    if not parts:
+        return None
+    keyword = parts[0].lower().strip(_KEYWORD_PUNCTUATION)
+    return keyword, parts[1].strip() if len(parts) > 1 else ''
@@ -0,0 +1,287 @@
+"""
+📈 МЕТРИКИ
+Счетчики, гистограммы и датчики в памяти процесса и их выдача
+в текстовом формате Prometheus (GET /metrics).
+Замеры стоят на горячих путях (каждое обновление, вызов Sheets,
+отправка), поэтому запись — это сложение в словаре и bisect по
+границам корзин, без блокировок: все пишут из одного цикла событий,
+а из потоков gspread замеры не пишутся.
+
+Что видно по метрикам:
+  • bot_handler_seconds          — время обработчиков команд;
+  • bot_sheets_call_seconds      — вызовы gspread (с ожиданием пула);
+  • bot_sheets_requests_last_minute — расход квоты Sheets API (запросов за минуту);
+  • bot_sheets_circuit_open      — таблица недоступна, запросы приостановлены;
+  • bot_telegram_send_seconds    — send_message;
+  • bot_scheduler_lag_seconds    — от срока напоминания до срабатывания;
+  • bot_reminder_delivery_lag_seconds — от срока до доставки;
+  • bot_delivery_drain_seconds   — за сколько разобрана пачка сообщений на отправку;
+  • bot_startup_seconds          — этапы запуска до первого обновления;
+  • очереди (отправка, обновления, запись в таблицу) — датчики.
+"""
+
+import bisect
+import functools
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Границы корзин по умолчанию, секунды: от миллисекунд до минуты
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Задержка срабатывания напоминаний: от мгновенной до часов простоя
+LAG_BUCKETS = (0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300, 900, 3600)
+
+LabelKey = Tuple[Tuple[str, object], ...]
+
+_REGISTRY: List['_Metric'] = []
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    # Значения приводятся к строке только при выдаче
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key: LabelKey, extra: LabelKey = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value: object) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        _REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Монотонный счетчик с метками"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(key)} {_format_value(value)}' for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Текущее значение: задается вручную или считается функцией при каждом чтении"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, func: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text)
+        self._func = func
+        self._value = 0.0
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, func: Optional[Callable[[], float]]):
+        self._func = func
+
+    def value(self) -> float:
+        if self._func is not None:
+            try:
+                return self._func()
+            except Exception:
+                # Источник уже закрыт (остановка бота) — датчик молчит
+                return 0.0
+        return self._value
+
+    def samples(self) -> List[str]:
+        return [f'{self.name} {_format_value(self.value())}']
+
+
+class _Series:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам (накопительно при выдаче, как в Prometheus)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _Series] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(len(self.buckets) + 1)
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.total += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series.count if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series.counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(key, (("le", _format_value(bound)),))} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(series.total)}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {series.count}')
+        return lines
+
+
+class StartupTimer(_Metric):
+    """Этапы запуска: секунды от started до первого достижения этапа"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def mark(self, stage: str, quiet: bool = False) -> float:
+        """
+        Отмечает этап (повторная отметка ничего не меняет).
+        quiet — без вывода в лог, например при импорте модуля
+        """
+        if stage not in self.stages:
+            self.stages[stage] = time.perf_counter() - self.started
+            if not quiet:
+                self.report(stage)
+        return self.stages[stage]
+
+    def report(self, stage: str):
+        """Выводит в лог время этапа"""
+        print(f"⏱️ Запуск: {stage} через {self.stages[stage]:.2f} с")
+
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels((("stage", stage),))} {_format_value(seconds)}'
+            for stage, seconds in self.stages.items()
+        ]
+
+
+class RateWindow:
+    """Число событий за последние period секунд (скользящее окно)"""
+
+    def __init__(self, period: float = 60):
+        self.period = period
+        self._events = deque()
+
+    def add(self, now: Optional[float] = None):
+        self._events.append(time.monotonic() if now is None else now)
+
+    def count(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        while self._events and self._events[0] <= now - self.period:
+            self._events.popleft()
+        return len(self._events)
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    return '\n'.join(metric.render() for metric in _REGISTRY) + '\n'
+
+
+# ========== МЕТРИКИ БОТА ==========
+HANDLER_SECONDS = Histogram('bot_handler_seconds', 'Время обработчиков обновлений')
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Исключения в обработчиках')
+UPDATE_ERRORS = Counter('bot_update_errors_total', 'Ошибки, дошедшие до error_handler, по типу')
+
+SHEETS_SECONDS = Histogram('bot_sheets_call_seconds', 'Вызовы gspread, включая ожидание пула потоков')
+SHEETS_CALLS = Counter('bot_sheets_calls_total', 'Вызовы gspread по итогу (ok, error, timeout, unavailable)')
+SHEETS_RETRIES = Counter('bot_sheets_retries_total', 'Повторы вызовов gspread после временных ошибок')
+SHEETS_CIRCUIT_OPEN = Gauge('bot_sheets_circuit_open', 'Предохранитель Google Sheets разомкнут (1) или замкнут (0)')
+SHEETS_REQUESTS = RateWindow(60)
+SHEETS_QUOTA = Gauge(
+    'bot_sheets_requests_last_minute',
+    'Запросов к Sheets API за последнюю минуту (квота — 60 на пользователя)',
+    SHEETS_REQUESTS.count
+)
+
+SEND_SECONDS = Histogram('bot_telegram_send_seconds', 'Вызовы send_message')
+SENDS = Counter('bot_telegram_sends_total', 'Попытки отправки по итогу (sent, retry, rate_limited, failed)')
+SCHEDULER_LAG = Histogram('bot_scheduler_lag_seconds', 'От срока напоминания до срабатывания планировщика', LAG_BUCKETS)
+DELIVERY_LAG = Histogram('bot_reminder_delivery_lag_seconds', 'От срока напоминания до доставки', LAG_BUCKETS)
+DELIVERY_DRAIN = Histogram(
+    'bot_delivery_drain_seconds', 'От первого сообщения пачки до опустения очереди отправки', LAG_BUCKETS
+)
+
+STARTUP = StartupTimer(
+    'bot_startup_seconds',
+    'От начала импортов до этапа запуска (imports, ready, sheets_connected, first_update)'
+)
+
+SCHEDULED = Gauge('bot_scheduled_reminders', 'Напоминаний в планировщике')
+DELIVERY_QUEUE = Gauge('bot_delivery_queue_depth', 'Сообщений в очереди отправки')
+UPDATES_WAITING = Gauge('bot_updates_waiting', 'Обновлений, ждущих своей очереди чата или лимита')
+UPDATES_IN_FLIGHT = Gauge('bot_updates_in_flight', 'Обновлений в обработке')
+SHEETS_WRITES_PENDING = Gauge('bot_sheets_writes_pending', 'Записей в очереди к Google Таблице')
+
+
+def instrument(handler):
+    """Декоратор обработчика PTB: время в bot_handler_seconds, исключения — в счетчик"""
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+
+    return wrapper
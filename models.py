@@ -0,0 +1,87 @@
+"""
+📌 МОДЕЛЬ НАПОМИНАНИЯ
+Строка таблицы (8 строковых колонок A-H) разбирается один раз — при
+загрузке из хранилища — в компактную запись: срок хранится целым
+epoch, повторение — номером в REPEAT_OPTIONS, статус — флагом.
+Планировщик, индекс /list и отправка работают с записью и больше
+не разбирают даты. __slots__ убирает у каждого экземпляра __dict__:
+на сотнях тысяч напоминаний это заметная часть памяти.
+Строки (списки) остаются форматом записи в хранилище и таблицу.
+"""
+
+import sys
+from typing import List, Optional
+
+from recurrence import REPEAT_OPTIONS, RULES, RecurrenceRule
+
+# Статусы отправки (колонка H)
+STATUS_NOT_SENT = "❌ Не отправлено"
+STATUS_SENT = "✅ Отправлено"
+
+# Текст повторения (колонка D) -> номер в REPEAT_OPTIONS
+_REPEAT_INDEX = {text: index for index, text in enumerate(REPEAT_OPTIONS)}
+
+
+def repeat_index(repeat_text: str) -> int:
+    """Номер варианта повторения; неизвестный текст — "не повторять" (0)"""
+    return _REPEAT_INDEX.get(repeat_text.strip() if repeat_text else '', 0)
+
+
+class Reminder:
+    """Напоминание в памяти: то, что нужно для планировщика, списка и отправки"""
+
+    __slots__ = ('id', 'text', 'due_at', 'repeat', 'author', 'created', 'sent', 'chat_id')
+
+    def __init__(
+        self,
+        reminder_id: int,
+        text: str,
+        due_at: Optional[int],
+        repeat: int = 0,
+        author: str = '',
+        created: str = '',
+        sent: bool = False,
+        chat_id: Optional[int] = None,
+    ):
+        self.id = reminder_id
+        self.text = text
+        self.due_at = due_at            # срок (колонка G), секунды epoch
+        self.repeat = repeat            # номер в REPEAT_OPTIONS
+        self.author = author
+        self.created = created
+        self.sent = sent
+        self.chat_id = chat_id          # раздел: чат, в котором создано напоминание
+
+    @classmethod
+    def from_row(
+        cls, reminder_id: int, row: List[str], due_at: Optional[float], chat_id: Optional[int] = None
+    ) -> 'Reminder':
+        """Разбирает строку A-H; due_at — уже вычисленный срок (или None)"""
+        row = list(row[:8]) + [''] * (8 - len(row))
+        return cls(
+            reminder_id,
+            str(row[0]),
+            None if due_at is None else int(due_at),
+            repeat_index(str(row[3])),
+            # Авторов немного, а напоминаний много — храним одну копию строки
+            sys.intern(str(row[4])),
+            str(row[5]),
+            str(row[7]) == STATUS_SENT,
+            chat_id,
+        )
+
+    @property
+    def repeat_text(self) -> str:
+        return REPEAT_OPTIONS[self.repeat]
+
+    @property
+    def rule(self) -> RecurrenceRule:
+        return RULES[self.repeat]
+
+    def moved(self, due_at: float) -> 'Reminder':
+        """Копия с новым сроком (после переноса на следующий повтор)"""
+        return Reminder(self.id, self.text, int(due_at), self.repeat, self.author, self.created, self.sent,
+                        self.chat_id)
+
+    def __repr__(self):
+        return f"Reminder(#{self.id}, {self.text!r}, due_at={self.due_at})"
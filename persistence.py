@@ -0,0 +1,219 @@
+"""
+💾 СОСТОЯНИЕ ДИАЛОГОВ
+Состояния ConversationHandler (WAITING_TEXT .. WAITING_REPEAT) и
+context.user_data (текст, дата, quick_add) хранятся в локальном SQLite,
+чтобы перезапуск бота не обрывал начатые /add.
+
+PTB сам собирает изменения и раз в update_interval секунд передает
+их сюда (update_user_data, update_conversation). Каждая передача лишь
+меняет словари в памяти и помечает ключ измененным, а запись в базу
+откладывается на flush_delay секунд: все изменения интервала уходят
+одной транзакцией — одна запись на интервал, а не на обновление.
+При остановке PTB вызывает flush(), и остаток записывается сразу.
+
+Диалоги, брошенные дольше max_age секунд назад, при запуске не
+восстанавливаются: через неделю ответ "завтра" — уже не дата для /add.
+"""
+
+import asyncio
+import json
+import pickle
+import sqlite3
+import time
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id    INTEGER PRIMARY KEY,
+    data       BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    name       TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    state      BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (name, key)
+);
+"""
+
+ConversationKey = Tuple[Hashable, ...]
+
+
+class SQLitePersistence(BasePersistence):
+    """Хранит user_data и состояния диалогов; данные чатов и бота не сохраняются"""
+
+    def __init__(
+        self,
+        path: str,
+        update_interval: float = 5,
+        flush_delay: float = 0.5,
+        max_age: Optional[float] = 24 * 3600,
+    ):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.path = path
+        self.flush_delay = flush_delay
+        self.max_age = max_age
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        if max_age:
+            # Брошенные диалоги больше не понадобятся
+            cutoff = self._cutoff()
+            self._db.execute("DELETE FROM user_data WHERE updated_at < ?", (cutoff,))
+            self._db.execute("DELETE FROM conversations WHERE updated_at < ?", (cutoff,))
+        self._db.commit()
+
+        self._user_data: Dict[int, dict] = {}
+        self._conversations: Dict[str, Dict[ConversationKey, object]] = {}
+        self._changed_users: Set[int] = set()
+        self._dropped_users: Set[int] = set()
+        self._changed_conversations: Set[Tuple[str, ConversationKey]] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.transactions = 0   # записей в базу (для бенчмарка)
+
+    def _cutoff(self) -> float:
+        return time.time() - self.max_age if self.max_age else 0.0
+
+    # ---------- чтение при запуске ----------
+    async def get_user_data(self) -> Dict[int, dict]:
+        rows = self._db.execute("SELECT user_id, data FROM user_data")
+        self._user_data = {user_id: pickle.loads(data) for user_id, data in rows}
+        return {user_id: dict(data) for user_id, data in self._user_data.items()}
+
+    async def get_conversations(self, name: str) -> Dict[ConversationKey, object]:
+        rows = self._db.execute("SELECT key, state FROM conversations WHERE name = ?", (name,))
+        conversations = {tuple(json.loads(key)): pickle.loads(state) for key, state in rows}
+        self._conversations[name] = conversations
+        if conversations:
+            print(f"💾 Восстановлено незавершенных диалогов \"{name}\": {len(conversations)}")
+        return dict(conversations)
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    # ---------- изменения (копятся в памяти) ----------
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        if self._user_data.get(user_id) == data:
+            return
+        self._user_data[user_id] = data
+        self._dropped_users.discard(user_id)
+        self._changed_users.add(user_id)
+        self._schedule_flush()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._user_data.pop(user_id, None)
+        self._changed_users.discard(user_id)
+        self._dropped_users.add(user_id)
+        self._schedule_flush()
+
+    async def update_conversation(self, name: str, key: ConversationKey, new_state: Optional[object]) -> None:
+        conversations = self._conversations.setdefault(name, {})
+        if conversations.get(key) == new_state:
+            return
+        if new_state is None:
+            # Диалог закончился — строку удалит запись
+            conversations.pop(key, None)
+        else:
+            conversations[key] = new_state
+        self._changed_conversations.add((name, key))
+        self._schedule_flush()
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    # ---------- запись ----------
+    def _schedule_flush(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_delay())
+
+    async def _flush_after_delay(self):
+        try:
+            await asyncio.sleep(self.flush_delay)
+        except asyncio.CancelledError:
+            return
+        self._flush_task = None
+        self._write()
+
+    async def flush(self) -> None:
+        """Записывает все накопленное (PTB вызывает при остановке)"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+        self._write()
+
+    def _write(self):
+        if not (self._changed_users or self._dropped_users or self._changed_conversations):
+            return
+        now = time.time()
+        users, self._changed_users = self._changed_users, set()
+        dropped, self._dropped_users = self._dropped_users, set()
+        conversations, self._changed_conversations = self._changed_conversations, set()
+
+        saved, removed = [], [(user_id,) for user_id in dropped]
+        for user_id in users:
+            data = self._user_data.get(user_id)
+            if not data:
+                removed.append((user_id,))
+                continue
+            try:
+                saved.append((user_id, pickle.dumps(data), now))
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                print(f"⚠️ Данные пользователя {user_id} не сохранены: {e}")
+
+        states, ended = [], []
+        for name, key in conversations:
+            encoded = json.dumps(list(key))
+            state = self._conversations.get(name, {}).get(key)
+            if state is None:
+                ended.append((name, encoded))
+            else:
+                states.append((name, encoded, pickle.dumps(state), now))
+
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO user_data (user_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                saved
+            )
+            self._db.executemany("DELETE FROM user_data WHERE user_id = ?", removed)
+            self._db.executemany(
+                "INSERT INTO conversations (name, key, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (name, key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                states
+            )
+            self._db.executemany("DELETE FROM conversations WHERE name = ? AND key = ?", ended)
+        self.transactions += 1
+
+    def close(self):
+        self._db.close()
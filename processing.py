@@ -0,0 +1,87 @@
+"""
+🔀 ПАРАЛЛЕЛЬНАЯ ОБРАБОТКА ОБНОВЛЕНИЙ
+По умолчанию PTB обрабатывает обновления по одному: медленный вызов
+Google Sheets в одном чате задерживает всех. ChatOrderedProcessor
+запускает разные чаты параллельно, но обновления одного чата — строго
+по очереди, в порядке поступления: ConversationHandler (WAITING_TEXT ..
+WAITING_REPEAT) хранит состояние по паре чат+пользователь и рассчитывает
+на последовательную обработку внутри нее.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Лимит PTB (семафор process_update) берется до очереди чата: обновления,
+# ждущие свой чат, занимали бы места и тормозили остальные чаты.
+# Поэтому ему передается запас, а настоящий лимит действует после очереди.
+_PENDING_LIMIT = 1_000_000
+
+
+def update_key(update: object) -> Hashable:
+    """Очередь обновления: чат, без чата — пользователь, иначе общая"""
+    if isinstance(update, Update):
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return ('user', update.effective_user.id)
+    return None
+
+
+class ChatOrderedProcessor(BaseUpdateProcessor):
+    """Обновления одного чата — по очереди, разных чатов — до max_concurrent одновременно"""
+
+    def __init__(self, max_concurrent: int, on_first_update: Optional[Callable[[], None]] = None):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent должен быть положительным")
+        super().__init__(_PENDING_LIMIT)
+        self.limit = max_concurrent
+        self._slots = asyncio.Semaphore(max_concurrent)
+        # Замок и число обновлений в очереди на чат; удаляются, когда очередь пуста
+        self._chats: Dict[Hashable, asyncio.Lock] = {}
+        self._queued: Dict[Hashable, int] = {}
+        self.in_flight = 0
+        self.processed = 0
+        # Вызывается один раз — с первым обновлением (замер времени запуска)
+        self._on_first_update = on_first_update
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        if self._on_first_update is not None:
+            callback, self._on_first_update = self._on_first_update, None
+            callback()
+        key = update_key(update)
+        lock = self._chats.get(key)
+        if lock is None:
+            lock = self._chats[key] = asyncio.Lock()
+        self._queued[key] = self._queued.get(key, 0) + 1
+        try:
+            # asyncio.Lock отдает очередь в порядке ожидания — порядок поступления сохраняется
+            async with lock:
+                async with self._slots:
+                    self.in_flight += 1
+                    try:
+                        await coroutine
+                    finally:
+                        self.in_flight -= 1
+                        self.processed += 1
+        finally:
+            self._queued[key] -= 1
+            if not self._queued[key]:
+                del self._queued[key]
+                del self._chats[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            'updates_in_flight': self.in_flight,
+            'updates_waiting': sum(self._queued.values()) - self.in_flight,
+            'chats_busy': len(self._chats),
+            'updates_processed': self.processed,
+        }
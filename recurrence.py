@@ -0,0 +1,199 @@
+"""
+🔁 ПРАВИЛА ПОВТОРЕНИЯ
+Каждому варианту из REPEAT_OPTIONS соответствует правило, которое за O(1)
+вычисляет следующее срабатывание от заданного момента.
+Время считается "по часам" часового пояса напоминания: ежедневное
+напоминание на 09:00 остается на 09:00 и после перехода на летнее время.
+
+Опорное время (anchor) — ближайшее запланированное срабатывание,
+оно же хранится в колонке G. Предварительные напоминания
+("За день до" и т.п.) — отдельные срабатывания до опорного.
+"""
+
+import calendar
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple, Optional
+
+import pytz
+
+# Варианты повторения (индекс в списке — номер правила)
+REPEAT_OPTIONS = [
+    "❌ Не повторять",
+    "🔄 Каждый день",
+    "📅 Каждую неделю",
+    "🎄 Каждый год",
+    "⏰ За день до",
+    "📝 За 3 дня до",
+    "🗓️ За неделю до",
+    "📆 Понедельник",
+    "📆 Вторник",
+    "📆 Среда",
+    "📆 Четверг",
+    "📆 Пятница",
+    "📆 Суббота",
+    "📆 Воскресенье"
+]
+
+
+class Occurrence(NamedTuple):
+    """Одно срабатывание: когда и предварительное ли оно"""
+    when: datetime
+    is_pre_alert: bool = False
+
+
+def _local_at(tz, day: date, clock: time) -> datetime:
+    """Дата + время по часам пояса tz (несуществующее время сдвигается вперед)"""
+    naive = datetime.combine(day, clock)
+    if hasattr(tz, 'localize'):
+        return tz.normalize(tz.localize(naive))
+    return datetime.combine(day, clock, tzinfo=tz)
+
+
+def _zone(moment: datetime):
+    """Часовой пояс опорного времени (для pytz — сама зона, а не смещение)"""
+    zone_name = getattr(moment.tzinfo, 'zone', None)
+    if zone_name:
+        return pytz.timezone(zone_name)
+    return moment.tzinfo
+
+
+class RecurrenceRule:
+    """Базовое правило: одноразовое напоминание"""
+
+    # За сколько дней до события отправить предварительное напоминание
+    pre_alert_days = 0
+    repeats = False
+
+    def align(self, anchor: datetime) -> datetime:
+        """Первое срабатывание для введенной пользователем даты"""
+        return anchor
+
+    def next_after(self, anchor: datetime, after: datetime) -> Optional[datetime]:
+        """Ближайшее основное срабатывание строго после after"""
+        return anchor if anchor > after else None
+
+    def pre_alert_time(self, anchor: datetime) -> Optional[datetime]:
+        if not self.pre_alert_days:
+            return None
+        local = anchor.astimezone(_zone(anchor))
+        return _local_at(_zone(anchor), local.date() - timedelta(days=self.pre_alert_days), local.time())
+
+    def first_fire(self, anchor: datetime, now: datetime) -> Occurrence:
+        """
+        Что поставить в планировщик для опорного времени anchor.
+        Прошедшее опорное время возвращается как есть — оно пропущено и
+        должно сработать сразу.
+        """
+        pre_alert = self.pre_alert_time(anchor)
+        if pre_alert is not None and pre_alert > now:
+            return Occurrence(pre_alert, True)
+        return Occurrence(anchor)
+
+    def fire_after(self, anchor: datetime, fired: Occurrence, now: datetime) -> Optional[Occurrence]:
+        """
+        Следующее срабатывание после fired. Для повторяющихся правил
+        пропущенные (пока бот не работал) повторы не догоняются.
+        """
+        if fired.is_pre_alert:
+            return Occurrence(anchor)
+        if not self.repeats:
+            return None
+        following = self.next_after(anchor, max(fired.when, now))
+        return Occurrence(following) if following else None
+
+
+class PreAlertRule(RecurrenceRule):
+    """Одноразовое событие с предварительным напоминанием за N дней"""
+
+    def __init__(self, days: int):
+        self.pre_alert_days = days
+
+
+class DailyRule(RecurrenceRule):
+    repeats = True
+
+    def next_after(self, anchor: datetime, after: datetime) -> Optional[datetime]:
+        if anchor > after:
+            return anchor
+        tz = _zone(anchor)
+        clock = anchor.astimezone(tz).time()
+        day = after.astimezone(tz).date()
+        candidate = _local_at(tz, day, clock)
+        if candidate <= after:
+            candidate = _local_at(tz, day + timedelta(days=1), clock)
+        return candidate
+
+
+class WeekdayRule(RecurrenceRule):
+    """Каждую неделю в указанный день (weekday=None — в день опорной даты)"""
+
+    repeats = True
+
+    def __init__(self, weekday: Optional[int] = None):
+        self.weekday = weekday
+
+    def _target(self, anchor: datetime) -> int:
+        if self.weekday is not None:
+            return self.weekday
+        return anchor.astimezone(_zone(anchor)).weekday()
+
+    def align(self, anchor: datetime) -> datetime:
+        tz = _zone(anchor)
+        local = anchor.astimezone(tz)
+        days = (self._target(anchor) - local.weekday()) % 7
+        return _local_at(tz, local.date() + timedelta(days=days), local.time())
+
+    def next_after(self, anchor: datetime, after: datetime) -> Optional[datetime]:
+        if anchor > after:
+            return anchor
+        tz = _zone(anchor)
+        clock = anchor.astimezone(tz).time()
+        day = after.astimezone(tz).date()
+        day += timedelta(days=(self._target(anchor) - day.weekday()) % 7)
+        candidate = _local_at(tz, day, clock)
+        if candidate <= after:
+            candidate = _local_at(tz, day + timedelta(days=7), clock)
+        return candidate
+
+
+class YearlyRule(RecurrenceRule):
+    """Каждый год; 29 февраля в невисокосные годы срабатывает 28-го"""
+
+    repeats = True
+
+    @staticmethod
+    def _in_year(anchor_local: datetime, year: int, tz) -> datetime:
+        day = anchor_local.day
+        if anchor_local.month == 2 and day == 29 and not calendar.isleap(year):
+            day = 28
+        return _local_at(tz, date(year, anchor_local.month, day), anchor_local.time())
+
+    def next_after(self, anchor: datetime, after: datetime) -> Optional[datetime]:
+        if anchor > after:
+            return anchor
+        tz = _zone(anchor)
+        anchor_local = anchor.astimezone(tz)
+        year = after.astimezone(tz).year
+        candidate = self._in_year(anchor_local, year, tz)
+        if candidate <= after:
+            candidate = self._in_year(anchor_local, year + 1, tz)
+        return candidate
+
+
+# Правила в порядке REPEAT_OPTIONS
+RULES = [
+    RecurrenceRule(),      # ❌ Не повторять
+    DailyRule(),           # 🔄 Каждый день
+    WeekdayRule(),         # 📅 Каждую неделю
+    YearlyRule(),          # 🎄 Каждый год
+    PreAlertRule(1),       # ⏰ За день до
+    PreAlertRule(3),       # 📝 За 3 дня до
+    PreAlertRule(7),       # 🗓️ За неделю до
+] + [WeekdayRule(weekday) for weekday in range(7)]  # 📆 Понедельник ... Воскресенье
+
+_RULES_BY_TEXT = dict(zip(REPEAT_OPTIONS, RULES))
+
+
+def rule_for(repeat_text: str) -> RecurrenceRule:
+    """Правило по тексту из колонки D; неизвестный текст — одноразовое напоминание"""
+    return _RULES_BY_TEXT.get(repeat_text.strip() if repeat_text else '', RULES[0])
@@ -0,0 +1,248 @@
+"""
+⏰ ПЛАНИРОВЩИК НАПОМИНАНИЙ
+Два режима (SCHEDULER_MODE):
+  • heap  — мин-куча по времени срабатывания: вставка и срабатывание
+            за O(log n), спит ровно до ближайшего напоминания;
+  • wheel — иерархическое колесо таймеров с минутными слотами:
+            вставка за O(1), срабатывание минуты с k напоминаниями за O(k).
+            Рассчитано на десятки тысяч напоминаний на "круглое" время.
+Между срабатываниями таблица не читается и процессор не тратится.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import metrics
+
+# Колбэк отправки: (ключ напоминания, данные напоминания)
+SendCallback = Callable[[Hashable, Any], Awaitable[None]]
+
+# Индексы полей элемента планировщика
+_DUE, _SEQ, _KEY, _PAYLOAD, _ACTIVE = range(5)
+
+
+class BaseScheduler:
+    """Общая часть планировщиков: отмена, фоновая задача, отправка"""
+
+    def __init__(self, send_callback: SendCallback):
+        self._send_callback = send_callback
+        # Элемент: [время_срабатывания, порядковый_номер, ключ, данные, активен]
+        self._entries: Dict[Hashable, list] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: Hashable, due: datetime, payload: Any = None):
+        """Добавляет (или переносит) напоминание"""
+        self.cancel(key)
+        entry = [due.timestamp(), next(self._counter), key, payload, True]
+        self._entries[key] = entry
+        if self._insert(entry) and self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменяет напоминание — O(1), элемент удаляется из структуры лениво"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[_ACTIVE] = False
+        return True
+
+    def _insert(self, entry: list) -> bool:
+        """Кладет элемент в структуру; True — если нужно разбудить цикл"""
+        raise NotImplementedError
+
+    def pop_due(self, now: float) -> List[list]:
+        """Забирает все элементы со сроком не позже now"""
+        raise NotImplementedError
+
+    def seconds_until_next(self, now: float) -> Optional[float]:
+        """Сколько спать до следующей проверки; None — пока ничего нет"""
+        raise NotImplementedError
+
+    def start(self):
+        """Запускает фоновую задачу планировщика в текущем цикле событий"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую задачу"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+
+            for entry in self.pop_due(time.time()):
+                await self._fire(entry)
+
+            delay = self.seconds_until_next(time.time())
+            if delay is None:
+                await self._wakeup.wait()
+            elif delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _fire(self, entry: list):
+        key = entry[_KEY]
+        # Пока отправлялись предыдущие, напоминание могли отменить или перенести
+        if self._entries.get(key) is not entry:
+            return
+        del self._entries[key]
+        metrics.SCHEDULER_LAG.observe(max(0.0, time.time() - entry[_DUE]))
+
+        try:
+            await self._send_callback(key, entry[_PAYLOAD])
+        except Exception as e:
+            print(f"❌ Ошибка отправки напоминания {key}: {e}")
+
+
+class ReminderScheduler(BaseScheduler):
+    """Планировщик на мин-куче, спит ровно до ближайшего напоминания"""
+
+    def __init__(self, send_callback: SendCallback):
+        super().__init__(send_callback)
+        self._heap: List[list] = []
+
+    def _insert(self, entry: list) -> bool:
+        heapq.heappush(self._heap, entry)
+        # Будим цикл, только если новое напоминание стало ближайшим
+        return self._heap[0] is entry
+
+    def next_due(self) -> Optional[float]:
+        """Время ближайшего активного напоминания (epoch) или None"""
+        while self._heap and not self._heap[0][_ACTIVE]:
+            heapq.heappop(self._heap)
+        return self._heap[0][_DUE] if self._heap else None
+
+    def pop_due(self, now: float) -> List[list]:
+        due = []
+        while self.next_due() is not None and self._heap[0][_DUE] <= now:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    def seconds_until_next(self, now: float) -> Optional[float]:
+        due = self.next_due()
+        return None if due is None else due - now
+
+
+class TimerWheelScheduler(BaseScheduler):
+    """
+    Иерархическое колесо таймеров с шагом в минуту:
+      • 60 минутных слотов текущего часа;
+      • 24 часовых слота текущих суток;
+      • словарь "номер суток -> элементы" для всего, что дальше.
+    В начале часа часовой слот раскладывается по минутам,
+    в начале суток — суточная корзина по часам (каждый элемент
+    переносится не больше двух раз). Цикл просыпается раз в минуту,
+    только пока в колесе что-то есть.
+    """
+
+    def __init__(self, send_callback: SendCallback):
+        super().__init__(send_callback)
+        self._minutes: List[List[list]] = [[] for _ in range(60)]
+        self._hours: List[List[list]] = [[] for _ in range(24)]
+        self._days: Dict[int, List[list]] = {}
+        self._ready: List[list] = []
+        self._current = int(time.time() // 60)   # последняя обработанная минута (epoch-минуты)
+
+    def _insert(self, entry: list) -> bool:
+        # Цикл мог уснуть "навсегда", пока колесо было пустым
+        idle = len(self._entries) == 1 and not self._ready
+        if idle:
+            # ...и _current отстал на время простоя: без перемотки pop_due
+            # прошел бы весь простой по одному минутному слоту
+            self._rewind(int(time.time() // 60))
+        if self._place(entry):
+            return True
+        return idle
+
+    def _place(self, entry: list) -> bool:
+        """Кладет элемент в слот относительно _current; True — если он уже готов"""
+        minute = int(entry[_DUE] // 60)
+        if minute <= self._current:
+            self._ready.append(entry)
+            return True
+        if minute // 60 == self._current // 60:
+            self._minutes[minute % 60].append(entry)
+        elif minute // 1440 == self._current // 1440:
+            self._hours[(minute // 60) % 24].append(entry)
+        else:
+            self._days.setdefault(minute // 1440, []).append(entry)
+        return False
+
+    def _rewind(self, minute: int):
+        """Пустое колесо: переходит сразу к минуте minute, выбрасывая отмененные элементы"""
+        if minute > self._current:
+            self._minutes = [[] for _ in range(60)]
+            self._hours = [[] for _ in range(24)]
+            self._days.clear()
+            self._current = minute
+
+    def _cascade(self, entries: List[list]):
+        for entry in entries:
+            if entry[_ACTIVE]:
+                self._place(entry)
+
+    def _advance(self):
+        """Переходит к следующей минуте и переносит ее слот в готовые"""
+        self._current += 1
+        minute = self._current
+        if minute % 1440 == 0:
+            self._cascade(self._days.pop(minute // 1440, []))
+        if minute % 60 == 0:
+            slot = (minute // 60) % 24
+            entries, self._hours[slot] = self._hours[slot], []
+            self._cascade(entries)
+        slot = minute % 60
+        self._ready.extend(entry for entry in self._minutes[slot] if entry[_ACTIVE])
+        self._minutes[slot] = []
+
+    def pop_due(self, now: float) -> List[list]:
+        target = int(now // 60)
+        while self._current < target:
+            if not self._entries and not self._ready:
+                # Пустое колесо: перематываем без обхода слотов
+                self._rewind(target)
+                break
+            self._advance()
+        # Слот — целая минута; то, что внутри нее еще не наступило, ждет
+        due, waiting = [], []
+        for entry in self._ready:
+            if entry[_ACTIVE]:
+                (due if entry[_DUE] <= now else waiting).append(entry)
+        self._ready = waiting
+        return due
+
+    def seconds_until_next(self, now: float) -> Optional[float]:
+        if self._ready:
+            return max(0, min(entry[_DUE] for entry in self._ready) - now)
+        if not self._entries:
+            return None
+        return (self._current + 1) * 60 - now
+
+
+def create_scheduler(mode: str, send_callback: SendCallback) -> BaseScheduler:
+    """Создает планировщик для режима SCHEDULER_MODE (heap или wheel)"""
+    if mode == "wheel":
+        return TimerWheelScheduler(send_callback)
+    return ReminderScheduler(send_callback)
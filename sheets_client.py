@@ -0,0 +1,174 @@
+"""
+🛡️ УСТОЙЧИВЫЙ ДОСТУП К GOOGLE SHEETS
+Что делать, когда Sheets API отвечает ошибкой:
+  • 429 (квота) и 5xx, обрыв соединения — повтор с экспоненциальной
+    задержкой со случайным разбросом; заголовок Retry-After, если он
+    есть, задает нижнюю границу задержки;
+  • 401 и ошибка обновления токена — переподключение: новая сессия
+    и свежий токен сервисного аккаунта, затем повтор;
+  • остальные ошибки (400, 403, 404) — сразу вызывающему.
+Несколько сбоев подряд размыкают предохранитель (CircuitBreaker):
+запросы не уходят в таблицу, пока не истечет пауза, а затем один
+пробный запрос решает, работает ли таблица снова. Пока предохранитель
+разомкнут, чтение обслуживается из кэша, а запись ждет в очереди
+(storage.py).
+
+Изменяющие запросы (append_rows, удаление строк) повторяются только
+при ответах, после которых запрос точно не выполнен (429, 5xx):
+после таймаута или обрыва соединения строка могла уже добавиться.
+"""
+
+import asyncio
+import random
+import time
+from typing import Optional
+
+import requests
+from google.auth.exceptions import RefreshError, TransportError
+from google.auth.transport.requests import AuthorizedSession, Request
+from gspread.exceptions import APIError
+from requests.adapters import HTTPAdapter
+
+# Ответы, после которых запрос можно повторить: квота и временные сбои Google
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class SheetsUnavailable(Exception):
+    """Предохранитель разомкнут: таблица недоступна, запрос не отправлялся"""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Google Sheets недоступна, повтор через {retry_in:.0f} с")
+        self.retry_in = retry_in
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP-статус ответа Sheets API (None — ответа не было)"""
+    if isinstance(error, APIError):
+        return getattr(error.response, 'status_code', None)
+    return None
+
+
+def is_auth_error(error: BaseException) -> bool:
+    """Токен отозван или истек и не обновился — поможет переподключение"""
+    return status_of(error) == 401 or isinstance(error, RefreshError)
+
+
+def is_transient(error: BaseException, idempotent: bool = True) -> bool:
+    """
+    Временная ошибка, которую стоит повторить. Для изменяющих запросов —
+    только если запрос точно не выполнен.
+    """
+    if isinstance(error, SheetsUnavailable) or status_of(error) in RETRYABLE_STATUSES:
+        return True
+    if not idempotent:
+        return False
+    return isinstance(error, (
+        asyncio.TimeoutError,
+        requests.ConnectionError,
+        requests.Timeout,
+        TransportError,
+    ))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Задержка из заголовка Retry-After (секунды), если Google ее прислал"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers['Retry-After']))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Экспоненциальная задержка с полным разбросом: 0..min(cap, base * 2^attempt)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# ========== ПРЕДОХРАНИТЕЛЬ ==========
+class CircuitBreaker:
+    """
+    Замкнут — запросы идут. После failure_threshold временных ошибок
+    подряд размыкается на reset_timeout секунд: запросы сразу получают
+    SheetsUnavailable. Затем пропускает один пробный запрос: успех
+    замыкает предохранитель, ошибка снова размыкает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def retry_in(self) -> float:
+        """Через сколько секунд предохранитель пропустит пробный запрос"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас (в полуоткрытом состоянии — один пробный)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self._opened_at is not None:
+            print("✅ Google Sheets снова отвечает")
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or (self._opened_at is None and self.failures >= self.failure_threshold):
+            if self._opened_at is None:
+                self.opened += 1
+                print(f"🔌 Google Sheets недоступна ({self.failures} ошибок подряд), "
+                      f"запросы приостановлены на {self.reset_timeout:.0f} с")
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+
+# ========== HTTP-СЕССИЯ ==========
+def use_pooled_session(http_client, pool_size: int):
+    """
+    Ставит клиенту gspread новую сессию с пулом на pool_size соединений
+    к каждому хосту Google — по одному на поток SheetsExecutor, чтобы
+    соединения переиспользовались, а не открывались заново.
+    Свои повторы urllib3 выключены: повторяет SheetsExecutor.
+    """
+    session = AuthorizedSession(http_client.auth)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    previous, http_client.session = getattr(http_client, 'session', None), session
+    if previous is not None:
+        previous.close()
+
+
+def reconnect(sheet, pool_size: int):
+    """Переподключение листа gspread: свежий токен сервисного аккаунта и новая сессия"""
+    http_client = sheet.client
+    use_pooled_session(http_client, pool_size)
+    # Токен обновляем простой сессией: у AuthorizedSession свои креды и повторная авторизация
+    http_client.auth.refresh(Request(requests.Session()))
+    print("🔑 Переподключение к Google Sheets: токен обновлен")
@@ -10,7 +10,8 @@ if [ -z "$BOT_TOKEN" ]; then
     exit 1
 fi
 
-if [ -z "$GOOGLE_CREDENTIALS_JSON" ]; then
+# Без SQLite таблица — единственное хранилище, credentials обязательны
+if [ "$STORAGE_BACKEND" = "sheets" ] && [ -z "$GOOGLE_CREDENTIALS_JSON" ]; then
     echo "❌ ОШИБКА: Переменная GOOGLE_CREDENTIALS_JSON не установлена"
     echo "ℹ️  Установите переменную: export GOOGLE_CREDENTIALS_JSON='ваш_json'"
     exit 1
@@ -22,9 +23,16 @@ if [ -d "venv" ]; then
     echo "✅ Виртуальное окружение активировано"
 fi
 
-# Проверка зависимостей
-echo "🔍 Проверка зависимостей..."
-pip install -r requirements.txt
+# Зависимости ставятся, только если requirements.txt изменился с прошлой установки:
+# pip install на каждом перезапуске — лишние секунды простоя
+REQUIREMENTS_STAMP=".requirements.sha256"
+REQUIREMENTS_HASH=$(sha256sum requirements.txt | cut -d' ' -f1)
+if [ "$(cat "$REQUIREMENTS_STAMP" 2>/dev/null)" != "$REQUIREMENTS_HASH" ]; then
+    echo "🔍 Установка зависимостей..."
+    pip install -r requirements.txt && echo "$REQUIREMENTS_HASH" > "$REQUIREMENTS_STAMP"
+else
+    echo "✅ Зависимости не менялись"
+fi
 
 # Запуск бота
 echo "🤖 Запускаю бота..."
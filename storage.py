@@ -0,0 +1,1699 @@
+"""
+📊 ХРАНИЛИЩЕ НАПОМИНАНИЙ
+Основное хранилище — локальная база SQLite, Google Таблица — зеркало.
+Для таблицы: кэш в памяти со сквозной записью.
+Все вызовы gspread выполняются в отдельном пуле потоков,
+чтобы медленная таблица не останавливала обработку обновлений.
+Записи накапливаются в очереди и уходят пачками (append_rows / batch_update).
+"""
+
+import asyncio
+import bisect
+import contextlib
+import functools
+import hashlib
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import metrics
+from models import STATUS_NOT_SENT, STATUS_SENT, Reminder
+from sheets_client import (
+    CircuitBreaker,
+    SheetsUnavailable,
+    backoff_delay,
+    is_auth_error,
+    is_transient,
+    retry_after,
+)
+from timezones import DEFAULT_TIMEZONE, get_timezone
+
+# Количество колонок с данными напоминания (A-H)
+COLUMNS_COUNT = 8
+EMPTY_ROW = [''] * COLUMNS_COUNT
+# Колонка I — постоянный ID напоминания (не меняется при удалении строк выше)
+ID_COLUMN = 'I'
+ID_INDEX = 8
+
+# Номера строк из ответа append_rows: "Лист1!A5:H7" -> (5, 7)
+_UPDATED_RANGE_ROWS = re.compile(r'!?[A-Z]+(\d+)(?::[A-Z]+(\d+))?$')
+
+
+def _rows_from_updated_range(response) -> Optional[Tuple[int, int]]:
+    """Достает первую и последнюю добавленные строки из ответа Sheets API"""
+    try:
+        updated_range = response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+    match = _UPDATED_RANGE_ROWS.search(updated_range)
+    if not match:
+        return None
+    first = int(match.group(1))
+    return first, int(match.group(2) or first)
+
+
+# Ссылка на ячейки: "H5" или "A5:I5"
+_A1_RANGE = re.compile(r'^([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$')
+
+
+def shift_row(row_number: int, removed: List[int]) -> Optional[int]:
+    """Номер строки после удаления строк removed (по возрастанию); None — строка удалена"""
+    position = bisect.bisect_left(removed, row_number)
+    if position < len(removed) and removed[position] == row_number:
+        return None
+    return row_number - position
+
+
+def row_reminder_id(row: List[str]) -> Optional[int]:
+    """ID из колонки I строки таблицы"""
+    if len(row) > ID_INDEX and str(row[ID_INDEX]).strip().isdigit():
+        return int(row[ID_INDEX])
+    return None
+
+
+# ========== ПУЛ ПОТОКОВ ДЛЯ GSPREAD ==========
+class SheetsExecutor:
+    """
+    Ограниченный пул потоков для блокирующих вызовов gspread с таймаутом.
+    Временные ошибки повторяются (до retries раз, с задержкой от backoff
+    до max_delay секунд), ошибки авторизации — после reconnect().
+    Предохранитель breaker не пускает запросы в неработающую таблицу
+    (sheets_client.py).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout: float = 30,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_delay: float = 30,
+        breaker: Optional[CircuitBreaker] = None,
+        reconnect: Optional[Callable[[], None]] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.reconnect = reconnect
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+
+    async def run(self, func, *args, timeout: Optional[float] = None, idempotent: bool = True, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) в пуле, не блокируя цикл событий.
+        idempotent=False — запрос что-то добавляет или удаляет: повторяется,
+        только если точно не выполнен (sheets_client.is_transient).
+        """
+        operation = getattr(func, '__name__', 'call')
+        reconnected = False
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                metrics.SHEETS_CALLS.inc(operation=operation, outcome='unavailable')
+                raise SheetsUnavailable(self.breaker.retry_in)
+            try:
+                result = await self._call(func, args, kwargs, operation, timeout)
+            except Exception as e:
+                if self.reconnect is not None and not reconnected and is_auth_error(e):
+                    # Токен не обновился сам — переподключаемся один раз и повторяем
+                    self.breaker.record_success()
+                    reconnected = True
+                    await self._call(self.reconnect, (), {}, 'reconnect', timeout)
+                    continue
+                if not is_transient(e):
+                    # Таблица ответила — запрос неверный, а не сервис недоступен
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries or not is_transient(e, idempotent):
+                    raise
+                delay = max(retry_after(e) or 0.0, backoff_delay(attempt, self.backoff, self.max_delay))
+                if delay > self.max_delay:
+                    raise
+                attempt += 1
+                metrics.SHEETS_RETRIES.inc(operation=operation)
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _call(self, func, args, kwargs, operation: str, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        metrics.SHEETS_REQUESTS.add()
+        outcome = 'error'
+        started = time.perf_counter()
+        try:
+            # По таймауту ждать перестаем, но сам запрос в потоке доработает до конца
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self._pool, call),
+                timeout=timeout or self.timeout
+            )
+            outcome = 'ok'
+            return result
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise
+        finally:
+            metrics.SHEETS_SECONDS.observe(time.perf_counter() - started, operation=operation)
+            metrics.SHEETS_CALLS.inc(operation=operation, outcome=outcome)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ========== ОЧЕРЕДЬ ЗАПИСИ ==========
+class SheetsWriteQueue:
+    """
+    Очередь отложенной записи. Добавления склеиваются в один append_rows,
+    правки ячеек — в один batch_update. Пачка уходит, когда набралось
+    max_batch операций или прошло flush_interval секунд с первой из них.
+    Каждый вызывающий ждет подтверждения своей операции.
+    Если таблица недоступна, пачка возвращается в очередь и отправляется
+    снова, когда предохранитель пропустит запрос: запись не теряется,
+    вызывающий ждет дольше. После close() ошибки отдаются вызывающим.
+    """
+
+    def __init__(self, sheet, executor: SheetsExecutor, max_batch: int = 50, flush_interval: float = 0.5):
+        self.sheet = sheet
+        self.executor = executor
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._appends: List[Tuple[List[str], asyncio.Future]] = []
+        # Диапазон -> (значения, ожидающие). Повторная запись диапазона заменяет прежнюю
+        self._updates: Dict[str, Tuple[list, List[asyncio.Future]]] = {}
+        self._pending = 0
+        self._batch_full = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._retry_task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._closing = False
+
+    async def append(self, row_data: List[str]) -> Optional[int]:
+        """Добавляет строку; возвращает ее номер (None, если API его не вернул)"""
+        future = asyncio.get_running_loop().create_future()
+        self._appends.append((list(row_data), future))
+        self._enqueued()
+        return await future
+
+    async def update(self, range_name: str, values: list):
+        """Записывает значения в диапазон"""
+        future = asyncio.get_running_loop().create_future()
+        previous = self._updates.pop(range_name, None)
+        waiters = previous[1] if previous else []
+        waiters.append(future)
+        # Переставляем диапазон в конец, чтобы сохранить порядок записей
+        self._updates[range_name] = (values, waiters)
+        self._enqueued()
+        await future
+
+    @property
+    def pending(self) -> int:
+        """Операций, ждущих отправки в таблицу"""
+        return len(self._appends) + len(self._updates)
+
+    def _enqueued(self):
+        self._pending += 1
+        if self._retry_task is not None:
+            # Таблица недоступна — новое уйдет вместе с отложенным
+            return
+        if self._pending >= self.max_batch:
+            self._batch_full.set()
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_deadline())
+
+    async def _flush_after_deadline(self):
+        try:
+            await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._flush_task = None
+        self._batch_full.clear()
+        await self.flush()
+
+    async def flush(self):
+        """Отправляет все накопленные операции"""
+        async with self._flush_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self):
+        appends, self._appends = self._appends, []
+        updates, self._updates = self._updates, {}
+        self._pending = 0
+
+        if appends:
+            await self._flush_appends(appends)
+        if updates:
+            await self._flush_updates(updates)
+
+    @contextlib.asynccontextmanager
+    async def paused(self):
+        """Отправляет накопленное и не пишет в таблицу, пока выполняется блок"""
+        async with self._flush_lock:
+            await self._flush_locked()
+            yield
+
+    def remap_rows(self, removed: List[int]):
+        """Пересчитывает номера строк в ожидающих правках после удаления строк removed"""
+        updates, self._updates = self._updates, {}
+        for range_name, (values, waiters) in updates.items():
+            match = _A1_RANGE.match(range_name)
+            if not match:
+                self._updates[range_name] = (values, waiters)
+                continue
+            first = shift_row(int(match.group(2)), removed)
+            last = shift_row(int(match.group(4) or match.group(2)), removed)
+            if first is None or last is None:
+                # Строки больше нет — писать некуда
+                for future in waiters:
+                    if not future.done():
+                        future.set_result(None)
+                continue
+            new_range = f'{match.group(1)}{first}'
+            if match.group(3):
+                new_range += f':{match.group(3)}{last}'
+            self._updates[new_range] = (values, waiters)
+
+    def _should_requeue(self, error: Exception, idempotent: bool) -> bool:
+        """Отложить пачку до восстановления таблицы, а не вернуть ошибку"""
+        if self._closing or not is_transient(error, idempotent):
+            return False
+        if self._retry_task is None:
+            if isinstance(error, SheetsUnavailable):
+                # Запрос не отправлялся — повторяем, когда предохранитель пропустит пробный
+                delay = error.retry_in
+            else:
+                self._failures += 1
+                delay = backoff_delay(self._failures, self.executor.backoff, self.executor.max_delay)
+            self._retry_task = asyncio.create_task(self._flush_after_retry(delay))
+            print(f"⏳ Запись в таблицу отложена на {delay:.0f} с: {error}")
+        return True
+
+    async def _flush_after_retry(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        self._retry_task = None
+        await self.flush()
+
+    def _requeue_appends(self, appends):
+        # Отложенные строки — раньше новых, порядок добавления сохраняется
+        self._appends[:0] = appends
+        self._pending += len(appends)
+
+    def _requeue_updates(self, updates):
+        # Более новая запись того же диапазона побеждает и забирает ожидающих
+        newer, self._updates = self._updates, dict(updates)
+        for range_name, (values, waiters) in newer.items():
+            previous = self._updates.pop(range_name, None)
+            self._updates[range_name] = (values, (previous[1] if previous else []) + waiters)
+        self._pending += len(updates)
+
+    async def _flush_appends(self, appends):
+        try:
+            response = await self.executor.run(
+                self.sheet.append_rows, [row for row, _ in appends], idempotent=False
+            )
+        except Exception as e:
+            if self._should_requeue(e, idempotent=False):
+                self._requeue_appends(appends)
+                return
+            for _, future in appends:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._failures = 0
+
+        rows = _rows_from_updated_range(response)
+        for offset, (_, future) in enumerate(appends):
+            if not future.done():
+                future.set_result(rows[0] + offset if rows else None)
+        print(f"📦 Записано строк одним запросом: {len(appends)}")
+
+    async def _flush_updates(self, updates):
+        data = [{'range': range_name, 'values': values} for range_name, (values, _) in updates.items()]
+        try:
+            await self.executor.run(self.sheet.batch_update, data)
+        except Exception as e:
+            if self._should_requeue(e, idempotent=True):
+                self._requeue_updates(updates)
+                return
+            for _, waiters in updates.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        self._failures = 0
+        for _, waiters in updates.values():
+            for future in waiters:
+                if not future.done():
+                    future.set_result(None)
+
+    def stop_retrying(self):
+        """
+        Больше не откладывать запись: отложенное уходит сейчас, а при ошибке
+        отдается вызывающим (перед остановкой бота, чтобы не ждать таблицу)
+        """
+        self._closing = True
+        task, self._retry_task = self._retry_task, None
+        if task is not None:
+            task.cancel()
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_after_deadline())
+            self._batch_full.set()
+
+    async def close(self):
+        """Отправляет остаток очереди перед остановкой"""
+        self.stop_retrying()
+        task = self._flush_task
+        if task is not None:
+            self._batch_full.set()
+            await task
+        await self.flush()
+
+
+# ========== КЭШ НАПОМИНАНИЙ ==========
+class ReminderRepository:
+    """
+    Зеркало листа в памяти. Чтения обслуживаются из кэша,
+    записи сразу уходят в таблицу и применяются к кэшу.
+    Полное чтение таблицы — только по истечении TTL или после invalidate().
+    Кэш меняется только в цикле событий, потоки пула лишь ходят в сеть.
+    Если таблица недоступна, устаревший кэш отдается как есть до следующей попытки.
+    """
+
+    def __init__(self, sheet, executor: SheetsExecutor, writer: SheetsWriteQueue, ttl: float = 300):
+        self.sheet = sheet
+        self.executor = executor
+        self.writer = writer
+        self.ttl = ttl
+        self._rows: List[List[str]] = []   # строки без заголовка, _rows[0] = строка 2
+        self._loaded_at: Optional[float] = None
+        self._has_rows = False             # кэш хоть раз заполнен — есть что отдать при сбое
+        self._serving_stale = False
+        self._refresh_lock = asyncio.Lock()
+        self._row_of: Dict[int, int] = {}  # ID (колонка I) -> номер строки
+        self._next_id = 1
+        # Синхронизация и сжатие таблицы не должны идти одновременно
+        self.maintenance_lock = asyncio.Lock()
+        # Номер сжатия и удаленные строки последних сжатий — для пересчета
+        # номеров строк, запомненных до сжатия
+        self.generation = 0
+        self._compactions: List[Tuple[int, List[int]]] = []
+
+    # ---------- синхронизация ----------
+    def invalidate(self):
+        """Помечает кэш устаревшим — следующее чтение перечитает таблицу"""
+        self._loaded_at = None
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def refresh(self):
+        """Перечитывает всю таблицу"""
+        data = await self.executor.run(self.sheet.get_all_values)
+        self._load_rows(data[1:])
+        print(f"🔄 Кэш напоминаний обновлен: {len(self._rows)} строк")
+
+    def _load_rows(self, rows: List[List[str]]):
+        self._rows = [list(row) for row in rows]
+        self._loaded_at = time.monotonic()
+        self._has_rows = True
+        self._serving_stale = False
+        self._row_of = {}
+        for row_number, row in enumerate(self._rows, start=2):
+            reminder_id = row_reminder_id(row)
+            if reminder_id is not None and str(row[0]).strip():
+                self._row_of[reminder_id] = row_number
+        self._next_id = max(self._next_id, max(self._row_of, default=0) + 1)
+
+    async def _ensure_fresh(self):
+        if not self._is_stale():
+            return
+        # Параллельные обработчики ждут одно чтение, а не запускают свои
+        async with self._refresh_lock:
+            if self._is_stale():
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    if not self._has_rows or not is_transient(e):
+                        raise
+                    if not self._serving_stale:
+                        self._serving_stale = True
+                        print(f"⚠️ Таблица недоступна, напоминания — из кэша, пока она не ответит: {e}")
+
+    # ---------- чтение ----------
+    async def get_all(self) -> List[List[str]]:
+        """Все строки без заголовка (копия списка)"""
+        await self._ensure_fresh()
+        return list(self._rows)
+
+    async def get_row(self, row_number: int) -> Optional[List[str]]:
+        """Строка по номеру в таблице (заголовок — строка 1)"""
+        await self._ensure_fresh()
+        return self._cached_row(row_number)
+
+    async def row_count(self) -> int:
+        """Количество строк без заголовка"""
+        await self._ensure_fresh()
+        return len(self._rows)
+
+    def row_of(self, reminder_id: int) -> Optional[int]:
+        """Номер строки по ID из колонки I — без чтения таблицы"""
+        return self._row_of.get(reminder_id)
+
+    def allocate_id(self) -> int:
+        """Новый ID для колонки I"""
+        reminder_id = self._next_id
+        self._next_id += 1
+        return reminder_id
+
+    def translate_row(self, row_number: int, generation: int) -> Optional[int]:
+        """Номер строки, запомненный на сжатии generation, в текущей нумерации"""
+        for compacted, removed in self._compactions:
+            if compacted > generation and row_number is not None:
+                row_number = shift_row(row_number, removed)
+        return row_number
+
+    def _cached_row(self, row_number: int) -> Optional[List[str]]:
+        index = row_number - 2
+        if 0 <= index < len(self._rows):
+            return self._rows[index]
+        return None
+
+    # ---------- запись ----------
+    async def append(self, row_data: List[str]) -> int:
+        """Добавляет строку и возвращает ее номер в таблице"""
+        row_number = await self.writer.append(row_data)
+
+        if row_number is None:
+            # Ответ без диапазона — номер строки узнаем перечитыванием
+            await self.refresh()
+            return len(self._rows) + 1
+
+        if self._loaded_at is not None:
+            self._set_row(row_number, list(row_data))
+        return row_number
+
+    async def update_row(self, row_number: int, row_data: List[str]):
+        """Перезаписывает строку A:H"""
+        await self.writer.update(f'A{row_number}:H{row_number}', [list(row_data)])
+        if self._loaded_at is not None:
+            self._set_row(row_number, list(row_data))
+
+    async def clear_row(self, row_number: int):
+        """Затирает строку вместе с ID (физически ее удалит сжатие)"""
+        await self.writer.update(f'A{row_number}:{ID_COLUMN}{row_number}', [list(EMPTY_ROW) + ['']])
+        if self._loaded_at is not None:
+            self._set_row(row_number, list(EMPTY_ROW) + [''])
+
+    async def assign_ids(self, ids: List[Tuple[int, int]]):
+        """Записывает ID в колонку I: [(номер строки, ID)] — одним batch_update"""
+        for row_number, reminder_id in ids:
+            row = self._cached_row(row_number)
+            if row is not None:
+                row.extend([''] * (ID_INDEX + 1 - len(row)))
+                row[ID_INDEX] = str(reminder_id)
+                self._row_of[reminder_id] = row_number
+            self._next_id = max(self._next_id, reminder_id + 1)
+        await asyncio.gather(*(
+            self.writer.update(f'{ID_COLUMN}{row_number}', [[str(reminder_id)]])
+            for row_number, reminder_id in ids
+        ))
+
+    async def update_cell(self, row_number: int, column: str, value: str):
+        """Обновляет одну ячейку (column — буква A-I)"""
+        await self.writer.update(f'{column}{row_number}', [[value]])
+        row = self._cached_row(row_number)
+        if row is not None:
+            index = ord(column) - ord('A')
+            row.extend([''] * (index + 1 - len(row)))
+            row[index] = value
+            if column == ID_COLUMN and value.isdigit():
+                self._row_of[int(value)] = row_number
+
+    async def update_status(self, row_number: int, status: str):
+        """Обновляет колонку H"""
+        await self.update_cell(row_number, 'H', status)
+
+    def _set_row(self, row_number: int, row_data: List[str]):
+        index = row_number - 2
+        while len(self._rows) <= index:
+            self._rows.append(list(EMPTY_ROW))
+
+        old_id = row_reminder_id(self._rows[index])
+        if old_id is not None and self._row_of.get(old_id) == row_number:
+            del self._row_of[old_id]
+        # Затирание строки (update_row с пустыми A-H) оставляет ID в колонке I
+        if len(row_data) <= ID_INDEX and old_id is not None and str(row_data[0]).strip():
+            row_data = list(row_data) + [''] * (ID_INDEX - len(row_data)) + [str(old_id)]
+        self._rows[index] = row_data
+
+        new_id = row_reminder_id(row_data)
+        if new_id is not None and str(row_data[0]).strip():
+            self._row_of[new_id] = row_number
+            self._next_id = max(self._next_id, new_id + 1)
+
+    # ---------- сжатие ----------
+    async def compact(self) -> List[int]:
+        """
+        Физически удаляет пустые строки (затертые при удалении напоминаний)
+        одним запросом batch_update. Возвращает номера удаленных строк
+        (по возрастанию, в нумерации до сжатия).
+        Пока идет сжатие, очередь записи стоит; правки, попавшие в нее
+        за это время, пересчитываются на новую нумерацию.
+        """
+        async with self.writer.paused():
+            data = await self.executor.run(self.sheet.get_all_values)
+            rows = [list(row) for row in data[1:]]
+            removed = [
+                row_number for row_number, row in enumerate(rows, start=2)
+                if not any(str(value).strip() for value in row[:COLUMNS_COUNT])
+            ]
+            if removed:
+                # Снизу вверх: удаление не сдвигает строки, которые еще предстоит удалить
+                requests = []
+                for first, last in reversed(_runs(removed)):
+                    requests.append({'deleteDimension': {'range': {
+                        'sheetId': self.sheet.id,
+                        'dimension': 'ROWS',
+                        'startIndex': first - 1,
+                        'endIndex': last,
+                    }}})
+                await self.executor.run(
+                    self.sheet.spreadsheet.batch_update, {'requests': requests}, idempotent=False
+                )
+
+            removed_set = set(removed)
+            self._load_rows([row for row_number, row in enumerate(rows, start=2) if row_number not in removed_set])
+            if removed:
+                self.generation += 1
+                self._compactions = (self._compactions + [(self.generation, removed)])[-10:]
+                self.writer.remap_rows(removed)
+        return removed
+
+
+def _runs(rows: List[int]) -> List[Tuple[int, int]]:
+    """Сплошные отрезки номеров: [2, 3, 4, 7] -> [(2, 4), (7, 7)]"""
+    runs = []
+    for row_number in rows:
+        if runs and runs[-1][1] == row_number - 1:
+            runs[-1] = (runs[-1][0], row_number)
+        else:
+            runs.append((row_number, row_number))
+    return runs
+
+
+# ========== ИНТЕРФЕЙС ХРАНИЛИЩА ==========
+class ReminderStorage:
+    """
+    Общий интерфейс хранилища напоминаний.
+    Напоминание записывается строкой из 8 колонок (A-H, как в таблице)
+    и получает числовой ID; query_due отдает уже разобранные Reminder.
+    Каждое напоминание принадлежит разделу — чату, в котором его создали;
+    без явного чата используется default_chat_id.
+    Если задан index, хранилище поддерживает его в актуальном состоянии.
+    """
+
+    index: Optional['PartitionedIndex'] = None
+    default_chat_id: Optional[int] = None
+
+    async def save(self, row_data: List[str], due_at: Optional[float], chat_id: Optional[int] = None) -> int:
+        """Сохраняет напоминание в раздел chat_id, возвращает ID"""
+        raise NotImplementedError
+
+    async def get(self, reminder_id: int) -> Optional[List[str]]:
+        """Напоминание по ID"""
+        raise NotImplementedError
+
+    async def list_all(self) -> List[Tuple[int, List[str]]]:
+        """Все напоминания по возрастанию ID"""
+        raise NotImplementedError
+
+    async def delete(self, reminder_id: int, chat_id: Optional[int] = None) -> bool:
+        """Удаляет напоминание; False, если такого нет (или оно из другого раздела, если задан chat_id)"""
+        raise NotImplementedError
+
+    def chat_of(self, reminder_id: int) -> Optional[int]:
+        """Раздел (чат) напоминания"""
+        return self.default_chat_id
+
+    async def mark_sent(self, reminder_id: int, status: str = STATUS_SENT):
+        """Обновляет статус отправки"""
+        raise NotImplementedError
+
+    async def mark_sent_many(self, reminder_ids: Iterable[int], status: str = STATUS_SENT):
+        """Обновляет статус отправки сразу у нескольких напоминаний"""
+        for reminder_id in reminder_ids:
+            await self.mark_sent(reminder_id, status)
+
+    async def reschedule(self, reminder_id: int, due_at: float, due_text: str):
+        """Переносит напоминание на следующее срабатывание (колонка G)"""
+        raise NotImplementedError
+
+    async def query_due(self, until: Optional[float] = None) -> List[Reminder]:
+        """Неотправленные напоминания со сроком до until (epoch), по возрастанию срока"""
+        raise NotImplementedError
+
+    async def compact_sheet(self) -> int:
+        """Удаляет из таблицы пустые строки; возвращает, сколько удалено"""
+        return 0
+
+    async def refresh_index(self):
+        """Строит индекс ближайших напоминаний при первом обращении"""
+        if self.index is not None and not self.index.loaded:
+            self.index.load(await self.query_due())
+
+    async def close(self):
+        """Освобождает ресурсы"""
+
+
+# ========== ИНДЕКС БЛИЖАЙШИХ НАПОМИНАНИЙ ==========
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize_search_text(text: str) -> str:
+    """Нижний регистр и "ё" -> "е" — так ищется и текст, и автор"""
+    return text.lower().replace('ё', 'е').strip()
+
+
+def search_tokens(text: str) -> List[str]:
+    """Слова текста для поиска"""
+    return _TOKEN.findall(normalize_search_text(text))
+
+
+def _author_key(author: str) -> str:
+    return normalize_search_text(author).lstrip('@')
+
+
+class ReminderIndex:
+    """
+    Неотправленные напоминания в памяти:
+      • сами напоминания (Reminder) по ID;
+      • список (срок, ID) по возрастанию — страницы /list и диапазоны дат (bisect);
+      • обратный индекс слов текста (колонка A) -> ID;
+      • индекс авторов (колонка E) -> ID.
+    Изменения применяются точечно, без перестройки индекса.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []            # (срок, ID) по возрастанию
+        self._reminders: Dict[int, Reminder] = {}
+        self._words: Dict[str, set] = {}                    # слово -> ID
+        self._vocabulary: List[str] = []                    # слова по алфавиту — поиск по началу слова
+        self._authors: Dict[str, set] = {}                  # автор -> ID
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._keys)
+
+    def load(self, due: Iterable[Reminder]):
+        """Заполняет индекс результатом query_due()"""
+        self._reminders = {}
+        self._words = {}
+        self._authors = {}
+        for reminder in due:
+            self._reminders[reminder.id] = reminder
+            self._add_terms(reminder)
+        self._keys = sorted((reminder.due_at, reminder.id) for reminder in self._reminders.values())
+        self._vocabulary = sorted(self._words)
+        self.loaded = True
+
+    def upsert(
+        self, reminder_id: int, due_at: Optional[float], row_data: List[str], chat_id: Optional[int] = None
+    ):
+        """Добавляет или обновляет напоминание; отправленные и без срока убираются"""
+        self.remove(reminder_id)
+        reminder = Reminder.from_row(reminder_id, row_data, due_at, chat_id)
+        if reminder.due_at is None or reminder.sent:
+            return
+        bisect.insort(self._keys, (reminder.due_at, reminder_id))
+        self._reminders[reminder_id] = reminder
+        for word in self._add_terms(reminder):
+            bisect.insort(self._vocabulary, word)
+
+    def remove(self, reminder_id: int):
+        reminder = self._reminders.pop(reminder_id, None)
+        if reminder is None:
+            return
+        del self._keys[bisect.bisect_left(self._keys, (reminder.due_at, reminder_id))]
+
+        for word in set(search_tokens(reminder.text)):
+            ids = self._words[word]
+            ids.discard(reminder_id)
+            if not ids:
+                del self._words[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        author = _author_key(reminder.author)
+        self._authors[author].discard(reminder_id)
+        if not self._authors[author]:
+            del self._authors[author]
+
+    def _add_terms(self, reminder: Reminder) -> List[str]:
+        """Добавляет слова и автора; возвращает слова, которых раньше не было"""
+        new_words = []
+        for word in set(search_tokens(reminder.text)):
+            ids = self._words.get(word)
+            if ids is None:
+                ids = self._words[word] = set()
+                new_words.append(word)
+            ids.add(reminder.id)
+        self._authors.setdefault(_author_key(reminder.author), set()).add(reminder.id)
+        return new_words
+
+    def get(self, reminder_id: int) -> Optional[Reminder]:
+        return self._reminders.get(reminder_id)
+
+    # ---------- поиск ----------
+    def _matching_word(self, prefix: str) -> set:
+        """ID напоминаний со словом, начинающимся на prefix ("встреч" -> "встречи")"""
+        ids = set()
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            ids |= self._words[self._vocabulary[position]]
+            position += 1
+        return ids
+
+    def select(
+        self,
+        words: Optional[str] = None,
+        author: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> List[Tuple[float, int]]:
+        """
+        Ключи (срок, ID) по возрастанию срока, подходящие под все заданные условия:
+        все слова words (по началу слова), автор author, срок в [start, end).
+        """
+        ids = None
+        for token in search_tokens(words or ''):
+            matched = self._matching_word(token)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                return []
+        if author is not None:
+            matched = self._authors.get(_author_key(author), set())
+            ids = matched if ids is None else ids & matched
+
+        keys = self._keys if ids is None else sorted((self._reminders[reminder_id].due_at, reminder_id) for reminder_id in ids)
+        if start is not None or end is not None:
+            low = 0 if start is None else bisect.bisect_left(keys, (start,))
+            high = len(keys) if end is None else bisect.bisect_left(keys, (end,))
+            keys = keys[low:high]
+        return keys
+
+    def page(
+        self,
+        number: int,
+        size: int,
+        keys: Optional[List[Tuple[float, int]]] = None,
+    ) -> Tuple[List[Reminder], int, int]:
+        """Страница number (с 0) из keys (по умолчанию — все): (напоминания, номер страницы, всего страниц)"""
+        keys = self._keys if keys is None else keys
+        pages = max(1, -(-len(keys) // size))
+        number = min(max(number, 0), pages - 1)
+        chunk = keys[number * size:(number + 1) * size]
+        return [self._reminders[reminder_id] for _, reminder_id in chunk], number, pages
+
+
+class PartitionedIndex:
+    """
+    Индексы ближайших напоминаний по разделам (чатам).
+    /list, /find и /mine чата работают только с его ReminderIndex:
+    страницы, диапазоны дат и поиск не просматривают напоминания
+    сотен других групп. Снаружи — тот же интерфейс, что у ReminderIndex
+    (load, upsert, remove, get), плюс for_chat.
+    """
+
+    def __init__(self, default_chat_id: Optional[int] = None):
+        self.default_chat_id = default_chat_id
+        self._partitions: Dict[Optional[int], ReminderIndex] = {}
+        self._chat_of: Dict[int, Optional[int]] = {}        # ID -> раздел
+        self.loaded = False
+
+    def __len__(self):
+        return sum(len(partition) for partition in self._partitions.values())
+
+    def _chat(self, chat_id: Optional[int]) -> Optional[int]:
+        return self.default_chat_id if chat_id is None else chat_id
+
+    def for_chat(self, chat_id: Optional[int]) -> ReminderIndex:
+        """Индекс раздела; для чата без напоминаний — пустой"""
+        chat_id = self._chat(chat_id)
+        partition = self._partitions.get(chat_id)
+        if partition is None:
+            partition = self._partitions[chat_id] = ReminderIndex()
+            partition.loaded = True
+        return partition
+
+    def load(self, due: Iterable[Reminder]):
+        """Заполняет индексы результатом query_due(), раскладывая напоминания по разделам"""
+        by_chat: Dict[Optional[int], List[Reminder]] = {}
+        for reminder in due:
+            by_chat.setdefault(self._chat(reminder.chat_id), []).append(reminder)
+        self._partitions = {}
+        self._chat_of = {}
+        for chat_id, reminders in by_chat.items():
+            self.for_chat(chat_id).load(reminders)
+            for reminder in reminders:
+                self._chat_of[reminder.id] = chat_id
+        self.loaded = True
+
+    def upsert(
+        self, reminder_id: int, due_at: Optional[float], row_data: List[str], chat_id: Optional[int] = None
+    ):
+        self.remove(reminder_id)
+        chat_id = self._chat(chat_id)
+        partition = self.for_chat(chat_id)
+        partition.upsert(reminder_id, due_at, row_data, chat_id)
+        if partition.get(reminder_id) is not None:
+            self._chat_of[reminder_id] = chat_id
+
+    def remove(self, reminder_id: int):
+        if reminder_id in self._chat_of:
+            self._partitions[self._chat_of.pop(reminder_id)].remove(reminder_id)
+
+    def get(self, reminder_id: int) -> Optional[Reminder]:
+        if reminder_id not in self._chat_of:
+            return None
+        return self._partitions[self._chat_of[reminder_id]].get(reminder_id)
+
+
+# ========== SQLITE: ОСНОВНОЕ ХРАНИЛИЩЕ ==========
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    text       TEXT NOT NULL,
+    date       TEXT NOT NULL DEFAULT '',
+    time       TEXT NOT NULL DEFAULT '',
+    repeat     TEXT NOT NULL DEFAULT '',
+    author     TEXT NOT NULL DEFAULT '',
+    created    TEXT NOT NULL DEFAULT '',
+    due_text   TEXT NOT NULL DEFAULT '',
+    status     TEXT NOT NULL DEFAULT '',
+    due_at     REAL,
+    sheet_row  INTEGER,
+    sheet_hash TEXT,
+    chat_id    INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_status_due ON reminders (status, due_at);
+CREATE INDEX IF NOT EXISTS idx_reminders_sheet_row ON reminders (sheet_row);
+CREATE INDEX IF NOT EXISTS idx_reminders_chat ON reminders (chat_id);
+CREATE TABLE IF NOT EXISTS sheet_tombstones (
+    sheet_row  INTEGER PRIMARY KEY,
+    sheet_hash TEXT
+);
+"""
+
+_ROW_COLUMNS = "text, date, time, repeat, author, created, due_text, status"
+
+
+def row_hash(row_data: Optional[List[str]]) -> Optional[str]:
+    """Хэш строки A-H; None для пустой строки"""
+    if not row_data or not str(row_data[0]).strip():
+        return None
+    payload = '\x1f'.join(normalize_row(row_data)).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+class SQLiteReminderStorage(ReminderStorage):
+    """
+    Локальное хранилище на SQLite — основной источник данных.
+    Запросы к локальному файлу занимают доли миллисекунды,
+    поэтому выполняются прямо в цикле событий.
+    Google Таблица, если подключена, обновляется в фоне через SheetsMirror.
+    Для каждой строки хранится номер в таблице и хэш последней
+    синхронизированной версии (sheet_hash) — по нему sync.py находит изменения,
+    и раздел (chat_id). В таблице раздела нет: строки, добавленные
+    в нее вручную, попадают в раздел по умолчанию.
+    """
+
+    def __init__(self, path: str, mirror: Optional['SheetsMirror'] = None, default_chat_id: Optional[int] = None):
+        self.path = path
+        self.mirror = mirror
+        self.default_chat_id = default_chat_id
+        # Напоминание удалено локально, потому что его строку стерли в таблице
+        self.on_sheet_removed: Callable[[int], None] = lambda reminder_id: None
+        self._db = sqlite3.connect(path)
+        self._migrate()
+        self._db.executescript(_SCHEMA)
+        if default_chat_id is not None:
+            # Напоминания, созданные до разделения по чатам, — в раздел по умолчанию
+            self._db.execute("UPDATE reminders SET chat_id = ? WHERE chat_id IS NULL", (default_chat_id,))
+        self._db.commit()
+
+        if mirror:
+            self.attach_mirror(mirror)
+
+    def attach_mirror(self, mirror: 'SheetsMirror'):
+        """Подключает зеркало в таблицу (таблица подключается уже после запуска бота)"""
+        self.mirror = mirror
+        mirror.on_synced = self._mark_mirrored
+        mirror.on_cleared = self.drop_tombstone
+
+    def _migrate(self):
+        # Базы, созданные до появления sheet_hash
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(reminders)")}
+        if columns and 'sheet_hash' not in columns:
+            self._db.execute("ALTER TABLE reminders ADD COLUMN sheet_hash TEXT")
+        # ... и до разделения по чатам
+        if columns and 'chat_id' not in columns:
+            self._db.execute("ALTER TABLE reminders ADD COLUMN chat_id INTEGER")
+
+    def count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM reminders").fetchone()[0]
+
+    def import_rows(self, rows: List[Tuple[int, List[str], Optional[float]]]) -> int:
+        """Разовый импорт строк таблицы: (номер строки, строка, срок). Без зеркалирования"""
+        data = [
+            (*normalize_row(row), due_at, sheet_row, row_hash(row), self.default_chat_id)
+            for sheet_row, row, due_at in rows
+            if row_hash(row)
+        ]
+        self._db.executemany(
+            f"INSERT INTO reminders ({_ROW_COLUMNS}, due_at, sheet_row, sheet_hash, chat_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            data
+        )
+        self._db.commit()
+
+        # Постоянные ID — в колонку I (одним batch_update через очередь записи)
+        if self.mirror:
+            self.mirror.ids_assigned(
+                self._db.execute("SELECT sheet_row, id FROM reminders WHERE sheet_row IS NOT NULL").fetchall()
+            )
+        return len(data)
+
+    async def save(self, row_data: List[str], due_at: Optional[float], chat_id: Optional[int] = None) -> int:
+        cursor = self._db.execute(
+            f"INSERT INTO reminders ({_ROW_COLUMNS}, due_at, chat_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*normalize_row(row_data), due_at, self.default_chat_id if chat_id is None else chat_id)
+        )
+        self._db.commit()
+        reminder_id = cursor.lastrowid
+        self._reindex(reminder_id)
+
+        if self.mirror:
+            self.mirror.saved(reminder_id, row_data)
+        return reminder_id
+
+    async def get(self, reminder_id: int) -> Optional[List[str]]:
+        row = self._db.execute(
+            f"SELECT {_ROW_COLUMNS} FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+        return list(row) if row else None
+
+    async def list_all(self) -> List[Tuple[int, List[str]]]:
+        rows = self._db.execute(f"SELECT id, {_ROW_COLUMNS} FROM reminders ORDER BY id")
+        return [(row[0], list(row[1:])) for row in rows]
+
+    async def delete(self, reminder_id: int, chat_id: Optional[int] = None) -> bool:
+        found = self._db.execute(
+            "SELECT sheet_row, sheet_hash, chat_id FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+        if not found or (chat_id is not None and found[2] != chat_id):
+            return False
+
+        sheet_row, sheet_hash, _ = found
+        self._db.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+        if sheet_row is not None:
+            # Пока строка не очищена в таблице, синхронизация не должна ее воскресить
+            self._db.execute(
+                "INSERT OR REPLACE INTO sheet_tombstones (sheet_row, sheet_hash) VALUES (?, ?)",
+                (sheet_row, sheet_hash)
+            )
+        self._db.commit()
+        self._reindex(reminder_id)
+
+        if self.mirror:
+            self.mirror.deleted(reminder_id, sheet_row)
+        return True
+
+    def chat_of(self, reminder_id: int) -> Optional[int]:
+        row = self._db.execute("SELECT chat_id FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        return row[0] if row else None
+
+    async def mark_sent(self, reminder_id: int, status: str = STATUS_SENT):
+        sheet_row = self._sheet_row(reminder_id)
+        self._db.execute("UPDATE reminders SET status = ? WHERE id = ?", (status, reminder_id))
+        self._db.commit()
+        self._reindex(reminder_id)
+
+        if self.mirror:
+            self.mirror.cell_changed(reminder_id, sheet_row, 'H', status)
+
+    async def mark_sent_many(self, reminder_ids: Iterable[int], status: str = STATUS_SENT):
+        # Одна транзакция; ячейки H уходят в таблицу одним batch_update через очередь записи
+        sheet_rows = {reminder_id: self._sheet_row(reminder_id) for reminder_id in reminder_ids}
+        self._db.executemany(
+            "UPDATE reminders SET status = ? WHERE id = ?",
+            [(status, reminder_id) for reminder_id in sheet_rows]
+        )
+        self._db.commit()
+        for reminder_id in sheet_rows:
+            self._reindex(reminder_id)
+
+        if self.mirror:
+            for reminder_id, sheet_row in sheet_rows.items():
+                self.mirror.cell_changed(reminder_id, sheet_row, 'H', status)
+
+    async def reschedule(self, reminder_id: int, due_at: float, due_text: str):
+        sheet_row = self._sheet_row(reminder_id)
+        self._db.execute(
+            "UPDATE reminders SET due_at = ?, due_text = ? WHERE id = ?",
+            (due_at, due_text, reminder_id)
+        )
+        self._db.commit()
+        self._reindex(reminder_id)
+
+        if self.mirror:
+            self.mirror.cell_changed(reminder_id, sheet_row, 'G', due_text)
+
+    async def query_due(self, until: Optional[float] = None) -> List[Reminder]:
+        until = float('inf') if until is None else until
+        rows = self._db.execute(
+            f"SELECT id, due_at, chat_id, {_ROW_COLUMNS} FROM reminders "
+            "WHERE status != ? AND due_at IS NOT NULL AND due_at <= ? ORDER BY due_at",
+            (STATUS_SENT, until)
+        )
+        return [Reminder.from_row(row[0], row[3:], row[1], row[2]) for row in rows]
+
+    async def close(self):
+        if self.mirror:
+            await self.mirror.close()
+        self._db.close()
+
+    # ---------- состояние синхронизации с таблицей ----------
+    def sheet_state(self) -> List[Tuple[int, int, Optional[str], List[str]]]:
+        """Строки, связанные с таблицей: (ID, номер строки, sheet_hash, строка)"""
+        rows = self._db.execute(
+            f"SELECT id, sheet_row, sheet_hash, {_ROW_COLUMNS} FROM reminders WHERE sheet_row IS NOT NULL"
+        )
+        return [(row[0], row[1], row[2], list(row[3:])) for row in rows]
+
+    def unmirrored(self) -> List[Tuple[int, List[str]]]:
+        """Строки, которые еще ни разу не попали в таблицу"""
+        rows = self._db.execute(f"SELECT id, {_ROW_COLUMNS} FROM reminders WHERE sheet_row IS NULL")
+        return [(row[0], list(row[1:])) for row in rows]
+
+    def tombstones(self) -> Dict[int, Optional[str]]:
+        """Удаленные локально строки, еще не очищенные в таблице"""
+        return dict(self._db.execute("SELECT sheet_row, sheet_hash FROM sheet_tombstones"))
+
+    def drop_tombstone(self, sheet_row: int):
+        self._db.execute("DELETE FROM sheet_tombstones WHERE sheet_row = ?", (sheet_row,))
+        self._db.commit()
+
+    def insert_from_sheet(self, sheet_row: int, row_data: List[str], due_at: Optional[float]) -> int:
+        """Добавляет строку, созданную в таблице вручную. Без зеркалирования"""
+        cursor = self._db.execute(
+            f"INSERT INTO reminders ({_ROW_COLUMNS}, due_at, sheet_row, sheet_hash, chat_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*normalize_row(row_data), due_at, sheet_row, row_hash(row_data), self.default_chat_id)
+        )
+        self._db.commit()
+        self._reindex(cursor.lastrowid)
+        return cursor.lastrowid
+
+    def apply_from_sheet(self, reminder_id: int, sheet_row: int, row_data: List[str], due_at: Optional[float]):
+        """Перезаписывает строку версией из таблицы. Без зеркалирования"""
+        self._db.execute(
+            "UPDATE reminders SET text = ?, date = ?, time = ?, repeat = ?, author = ?, created = ?, "
+            "due_text = ?, status = ?, due_at = ?, sheet_row = ?, sheet_hash = ? WHERE id = ?",
+            (*normalize_row(row_data), due_at, sheet_row, row_hash(row_data), reminder_id)
+        )
+        self._db.commit()
+        self._reindex(reminder_id)
+
+    def move_sheet_row(self, reminder_id: int, sheet_row: int):
+        """Строку переместили в таблице (например, удалили строку выше)"""
+        self._db.execute("UPDATE reminders SET sheet_row = ? WHERE id = ?", (sheet_row, reminder_id))
+        self._db.commit()
+
+    def remove_local(self, reminder_id: int):
+        """Удаляет строку, стертую в таблице вручную. Без зеркалирования"""
+        self._db.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+        self._db.commit()
+        self._reindex(reminder_id)
+
+    def apply_compaction(self, removed: List[int]) -> List[int]:
+        """
+        Пересчитывает номера строк после того, как из таблицы удалили строки removed.
+        Сжатие удаляет только пустые строки: связанная с такой строкой запись
+        стерта в таблице вручную (уже после синхронизации) и удаляется локально,
+        а не отвязывается — иначе синхронизация дописала бы ее в таблицу заново.
+        Возвращает ID удаленных напоминаний.
+        """
+        if not removed:
+            return []
+        linked = self._db.execute("SELECT id, sheet_row FROM reminders WHERE sheet_row IS NOT NULL").fetchall()
+        shifted = [(shift_row(sheet_row, removed), reminder_id) for reminder_id, sheet_row in linked]
+        erased = [reminder_id for sheet_row, reminder_id in shifted if sheet_row is None]
+        self._db.executemany(
+            "UPDATE reminders SET sheet_row = ? WHERE id = ?",
+            [(sheet_row, reminder_id) for sheet_row, reminder_id in shifted if sheet_row is not None]
+        )
+        self._db.executemany("DELETE FROM reminders WHERE id = ?", [(reminder_id,) for reminder_id in erased])
+        tombstones = self.tombstones()
+        self._db.execute("DELETE FROM sheet_tombstones")
+        self._db.executemany(
+            "INSERT OR REPLACE INTO sheet_tombstones (sheet_row, sheet_hash) VALUES (?, ?)",
+            [
+                (shift_row(sheet_row, removed), sheet_hash)
+                for sheet_row, sheet_hash in tombstones.items()
+                if shift_row(sheet_row, removed) is not None
+            ]
+        )
+        self._db.commit()
+        for reminder_id in erased:
+            self._reindex(reminder_id)
+            self.on_sheet_removed(reminder_id)
+        return erased
+
+    async def compact_sheet(self) -> int:
+        if not self.mirror:
+            return 0
+        # Все, что зеркало уже начало писать, должно лечь в старую нумерацию
+        await self.mirror.drain()
+        removed = await self.mirror.repo.compact()
+        erased = self.apply_compaction(removed)
+        if erased:
+            print(f"🗑️ Строки стерты в таблице вручную, напоминания удалены: {erased}")
+        return len(removed)
+
+    def _reindex(self, reminder_id: int):
+        # Индекс обновляется из базы — так он совпадает с ней при любом изменении
+        if self.index is None or not self.index.loaded:
+            return
+        row = self._db.execute(
+            f"SELECT due_at, chat_id, {_ROW_COLUMNS} FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+        if row is None:
+            self.index.remove(reminder_id)
+        else:
+            self.index.upsert(reminder_id, row[0], list(row[2:]), row[1])
+
+    def _sheet_row(self, reminder_id: int) -> Optional[int]:
+        row = self._db.execute("SELECT sheet_row FROM reminders WHERE id = ?", (reminder_id,)).fetchone()
+        return row[0] if row else None
+
+    def _mark_mirrored(self, reminder_id: int, sheet_row: int):
+        # Таблица теперь совпадает с локальной строкой — запоминаем ее хэш
+        row = self._db.execute(
+            f"SELECT {_ROW_COLUMNS} FROM reminders WHERE id = ?", (reminder_id,)
+        ).fetchone()
+        if row is None:
+            return
+        self._db.execute(
+            "UPDATE reminders SET sheet_row = ?, sheet_hash = ? WHERE id = ?",
+            (sheet_row, row_hash(list(row)), reminder_id)
+        )
+        self._db.commit()
+
+
+def normalize_row(row_data: List[str]) -> List[str]:
+    """Дополняет строку до 8 колонок"""
+    row = [str(value) for value in row_data[:COLUMNS_COUNT]]
+    return row + [''] * (COLUMNS_COUNT - len(row))
+
+
+# ========== GOOGLE SHEETS: ЗЕРКАЛО ==========
+class SheetsMirror:
+    """
+    Асинхронное зеркало в Google Таблицу. Изменения уходят в фоне,
+    ошибки таблицы не мешают работе бота — данные уже лежат в SQLite.
+    После успешной записи вызывается on_synced(ID, номер строки).
+    """
+
+    def __init__(self, repo: ReminderRepository):
+        self.repo = repo
+        self.on_synced: Callable[[int, int], None] = lambda reminder_id, sheet_row: None
+        self.on_cleared: Callable[[int], None] = lambda sheet_row: None
+        self._tasks = set()
+        self._pending_appends: Dict[int, asyncio.Task] = {}
+
+    def saved(self, reminder_id: int, row_data: List[str]):
+        async def append():
+            sheet_row = await self.repo.append(normalize_row(row_data) + [str(reminder_id)])
+            self.on_synced(reminder_id, sheet_row)
+            return sheet_row
+
+        task = self._spawn(append(), f"добавление #{reminder_id}")
+        self._pending_appends[reminder_id] = task
+        task.add_done_callback(lambda _: self._pending_appends.pop(reminder_id, None))
+
+    def deleted(self, reminder_id: int, sheet_row: Optional[int]):
+        generation = self.repo.generation
+
+        async def clear():
+            row = await self._resolve_row(reminder_id, sheet_row, generation)
+            if row:
+                await self.repo.clear_row(row)
+                self.on_cleared(row)
+
+        self._spawn(clear(), f"удаление #{reminder_id}")
+
+    def cleared(self, sheet_row: int):
+        """Повторная очистка строки, удаленной локально"""
+        generation = self.repo.generation
+
+        async def clear():
+            row = self.repo.translate_row(sheet_row, generation)
+            if row:
+                await self.repo.clear_row(row)
+                self.on_cleared(row)
+
+        self._spawn(clear(), f"очистка строки {sheet_row}")
+
+    def cell_changed(self, reminder_id: int, sheet_row: Optional[int], column: str, value: str):
+        generation = self.repo.generation
+
+        async def update():
+            row = await self._resolve_row(reminder_id, sheet_row, generation)
+            if row:
+                await self.repo.update_cell(row, column, value)
+                self.on_synced(reminder_id, row)
+
+        self._spawn(update(), f"ячейка {column} #{reminder_id}")
+
+    def ids_assigned(self, ids: List[Tuple[int, int]]):
+        """Записывает ID в колонку I: [(номер строки, ID)]"""
+        generation = self.repo.generation
+
+        async def assign():
+            translated = [(self.repo.translate_row(row, generation), reminder_id) for row, reminder_id in ids]
+            await self.repo.assign_ids([(row, reminder_id) for row, reminder_id in translated if row])
+
+        if ids:
+            self._spawn(assign(), f"ID для {len(ids)} строк")
+
+    def pushed(self, reminder_id: int, sheet_row: int, row_data: List[str]):
+        """Записывает локальную версию строки поверх таблицы"""
+        generation = self.repo.generation
+
+        async def update():
+            row = self.repo.translate_row(sheet_row, generation)
+            if row:
+                await self.repo.update_row(row, row_data)
+                self.on_synced(reminder_id, row)
+
+        self._spawn(update(), f"обновление #{reminder_id}")
+
+    async def _resolve_row(self, reminder_id: int, sheet_row: Optional[int], generation: int) -> Optional[int]:
+        # Если строка еще добавляется в таблицу, дожидаемся ее номера
+        if sheet_row is None and reminder_id in self._pending_appends:
+            try:
+                return await self._pending_appends[reminder_id]
+            except Exception:
+                return None
+        # Номер запомнен до сжатия таблицы — переводим в текущую нумерацию
+        return self.repo.translate_row(sheet_row, generation)
+
+    def _spawn(self, coro, description: str) -> asyncio.Task:
+        async def guarded():
+            try:
+                return await coro
+            except Exception as e:
+                print(f"⚠️ Зеркало Google Sheets ({description}): {e}")
+                raise
+
+        task = asyncio.create_task(guarded())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # Ошибка уже выведена, не даем asyncio ругаться на неполученное исключение
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def drain(self):
+        """Дожидается всех фоновых записей, включая появившиеся во время ожидания"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self):
+        """Дожидается фоновых задач и дописывает очередь записи"""
+        # Недоступную таблицу не ждем: недописанное отправит синхронизация после запуска
+        self.repo.writer.stop_retrying()
+        await self.drain()
+        await self.repo.writer.close()
+
+
+# ========== OUTBOX: ЖУРНАЛ ОТПРАВКИ ==========
+_OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    reminder_id   INTEGER NOT NULL,
+    occurrence_at REAL NOT NULL,
+    is_pre_alert  INTEGER NOT NULL DEFAULT 0,
+    chat_id       INTEGER NOT NULL,
+    text          TEXT NOT NULL,
+    enqueued_at   REAL NOT NULL
+);
+"""
+
+
+class OutboxEntry(NamedTuple):
+    """Сообщение, поставленное в отправку и еще не подтвержденное"""
+    id: int
+    reminder_id: int
+    occurrence_at: float
+    is_pre_alert: bool
+    chat_id: int
+    text: str
+
+
+class DeliveryOutbox:
+    """
+    Журнал отправки в локальном SQLite-файле (семантика "хотя бы один раз").
+    Сработавшее напоминание записывается сюда до отправки и удаляется
+    после того, как отправлено и обработано (статус/перенос).
+    Все, что осталось в журнале после падения, досылается при запуске.
+    Журнал работает и при STORAGE_BACKEND=sheets.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        # WAL: запись в журнал на каждое напоминание не ждет fsync,
+        # а падение процесса (не питания) не теряет подтвержденные записи
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_OUTBOX_SCHEMA)
+        self._db.commit()
+
+    def add(self, reminder_id: int, occurrence_at: float, is_pre_alert: bool, chat_id: int, text: str) -> int:
+        return self.add_many([(reminder_id, occurrence_at, is_pre_alert, chat_id, text)])[0]
+
+    def add_many(self, entries: List[Tuple[int, float, bool, int, str]]) -> List[int]:
+        """Записывает сообщения одной транзакцией, возвращает их ID"""
+        now = time.time()
+        ids = [
+            self._db.execute(
+                "INSERT INTO outbox (reminder_id, occurrence_at, is_pre_alert, chat_id, text, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (reminder_id, occurrence_at, int(is_pre_alert), chat_id, text, now)
+            ).lastrowid
+            for reminder_id, occurrence_at, is_pre_alert, chat_id, text in entries
+        ]
+        self._db.commit()
+        return ids
+
+    def ack(self, entry_id: int):
+        self.ack_many([entry_id])
+
+    def ack_many(self, entry_ids: Iterable[int]):
+        self._db.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+        self._db.commit()
+
+    def pending(self) -> List[OutboxEntry]:
+        """Неподтвержденные сообщения в порядке постановки"""
+        rows = self._db.execute(
+            "SELECT id, reminder_id, occurrence_at, is_pre_alert, chat_id, text FROM outbox ORDER BY id"
+        )
+        return [OutboxEntry(row[0], row[1], row[2], bool(row[3]), row[4], row[5]) for row in rows]
+
+    def close(self):
+        self._db.close()
+
+
+# ========== ЧАТЫ (РАЗДЕЛЫ НАПОМИНАНИЙ) ==========
+_CHATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id        INTEGER PRIMARY KEY,
+    target_chat_id INTEGER NOT NULL,
+    title          TEXT NOT NULL DEFAULT '',
+    added_at       REAL NOT NULL,
+    timezone       TEXT NOT NULL DEFAULT ''
+);
+"""
+
+
+class ChatSettings(NamedTuple):
+    """Настройки чата: куда отправлять напоминания его раздела и в каком он поясе"""
+    chat_id: int
+    target_chat_id: int
+    title: str = ''
+    timezone: str = ''      # имя IANA; пусто — пояс по умолчанию
+
+
+class ChatRegistry:
+    """
+    Чаты, которые обслуживает бот, и их настройки — в локальном SQLite-файле.
+    Все записи держатся в словаре: на каждом сообщении и каждой отправке
+    настройки берутся из памяти, база читается один раз при запуске.
+    Чат, которого нет в реестре, отправляет напоминания сам себе.
+    Личный чат хранит здесь пояс пользователя (ID личного чата = ID пользователя).
+    """
+
+    def __init__(self, path: str, default_timezone: str = DEFAULT_TIMEZONE):
+        self.path = path
+        self.default_timezone = default_timezone
+        self._db = sqlite3.connect(path)
+        # Базы, созданные до появления поясов
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(chats)")}
+        if columns and 'timezone' not in columns:
+            self._db.execute("ALTER TABLE chats ADD COLUMN timezone TEXT NOT NULL DEFAULT ''")
+        self._db.executescript(_CHATS_SCHEMA)
+        self._db.commit()
+        self._chats: Dict[int, ChatSettings] = {
+            row[0]: ChatSettings(*row)
+            for row in self._db.execute("SELECT chat_id, target_chat_id, title, timezone FROM chats")
+        }
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._chats
+
+    def get(self, chat_id: int) -> ChatSettings:
+        return self._chats.get(chat_id) or ChatSettings(chat_id, chat_id)
+
+    def target(self, chat_id: int) -> int:
+        """Чат, куда уходят напоминания раздела chat_id"""
+        settings = self._chats.get(chat_id)
+        return settings.target_chat_id if settings else chat_id
+
+    def timezone(self, *chat_ids: int):
+        """Пояс первого из чатов, у которого он задан, иначе пояс по умолчанию"""
+        for chat_id in chat_ids:
+            settings = self._chats.get(chat_id)
+            if settings and settings.timezone:
+                return get_timezone(settings.timezone)
+        return get_timezone(self.default_timezone)
+
+    def register(self, chat_id: int, title: str = '') -> bool:
+        """Запоминает чат при первом обращении; True, если он новый"""
+        if chat_id in self._chats:
+            return False
+        self._save(ChatSettings(chat_id, chat_id, title or ''))
+        return True
+
+    def set_target(self, chat_id: int, target_chat_id: int):
+        settings = self.get(chat_id)
+        if settings.target_chat_id != target_chat_id:
+            self._save(settings._replace(target_chat_id=target_chat_id))
+
+    def set_timezone(self, chat_id: int, name: str):
+        """name — имя IANA ("Asia/Yekaterinburg"); пустая строка — пояс по умолчанию"""
+        settings = self.get(chat_id)
+        if settings.timezone != name:
+            self._save(settings._replace(timezone=name))
+
+    def chats(self) -> List[ChatSettings]:
+        return list(self._chats.values())
+
+    def _save(self, settings: ChatSettings):
+        self._db.execute(
+            "INSERT INTO chats (chat_id, target_chat_id, title, timezone, added_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET target_chat_id = excluded.target_chat_id, "
+            "title = excluded.title, timezone = excluded.timezone",
+            (*settings, time.time())
+        )
+        self._db.commit()
+        self._chats[settings.chat_id] = settings
+
+    def close(self):
+        self._db.close()
+
+
+# ========== GOOGLE SHEETS: ХРАНИЛИЩЕ БЕЗ SQLITE ==========
+class SheetsReminderStorage(ReminderStorage):
+    """
+    Таблица как единственное хранилище. ID напоминания — колонка I,
+    номер строки по ID берется из карты в памяти, без чтения таблицы.
+    Строкам без ID (старые или добавленные вручную) ID присваивается
+    при чтении: номер строки, если он свободен, иначе следующий.
+    Разделов в таблице нет: все напоминания принадлежат default_chat_id,
+    несколько групп обслуживает только SQLite.
+    """
+
+    def __init__(
+        self,
+        repo: ReminderRepository,
+        parse_due: Callable[[str], Optional[float]],
+        default_chat_id: Optional[int] = None,
+    ):
+        self.repo = repo
+        self.parse_due = parse_due
+        self.default_chat_id = default_chat_id
+        self._indexed_at: Optional[float] = None
+
+    async def save(self, row_data: List[str], due_at: Optional[float], chat_id: Optional[int] = None) -> int:
+        await self.repo._ensure_fresh()
+        reminder_id = self.repo.allocate_id()
+        await self.repo.append(normalize_row(row_data) + [str(reminder_id)])
+        if self.index is not None:
+            self.index.upsert(reminder_id, due_at, row_data)
+        return reminder_id
+
+    async def get(self, reminder_id: int) -> Optional[List[str]]:
+        await self.repo._ensure_fresh()
+        return self._cached(reminder_id)
+
+    def _cached(self, reminder_id: int) -> Optional[List[str]]:
+        row_number = self.repo.row_of(reminder_id)
+        row = self.repo._cached_row(row_number) if row_number else None
+        return normalize_row(row) if row and row[0] else None
+
+    async def list_all(self) -> List[Tuple[int, List[str]]]:
+        rows = await self.repo.get_all()
+        missing = [
+            row_number for row_number, row in enumerate(rows, start=2)
+            if row and row[0] and row_reminder_id(row) is None
+        ]
+        if missing:
+            await self._assign_ids(missing)
+            rows = await self.repo.get_all()
+
+        reminders = [
+            (row_reminder_id(row), normalize_row(row))
+            for row in rows if row and row[0] and row_reminder_id(row) is not None
+        ]
+        reminders.sort(key=lambda item: item[0])
+        return reminders
+
+    async def _assign_ids(self, row_numbers: List[int]):
+        taken = set()
+        for row in await self.repo.get_all():
+            reminder_id = row_reminder_id(row)
+            if reminder_id is not None:
+                taken.add(reminder_id)
+
+        ids = []
+        for row_number in row_numbers:
+            # Номер строки — прежний ID напоминания, сохраняем его, если свободен
+            reminder_id = row_number if row_number not in taken else self.repo.allocate_id()
+            while reminder_id in taken:
+                reminder_id = self.repo.allocate_id()
+            taken.add(reminder_id)
+            ids.append((row_number, reminder_id))
+        await self.repo.assign_ids(ids)
+        print(f"🏷️ Присвоены ID строкам таблицы: {len(ids)}")
+
+    async def delete(self, reminder_id: int, chat_id: Optional[int] = None) -> bool:
+        # Карта ID -> строка в памяти: удаление не читает таблицу
+        row_number = self.repo.row_of(reminder_id)
+        if row_number is None or chat_id not in (None, self.default_chat_id):
+            return False
+        await self.repo.clear_row(row_number)
+        if self.index is not None:
+            self.index.remove(reminder_id)
+        return True
+
+    async def mark_sent(self, reminder_id: int, status: str = STATUS_SENT):
+        row_number = self.repo.row_of(reminder_id)
+        if row_number:
+            await self.repo.update_status(row_number, status)
+        self._reindex(reminder_id)
+
+    async def reschedule(self, reminder_id: int, due_at: float, due_text: str):
+        row_number = self.repo.row_of(reminder_id)
+        if row_number:
+            await self.repo.update_cell(row_number, 'G', due_text)
+        self._reindex(reminder_id)
+
+    async def compact_sheet(self) -> int:
+        return len(await self.repo.compact())
+
+    async def refresh_index(self):
+        # Таблицу правят и вручную: индекс перестраивается вместе с кэшем (по TTL)
+        if self.index is None:
+            return
+        if self.repo._is_stale() or self._indexed_at != self.repo._loaded_at:
+            self.index.load(await self.query_due())
+            self._indexed_at = self.repo._loaded_at
+
+    def _reindex(self, reminder_id: int):
+        if self.index is not None:
+            row = self._cached(reminder_id)
+            if row is None:
+                self.index.remove(reminder_id)
+            else:
+                self.index.upsert(reminder_id, self.parse_due(row[6]) if len(row) >= 7 else None, row)
+
+    async def query_due(self, until: Optional[float] = None) -> List[Reminder]:
+        until = float('inf') if until is None else until
+        due = []
+        for reminder_id, row in await self.list_all():
+            if len(row) >= 8 and row[7] == STATUS_SENT:
+                continue
+            due_at = self.parse_due(row[6]) if len(row) >= 7 else None
+            if due_at is not None and due_at <= until:
+                due.append(Reminder.from_row(reminder_id, row, due_at, self.default_chat_id))
+        due.sort(key=lambda reminder: reminder.due_at)
+        return due
+
+    async def close(self):
+        await self.repo.writer.close()
+
+
+# ========== СЖАТИЕ ТАБЛИЦЫ ==========
+class SheetsCompactor:
+    """
+    Периодически удаляет из таблицы пустые строки, оставшиеся
+    после удаления напоминаний, чтобы лист не рос бесконечно.
+    Если задана синхронизация (sync.SheetsSync), перед сжатием она
+    сверяет таблицу с базой: строки, стертые вручную, должны удалиться
+    локально до того, как исчезнут из таблицы.
+    """
+
+    def __init__(self, storage: ReminderStorage, repo: ReminderRepository, interval: float = 3600, sync=None):
+        self.storage = storage
+        self.repo = repo
+        self.interval = interval
+        self.sync = sync
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.compact_once()
+            except Exception as e:
+                print(f"⚠️ Ошибка сжатия Google Таблицы: {e}")
+
+    async def compact_once(self) -> int:
+        # Не пересекаемся с синхронизацией: она сравнивает строки по номерам
+        async with self.repo.maintenance_lock:
+            if self.sync is not None:
+                await self.sync.reconcile()
+            removed = await self.storage.compact_sheet()
+        if removed:
+            print(f"🧹 Удалено пустых строк из таблицы: {removed}")
+        return removed
@@ -0,0 +1,265 @@
+"""
+🔁 СИНХРОНИЗАЦИЯ SQLITE ⇄ GOOGLE SHEETS
+Фоновая задача, которая подхватывает ручные правки таблицы
+и дописывает в таблицу локальные изменения, не дошедшие через зеркало.
+
+Как находятся изменения:
+  • Сначала дешевая проверка времени изменения файла (Drive API).
+    Если таблицу никто не трогал — синхронизация ничего не читает.
+  • Иначе таблица читается одним запросом (Sheets API не умеет отдавать
+    только измененные строки), а строки сравниваются по хэшам с версией
+    последней синхронизации. База, планировщик и записи в таблицу
+    затрагивают только реально изменившиеся строки.
+
+Правила конфликтов:
+  • Текст, дата, время, повторение — побеждает таблица (правка человека).
+  • Статус отправки — "✅ Отправлено" побеждает всегда: бот не должен
+    отправлять напоминание повторно, а человек не должен "отменить" отправку.
+  • Строку стерли в таблице — напоминание удаляется локально.
+  • Строку удалили в боте, а в таблице ее с тех пор правили — она возвращается.
+"""
+
+import asyncio
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from storage import (
+    STATUS_SENT,
+    ReminderRepository,
+    SheetsMirror,
+    SQLiteReminderStorage,
+    normalize_row,
+    row_hash,
+    row_reminder_id,
+)
+
+# (ID напоминания, срок epoch или None, строка A-H)
+UpsertCallback = Callable[[int, Optional[float], List[str]], None]
+RemoveCallback = Callable[[int], None]
+
+
+def merge_rows(local_row: List[str], sheet_row: List[str]) -> List[str]:
+    """Объединяет версии строки: содержимое из таблицы, статус "отправлено" — от любой стороны"""
+    merged = normalize_row(sheet_row)
+    if normalize_row(local_row)[7] == STATUS_SENT:
+        merged[7] = STATUS_SENT
+    return merged
+
+
+class SheetsSync:
+    """Периодическая двусторонняя синхронизация локальной базы и таблицы"""
+
+    def __init__(
+        self,
+        storage: SQLiteReminderStorage,
+        repo: ReminderRepository,
+        mirror: SheetsMirror,
+        parse_due: Callable[[str], Optional[float]],
+        on_upsert: UpsertCallback,
+        on_remove: RemoveCallback,
+        interval: float = 60,
+    ):
+        self.storage = storage
+        self.repo = repo
+        self.mirror = mirror
+        self.parse_due = parse_due
+        self.on_upsert = on_upsert
+        self.on_remove = on_remove
+        self.interval = interval
+        self._last_modified: Optional[str] = None
+        self._drive_available = True
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- фоновая задача ----------
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync_once()
+            except Exception as e:
+                print(f"⚠️ Ошибка синхронизации с Google Sheets: {e}")
+
+    # ---------- один проход ----------
+    async def _sheet_modified(self) -> bool:
+        """Проверяет по Drive API, менялась ли таблица с прошлого прохода"""
+        if not self._drive_available:
+            return True
+        try:
+            modified = await self.repo.executor.run(self.repo.sheet.spreadsheet.get_lastUpdateTime)
+        except Exception as e:
+            # Нет доступа к Drive API — сравниваем хэши на каждом проходе
+            print(f"⚠️ Время изменения таблицы недоступно ({e}), проверяю строки каждый раз")
+            self._drive_available = False
+            return True
+
+        changed = modified != self._last_modified
+        self._last_modified = modified
+        return changed
+
+    async def sync_once(self) -> Dict[str, int]:
+        """Один проход синхронизации; возвращает счетчики изменений"""
+        stats = {'imported': 0, 'updated': 0, 'removed': 0, 'moved': 0, 'pushed': 0}
+
+        pending_local = bool(self.storage.unmirrored() or self.storage.tombstones())
+        if not pending_local and not await self._sheet_modified():
+            return stats
+
+        # Сжатие таблицы меняет номера строк — ждем его окончания
+        async with self.repo.maintenance_lock:
+            return await self.reconcile()
+
+    async def reconcile(self) -> Dict[str, int]:
+        """
+        Читает таблицу и сверяет ее с базой без проверки времени изменения.
+        Вызывается под repo.maintenance_lock (сжатие таблицы — перед удалением строк).
+        """
+        stats = {'imported': 0, 'updated': 0, 'removed': 0, 'moved': 0, 'pushed': 0}
+        await self.repo.refresh()
+        sheet_rows = await self.repo.get_all()
+        # Все записи, которые были в полете во время чтения, должны отметиться в базе
+        await self.mirror.drain()
+
+        self._reconcile(sheet_rows, stats)
+
+        if any(stats.values()):
+            print(
+                "🔁 Синхронизация с таблицей: "
+                f"новых {stats['imported']}, изменено {stats['updated']}, "
+                f"удалено {stats['removed']}, перемещено {stats['moved']}, "
+                f"отправлено в таблицу {stats['pushed']}"
+            )
+        return stats
+
+    def _reconcile(self, sheet_rows: List[List[str]], stats: Dict[str, int]):
+        # Здесь нет await: база читается и меняется без вмешательства обработчиков
+        local = self.storage.sheet_state()
+        by_row: Dict[int, Tuple[int, Optional[str], List[str]]] = {
+            sheet_row: (reminder_id, sheet_hash, row) for reminder_id, sheet_row, sheet_hash, row in local
+        }
+        local_by_id = {reminder_id: (sheet_row, sheet_hash, row) for reminder_id, sheet_row, sheet_hash, row in local}
+        tombstones = self.storage.tombstones()
+
+        hashes = {index: row_hash(row) for index, row in enumerate(sheet_rows, start=2)}
+        matched = set()
+        resolved = set()
+        new_ids = []
+
+        # 1. Строки на своих местах, не менявшиеся в таблице (и с тем же ID в колонке I)
+        for index, row in enumerate(sheet_rows, start=2):
+            current_hash = hashes[index]
+            entry = by_row.get(index)
+            if entry and current_hash and entry[1] == current_hash and row_reminder_id(row) in (None, entry[0]):
+                reminder_id, sheet_hash, local_row = entry
+                matched.add(reminder_id)
+                resolved.add(index)
+                # Возможно, изменилась локальная версия — отправляем ее в таблицу
+                if row_hash(local_row) != sheet_hash:
+                    self.mirror.pushed(reminder_id, index, local_row)
+                    stats['pushed'] += 1
+
+        # 2. Строки, переехавшие на другое место (выше удалили или вставили строки).
+        #    Сначала по ID в колонке I; по хэшу — только строки без ID и только
+        #    однозначно: одинаковые строки по содержимому не различить
+        local_hashes = Counter(sheet_hash for _, _, sheet_hash, _ in local if sheet_hash)
+        by_hash: Dict[str, int] = {
+            sheet_hash: reminder_id for reminder_id, _, sheet_hash, _ in local
+            if sheet_hash and local_hashes[sheet_hash] == 1
+        }
+        sheet_hashes = Counter(
+            hashes[index] for index, row in enumerate(sheet_rows, start=2)
+            if index not in resolved and hashes[index] and row_reminder_id(row) is None
+        )
+        for index, row in enumerate(sheet_rows, start=2):
+            current_hash = hashes[index]
+            if index in resolved or current_hash is None:
+                continue
+            moved_id = row_reminder_id(row)
+            if moved_id is None and sheet_hashes[current_hash] == 1:
+                moved_id = by_hash.get(current_hash)
+            if moved_id is None or moved_id not in local_by_id or moved_id in matched:
+                continue
+            old_row, sheet_hash, local_row = local_by_id[moved_id]
+            if old_row == index:
+                # Строка на своем месте, но ее правили — это шаг 3
+                continue
+            self.storage.move_sheet_row(moved_id, index)
+            stats['moved'] += 1
+            if by_row.get(old_row, (None,))[0] == moved_id:
+                del by_row[old_row]
+
+            if current_hash != sheet_hash:
+                # Строку и переместили, и правили — правку применит шаг 3
+                by_row[index] = (moved_id, sheet_hash, local_row)
+                continue
+            matched.add(moved_id)
+            resolved.add(index)
+            if row_hash(local_row) != sheet_hash:
+                self.mirror.pushed(moved_id, index, local_row)
+                stats['pushed'] += 1
+
+        for index, row in enumerate(sheet_rows, start=2):
+            current_hash = hashes[index]
+            if index in resolved or current_hash is None:
+                continue
+
+            # 3. Строку правили в таблице
+            entry = by_row.get(index)
+            if entry and entry[0] not in matched:
+                reminder_id, _, local_row = entry
+                matched.add(reminder_id)
+                merged = merge_rows(local_row, row)
+                due_at = self.parse_due(merged[6])
+                self.storage.apply_from_sheet(reminder_id, index, merged, due_at)
+                if merged != normalize_row(row):
+                    self.mirror.pushed(reminder_id, index, merged)
+                    stats['pushed'] += 1
+                self.on_upsert(reminder_id, due_at, merged)
+                stats['updated'] += 1
+                continue
+
+            # 4. Строка, удаленная в боте и не тронутая в таблице, — дочищаем
+            if index in tombstones and tombstones[index] == current_hash:
+                self.mirror.cleared(index)
+                stats['pushed'] += 1
+                continue
+
+            # 5. Новая строка, добавленная вручную
+            due_at = self.parse_due(row[6]) if len(row) >= 7 else None
+            reminder_id = self.storage.insert_from_sheet(index, row, due_at)
+            if index in tombstones:
+                self.storage.drop_tombstone(index)
+            new_ids.append((index, reminder_id))
+            self.on_upsert(reminder_id, due_at, normalize_row(row))
+            stats['imported'] += 1
+
+        # Постоянный ID новых строк — в колонку I
+        self.mirror.ids_assigned(new_ids)
+
+        # 6. Связанные строки, которых в таблице больше нет, — стерты вручную
+        for reminder_id in set(local_by_id) - matched:
+            self.storage.remove_local(reminder_id)
+            self.on_remove(reminder_id)
+            stats['removed'] += 1
+
+        # 7. Строки, которые так и не попали в таблицу через зеркало
+        for reminder_id, row in self.storage.unmirrored():
+            self.mirror.saved(reminder_id, row)
+            stats['pushed'] += 1
+
+        # Стертые в таблице строки больше не нужно дочищать
+        for sheet_row in tombstones:
+            if hashes.get(sheet_row) is None:
+                self.storage.drop_tombstone(sheet_row)
@@ -0,0 +1,12 @@
+"""
+🧪 Общие настройки тестов
+Модули бота лежат в корне репозитория, поддельные Telegram и таблица —
+в benchmarks/fakes.py. Запуск: python -m pytest -q
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
@@ -0,0 +1,197 @@
+"""
+🧪 Разбор даты и времени (dateparse) и быстрое добавление /add Текст Когда
+Корпус фраз с ожидаемым результатом и случайные сочетания слов:
+разбор не должен падать и обязан возвращать момент в нужном поясе.
+"""
+
+import asyncio
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+import bot
+from dateparse import DAY_WORDS, MONTHS_RU, WEEKDAYS_RU, parse_when, split_when
+
+FUZZ_CASES = 5_000
+TZ = pytz.timezone('Europe/Moscow')
+# Суббота, 17 октября 2026, 10:20:30
+NOW = TZ.localize(datetime(2026, 10, 17, 10, 20, 30))
+
+# Фраза -> ожидаемый момент ("ДД.ММ.ГГГГ ЧЧ:ММ") или None
+CORPUS = {
+    "25.12 14:30": "25.12.2026 14:30",
+    "25.12.2027 9:00": "25.12.2027 09:00",
+    "01.03": "01.03.2027 09:00",
+    "10.10 9:00": "10.10.2027 09:00",
+    "14:30": "17.10.2026 14:30",
+    "9:00": "18.10.2026 09:00",
+    "завтра в 9": "18.10.2026 09:00",
+    "Завтра, в 9 утра": "18.10.2026 09:00",
+    "в 9 утра завтра": "18.10.2026 09:00",
+    "послезавтра в 7 вечера": "19.10.2026 19:00",
+    "сегодня в полдень": "17.10.2026 12:00",
+    "в 3 дня": "17.10.2026 15:00",
+    "в 2 ночи": "18.10.2026 02:00",
+    "в пятницу 14:30": "23.10.2026 14:30",
+    "во вторник в 10": "20.10.2026 10:00",
+    "в среду": "21.10.2026 09:00",
+    "пн 9:15": "19.10.2026 09:15",
+    "в субботу в 11": "17.10.2026 11:00",
+    "в субботу в 9": "24.10.2026 09:00",
+    "25 декабря": "25.12.2026 09:00",
+    "1 января 2027 в 12:00": "01.01.2027 12:00",
+    "17 октября в 10:00": "17.10.2027 10:00",
+    "5 мая в 18 часов": "05.05.2027 18:00",
+    "через 2 часа": "17.10.2026 12:21",
+    "через полчаса": "17.10.2026 10:51",
+    "через час": "17.10.2026 11:21",
+    "через 15 минут": "17.10.2026 10:36",
+    "через 3 дня": "20.10.2026 10:21",
+    "через 3 дня в 10": "20.10.2026 10:00",
+    "через неделю": "24.10.2026 10:21",
+    "31.02 10:00": None,
+    "25.13": None,
+    "в 25:00": None,
+    "в 9 через 2 часа": None,
+    "завтра послезавтра": None,
+    "купить хлеб": None,
+    "": None,
+}
+
+# Сообщение -> (текст, момент) или None
+MESSAGES = {
+    "Совещание 25.12 14:30": ("Совещание", "25.12.2026 14:30"),
+    "Позвонить маме завтра в 9": ("Позвонить маме", "18.10.2026 09:00"),
+    "Купить 2 хлеба в пятницу": ("Купить 2 хлеба", "23.10.2026 09:00"),
+    "Встреча в офисе в 10:00": ("Встреча в офисе", "18.10.2026 10:00"),
+    "Оплатить счет 25 декабря": ("Оплатить счет", "25.12.2026 09:00"),
+    "завтра в 10 планерка": ("планерка", "18.10.2026 10:00"),
+    "через 2 часа выключить духовку": ("выключить духовку", "17.10.2026 12:21"),
+    "Отчет": None,
+    # Сообщение целиком — дата: текста нет
+    "завтра в 9": None,
+    "25.12 14:30": None,
+}
+
+FUZZ_WORDS = (
+    list(WEEKDAYS_RU) + list(MONTHS_RU) + list(DAY_WORDS)
+    + ["в", "во", "через", "час", "часа", "минут", "полчаса", "дня", "вечера", "утра",
+       "полдень", "9", "14:30", "25.12", "31.02", "99:99", "1.1.2027", "купить", ",", "года"]
+)
+
+
+def formatted(when) -> str:
+    return when.moment.strftime("%d.%m.%Y %H:%M")
+
+
+# ========== КОРПУС ==========
+@pytest.mark.parametrize('phrase, expected', CORPUS.items())
+def test_parse_when_corpus(phrase, expected):
+    when = parse_when(phrase, NOW)
+
+    assert (formatted(when) if when else None) == expected
+
+
+@pytest.mark.parametrize('message, expected', MESSAGES.items())
+def test_split_when_corpus(message, expected):
+    parsed = split_when(message, NOW)
+
+    assert ((parsed[0], formatted(parsed[1])) if parsed else None) == expected
+
+
+def test_time_only_uses_given_day():
+    when = parse_when("в 7 вечера", NOW, day=datetime(2026, 12, 25).date())
+
+    assert formatted(when) == "25.12.2026 19:00"
+    assert when.has_time
+
+
+def test_date_without_time_is_marked():
+    when = parse_when("в пятницу", NOW)
+
+    assert when.has_date and not when.has_time
+
+
+# ========== СЛУЧАЙНЫЕ ФРАЗЫ ==========
+def test_fuzz_random_phrases_do_not_crash():
+    rng = random.Random(3)
+    for _ in range(FUZZ_CASES):
+        phrase = " ".join(rng.choices(FUZZ_WORDS, k=rng.randint(1, 5)))
+        when = parse_when(phrase, NOW)
+        if when is not None:
+            assert when.moment.tzinfo is not None, phrase
+            assert when.moment.second == 0, phrase
+        parsed = split_when("Текст " + phrase, NOW)
+        if parsed is not None:
+            assert parsed[0], phrase
+
+
+def test_fuzz_canonical_dates_round_trip():
+    # Любая корректная дата и время в привычном виде разбирается обратно
+    rng = random.Random(4)
+    for _ in range(FUZZ_CASES):
+        moment = datetime.fromtimestamp(NOW.timestamp() + rng.randrange(60, 300 * 86400), TZ)
+        phrase = moment.strftime("%d.%m %H:%M")
+        when = parse_when(phrase, NOW)
+        assert when is not None and when.moment.strftime("%d.%m %H:%M") == phrase, phrase
+
+
+# ========== /add Текст Когда ==========
+class Message:
+    def __init__(self, text: str = ''):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def private_update(text: str = ''):
+    chat = SimpleNamespace(id=42, type='private')
+    return SimpleNamespace(message=Message(text), effective_chat=chat)
+
+
+def context(args, user_data):
+    application = SimpleNamespace(bot_data={})
+    return SimpleNamespace(args=args, user_data=user_data, application=application)
+
+
+def test_add_with_only_a_date_asks_for_text():
+    async def scenario():
+        user_data = {}
+        update = private_update()
+        state = await bot.add_command(update, context("завтра в 9".split(), user_data))
+        first = (state, update.message.replies[-1], dict(user_data))
+
+        answer = private_update("Позвонить маме")
+        state = await bot.handle_text(answer, context([], user_data))
+        return first, (state, answer.message.replies[-1], user_data)
+
+    (state, reply, saved), (next_state, confirmation, user_data) = asyncio.run(scenario())
+
+    # Дата — не текст напоминания: спрашиваем текст, а не "Когда?"
+    assert state == bot.WAITING_TEXT
+    assert 'text' not in saved
+    assert "Введите текст" in reply
+
+    assert next_state == bot.WAITING_REPEAT
+    assert user_data['text'] == "Позвонить маме"
+    assert "Позвонить маме" in confirmation
+    assert user_data['when'].strftime("%H:%M") == "09:00"
+
+
+def test_add_with_text_only_asks_when():
+    async def scenario():
+        user_data = {}
+        update = private_update()
+        state = await bot.add_command(update, context(["Отчет"], user_data))
+        return state, update.message.replies[-1], user_data
+
+    state, reply, user_data = asyncio.run(scenario())
+
+    assert state == bot.WAITING_DATE
+    assert user_data['text'] == "Отчет"
+    assert "Когда" in reply
@@ -0,0 +1,81 @@
+"""
+🧪 Очередь отправки: обработка отправленного сообщения не держит воркеров,
+время разбора пачки попадает в метрики
+"""
+
+import asyncio
+
+import metrics
+from delivery import DeliveryQueue
+
+
+def test_slow_on_done_does_not_block_sending():
+    async def scenario():
+        sent = []
+        finished = []
+
+        async def send(chat_id, text):
+            sent.append(text)
+
+        def on_done_for(text):
+            async def on_done(delivered: bool):
+                # Медленная запись в хранилище
+                await asyncio.sleep(0.5)
+                finished.append((text, delivered))
+            return on_done
+
+        queue = DeliveryQueue(send, global_rate=1000, private_rate=1000, concurrency=1)
+        queue.start()
+        for n in range(3):
+            queue.submit(42, f"напоминание {n}", on_done_for(n))
+        await asyncio.sleep(0.2)
+        sent_before_callbacks = list(sent)
+        await queue.stop()
+        return sent_before_callbacks, finished
+
+    sent, finished = asyncio.run(scenario())
+
+    # Единственный воркер отправил все, не дожидаясь on_done
+    assert sent == ["напоминание 0", "напоминание 1", "напоминание 2"]
+    # stop дожидается обработки отправленных сообщений
+    assert sorted(finished) == [(0, True), (1, True), (2, True)]
+
+
+def test_on_done_error_is_logged(capsys):
+    async def scenario():
+        async def send(chat_id, text):
+            pass
+
+        async def on_done(delivered: bool):
+            raise RuntimeError("база недоступна")
+
+        queue = DeliveryQueue(send, global_rate=1000, private_rate=1000, concurrency=1)
+        queue.start()
+        queue.submit(42, "напоминание", on_done)
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert "база недоступна" in capsys.readouterr().out
+
+
+def test_drain_time_is_exported():
+    async def scenario():
+        async def send(chat_id, text):
+            await asyncio.sleep(0.01)
+
+        queue = DeliveryQueue(send, global_rate=1000, group_rate_per_minute=60_000, concurrency=2)
+        queue.start()
+        for chat_id in (-1, -2, -3):
+            queue.submit(chat_id, "напоминание")
+        await queue.stop()
+        return queue.metrics()
+
+    observed = metrics.DELIVERY_DRAIN.count()
+    stats = asyncio.run(scenario())
+
+    assert stats['sent'] == 3 and stats['queue_depth'] == 0
+    assert stats['last_burst_size'] == 3
+    assert stats['last_drain_seconds'] > 0
+    assert metrics.DELIVERY_DRAIN.count() == observed + 1
+    assert 'bot_delivery_drain_seconds_count' in metrics.render()
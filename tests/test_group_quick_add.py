@@ -0,0 +1,137 @@
+"""
+🧪 Быстрое добавление в группе: "бот напоминание Текст Когда" и кнопка повторения
+Настоящее приложение (bot.build_application) с поддельным Telegram
+из benchmarks/fakes.py: обновления кладутся в очередь приложения.
+"""
+
+import asyncio
+import time
+
+import pytest
+from telegram import Update
+
+import bot
+from fakes import FakeTelegram
+
+TOKEN = '123456:GROUP'
+USER = {'id': 501, 'is_bot': False, 'first_name': 'Анна', 'username': 'anna'}
+OTHER_USER = {'id': 502, 'is_bot': False, 'first_name': 'Борис'}
+REPLY_TIMEOUT = 10
+
+
+class Chat:
+    """Группа, которую обслуживает бот, и генератор обновлений"""
+
+    def __init__(self, application, telegram: FakeTelegram):
+        self.application = application
+        self.telegram = telegram
+        self.chat = {'id': bot.GROUP_CHAT_ID, 'type': 'supergroup', 'title': 'Команда'}
+        self._update_id = 0
+
+    def _next(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    async def reply_to(self, update: dict):
+        reply = self.telegram.expect(self.chat['id'])
+        update['update_id'] = self._next()
+        await self.application.update_queue.put(Update.de_json(update, self.application.bot))
+        return await asyncio.wait_for(reply, REPLY_TIMEOUT)
+
+    async def say(self, text: str, user=USER):
+        message = {
+            'message_id': 1000 + self._update_id, 'date': int(time.time()),
+            'chat': self.chat, 'from': user, 'text': text,
+        }
+        return await self.reply_to({'message': message})
+
+    async def press(self, data: str, message_id: int, user=USER):
+        """Нажатие кнопки под сообщением бота message_id"""
+        message = {
+            'message_id': message_id, 'date': int(time.time()),
+            'chat': self.chat, 'from': {'id': 1, 'is_bot': True, 'first_name': 'Бот'},
+            'text': '📌 Выберите тип повторения:',
+        }
+        query = {'id': str(self._update_id), 'from': user, 'chat_instance': '1', 'data': data, 'message': message}
+        update = Update.de_json({'update_id': self._next(), 'callback_query': query}, self.application.bot)
+        await self.application.update_queue.put(update)
+
+
+@pytest.fixture
+def run_in_group(tmp_path, monkeypatch):
+    """Запускает сценарий scenario(chat) в группе с настоящим приложением бота"""
+    monkeypatch.setattr(bot, 'DATABASE_PATH', str(tmp_path / 'reminders.db'))
+    monkeypatch.setattr(bot, 'METRICS_PORT', 0)
+    monkeypatch.delenv('GOOGLE_CREDENTIALS_JSON', raising=False)
+
+    def run(scenario):
+        async def main():
+            telegram = FakeTelegram(TOKEN, global_rate=None, group_rate_per_minute=None)
+            await telegram.start()
+            application = bot.build_application(None, token=TOKEN, base_url=telegram.base_url, polling=False)
+            await application.initialize()
+            await application.post_init(application)
+            await application.start()
+            try:
+                return await scenario(Chat(application, telegram), application)
+            finally:
+                await application.stop()
+                await application.shutdown()
+                await application.post_shutdown(application)
+                await telegram.stop()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.mark.parametrize('command', ["бот напоминание", "бот добавить"])
+def test_repeat_button_saves_group_quick_add(run_in_group, command):
+    async def scenario(chat: Chat, application):
+        keyboard = await chat.say(f"{command} Созвон с командой завтра в 14:30")
+        confirmation = chat.telegram.expect(chat.chat['id'])
+        await chat.press('repeat_1', keyboard.message_id)
+        confirmation = await asyncio.wait_for(confirmation, REPLY_TIMEOUT)
+        reminders = await application.bot_data['storage'].list_all()
+        return keyboard, confirmation, reminders
+
+    keyboard, confirmation, reminders = run_in_group(scenario)
+
+    assert "Выберите тип повторения" in keyboard.text
+    assert confirmation.method == 'editMessageText'
+    assert confirmation.text.startswith("✅ Напоминание сохранено")
+    assert len(reminders) == 1
+    _, row = reminders[0]
+    assert row[0] == "Созвон с командой"
+    assert row[3] == "🔄 Каждый день"
+
+
+def test_repeat_button_of_someone_else_saves_nothing(run_in_group):
+    async def scenario(chat: Chat, application):
+        keyboard = await chat.say("бот напоминание Созвон завтра в 14:30")
+        await chat.press('repeat_0', keyboard.message_id, user=OTHER_USER)
+        # Ответ на нажатие без сохранения — подождем, пока обновление обработается
+        await asyncio.sleep(0.3)
+        return await application.bot_data['storage'].list_all(), application.user_data[USER['id']]
+
+    reminders, author_data = run_in_group(scenario)
+
+    assert reminders == []
+    assert 'quick_add' in author_data
+
+
+def test_someone_elses_button_does_not_save_own_stale_quick_add(run_in_group):
+    async def scenario(chat: Chat, application):
+        # У Бориса свое недобавленное напоминание, потом Анна добавляет свое
+        await chat.say("бот напоминание Старое Бориса завтра в 10:00", user=OTHER_USER)
+        keyboard = await chat.say("бот напоминание Созвон завтра в 14:30")
+        # Борис нажимает кнопку под сообщением для Анны
+        await chat.press('repeat_0', keyboard.message_id, user=OTHER_USER)
+        await asyncio.sleep(0.3)
+        return await application.bot_data['storage'].list_all(), application.user_data
+
+    reminders, user_data = run_in_group(scenario)
+
+    assert reminders == []
+    assert user_data[OTHER_USER['id']]['quick_add']['text'] == "Старое Бориса"
+    assert user_data[USER['id']]['quick_add']['text'] == "Созвон"
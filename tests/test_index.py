@@ -0,0 +1,183 @@
+"""
+🧪 Индексы ближайших напоминаний (ReminderIndex, PartitionedIndex)
+Поиск по началу слова и автору, диапазоны дат, страницы /list,
+разделы чатов и согласованность индекса с базой после изменений.
+"""
+
+import asyncio
+
+import pytest
+
+from models import Reminder
+from storage import PartitionedIndex, ReminderIndex, SQLiteReminderStorage
+
+GROUP = -1002146448322
+OTHER_GROUP = -1009
+
+
+def row(text: str, author: str = '@anna'):
+    return [text, '', '', "❌ Не повторять", author, '', '', '']
+
+
+def reminder(reminder_id: int, text: str, due_at: float, author: str = '@anna', chat_id: int = GROUP):
+    return Reminder.from_row(reminder_id, row(text, author), due_at, chat_id)
+
+
+def consistent(index: ReminderIndex) -> bool:
+    """Служебные структуры индекса совпадают друг с другом"""
+    return (
+        index._vocabulary == sorted(index._words)
+        and sorted(index._reminders) == sorted(reminder_id for _, reminder_id in index._keys)
+        and index._keys == sorted(index._keys)
+        and all(ids <= set(index._reminders) for ids in index._words.values())
+    )
+
+
+@pytest.fixture
+def index():
+    index = ReminderIndex()
+    index.load([
+        reminder(1, "Встреча с клиентом", 300, '@anna'),
+        reminder(2, "Встречи отдела по пятницам", 100, '@Boris'),
+        reminder(3, "Оплатить счёт за свет", 200, 'anna'),
+        reminder(4, "Позвонить клиенту", 400, '@boris'),
+    ])
+    return index
+
+
+def ids(keys):
+    return [reminder_id for _, reminder_id in keys]
+
+
+# ========== ПОИСК ==========
+@pytest.mark.parametrize('words, expected', [
+    ("встреч", [2, 1]),
+    ("Встреча", [1]),
+    ("клиент", [1, 4]),
+    ("встреч клиент", [1]),
+    ("счет", [3]),
+    ("СЧЁТ", [3]),
+    ("встречу", []),
+    ("клиент отдел", []),
+    ("", [2, 3, 1, 4]),
+])
+def test_prefix_search(index, words, expected):
+    assert ids(index.select(words=words)) == expected
+
+
+def test_author_search_ignores_case_and_at(index):
+    assert ids(index.select(author='anna')) == [3, 1]
+    assert ids(index.select(author='@BORIS')) == [2, 4]
+    assert ids(index.select(words="клиент", author='boris')) == [4]
+    assert index.select(author='@nobody') == []
+
+
+# ========== ДИАПАЗОНЫ ДАТ ==========
+def test_range_includes_start_and_excludes_end(index):
+    assert ids(index.select(start=200, end=400)) == [3, 1]
+    assert ids(index.select(start=201, end=401)) == [1, 4]
+    assert ids(index.select(start=300)) == [1, 4]
+    assert ids(index.select(end=200)) == [2]
+    assert index.select(start=250, end=250) == []
+
+
+def test_range_combines_with_search(index):
+    assert ids(index.select(words="встреч", start=150)) == [1]
+    assert ids(index.select(words="клиент", end=400)) == [1]
+
+
+# ========== СТРАНИЦЫ ==========
+def test_pages_are_clamped(index):
+    first, number, pages = index.page(0, 3)
+    assert [item.id for item in first] == [2, 3, 1]
+    assert (number, pages) == (0, 2)
+
+    last, number, _ = index.page(7, 3)
+    assert [item.id for item in last] == [4] and number == 1
+
+    _, number, _ = index.page(-2, 3)
+    assert number == 0
+
+
+def test_empty_index_has_one_empty_page():
+    index = ReminderIndex()
+    index.load([])
+
+    assert index.page(0, 5) == ([], 0, 1)
+
+
+def test_page_of_filtered_keys(index):
+    page, number, pages = index.page(0, 1, index.select(words="клиент"))
+
+    assert [item.id for item in page] == [1]
+    assert pages == 2
+
+
+# ========== РАЗДЕЛЫ ЧАТОВ ==========
+def test_partitions_are_isolated():
+    index = PartitionedIndex(default_chat_id=GROUP)
+    index.load([
+        reminder(1, "Созвон с командой", 100, chat_id=GROUP),
+        reminder(2, "Созвон с клиентом", 200, chat_id=OTHER_GROUP),
+        reminder(3, "Отчет", 300, chat_id=None),
+    ])
+
+    assert ids(index.for_chat(GROUP).select(words="созвон")) == [1]
+    assert ids(index.for_chat(OTHER_GROUP).select(words="созвон")) == [2]
+    # Без чата — раздел по умолчанию
+    assert ids(index.for_chat(None).select()) == [1, 3]
+    assert len(index.for_chat(42)) == 0
+    assert len(index) == 3
+
+    # Перенос в другой чат убирает напоминание из прежнего раздела
+    index.upsert(1, 150, row("Созвон с командой"), OTHER_GROUP)
+    assert ids(index.for_chat(GROUP).select(words="созвон")) == []
+    assert ids(index.for_chat(OTHER_GROUP).select(words="созвон")) == [1, 2]
+    assert index.get(1).chat_id == OTHER_GROUP
+
+
+# ========== СОГЛАСОВАННОСТЬ С БАЗОЙ ==========
+def test_index_follows_storage_changes(tmp_path):
+    async def scenario():
+        storage = SQLiteReminderStorage(str(tmp_path / 'reminders.db'), default_chat_id=GROUP)
+        first = await storage.save(row("Встреча с клиентом"), 100.0)
+        second = await storage.save(row("Встреча отдела"), 200.0)
+        storage.index = PartitionedIndex(GROUP)
+        storage.index.load(await storage.query_due())
+        third = await storage.save(row("Планерка"), 50.0, chat_id=OTHER_GROUP)
+
+        await storage.delete(first)
+        await storage.reschedule(second, 10.0, '')
+        await storage.mark_sent(third)
+        fourth = await storage.save(row("Встреча с клиентом"), 300.0)
+        # Текст изменили в таблице: старые слова больше не находятся
+        storage.apply_from_sheet(second, 3, row("Обед"), 20.0)
+
+        group = storage.index.for_chat(GROUP)
+        state = (
+            ids(group.select()), ids(group.select(words="встреч")), ids(group.select(words="обед")),
+            len(storage.index.for_chat(OTHER_GROUP)), consistent(group),
+        )
+        await storage.close()
+        return second, fourth, state
+
+    second, fourth, (listed, meetings, lunch, other, is_consistent) = asyncio.run(scenario())
+
+    assert listed == [second, fourth]
+    assert meetings == [fourth]
+    assert lunch == [second]
+    assert other == 0
+    assert is_consistent
+
+
+def test_remove_and_reinsert_keep_structures_consistent(index):
+    index.remove(2)
+    index.remove(2)
+    index.upsert(3, 50, row("Встреча перенесена"))
+    index.upsert(1, 60, row("Встреча"), None)
+    index.remove(4)
+
+    assert ids(index.select(words="встреч")) == [3, 1]
+    assert index.select(words="клиент") == []
+    assert index.select(words="отдел") == []
+    assert consistent(index)
@@ -0,0 +1,67 @@
+"""
+🧪 Досылка из outbox после перезапуска
+Сбой обработки одного сообщения не должен останавливать всю пачку.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import bot
+from delivery import DeliveryQueue
+from models import STATUS_SENT
+from scheduler import ReminderScheduler
+from storage import DeliveryOutbox, SQLiteReminderStorage
+
+CHAT = -100
+
+
+def test_failed_advance_leaves_only_its_entry_unacked(tmp_path, monkeypatch):
+    async def scenario():
+        storage = SQLiteReminderStorage(str(tmp_path / 'reminders.db'), default_chat_id=CHAT)
+        outbox = DeliveryOutbox(str(tmp_path / 'outbox.db'))
+        sent = []
+
+        async def send(chat_id, text):
+            sent.append(text)
+
+        delivery = DeliveryQueue(send, global_rate=1000, group_rate_per_minute=60_000)
+        delivery.start()
+        application = SimpleNamespace(bot_data={
+            'storage': storage, 'outbox': outbox, 'delivery': delivery,
+            'scheduler': ReminderScheduler(lambda reminder_id, payload: None),
+        })
+
+        due_at = time.time() - 3600
+        ids = []
+        for text in ("Первое", "Сбой", "Третье"):
+            row = [text, '', '', "❌ Не повторять", 'tester', '', '', '']
+            ids.append(await storage.save(row, due_at, chat_id=CHAT))
+        outbox.add_many([(reminder_id, due_at, False, CHAT, f"🔔 {reminder_id}") for reminder_id in ids])
+        failing = ids[1]
+
+        advance = bot.advance_reminder
+
+        async def flaky_advance(application, reminder, occurrence):
+            if reminder.id == failing:
+                raise RuntimeError("база недоступна")
+            return await advance(application, reminder, occurrence)
+
+        monkeypatch.setattr(bot, 'advance_reminder', flaky_advance)
+        await asyncio.wait_for(bot.deliver_missed(application, outbox.pending()), 5)
+        await delivery.stop()
+
+        pending = [entry.reminder_id for entry in outbox.pending()]
+        statuses = {reminder_id: (await storage.get(reminder_id))[7] for reminder_id in ids}
+        outbox.close()
+        await storage.close()
+        return ids, sent, pending, statuses
+
+    ids, sent, pending, statuses = asyncio.run(scenario())
+
+    assert len(sent) == 3
+    # Неудачная запись останется до следующего запуска, остальные подтверждены
+    assert pending == [ids[1]]
+    assert statuses[ids[0]] == STATUS_SENT
+    assert statuses[ids[2]] == STATUS_SENT
+    assert statuses[ids[1]] != STATUS_SENT
@@ -0,0 +1,107 @@
+"""
+🧪 Состояние диалогов в SQLite (SQLitePersistence)
+Изменения интервала пишутся одной транзакцией, диалоги переживают
+перезапуск, брошенные дольше max_age — не восстанавливаются.
+"""
+
+import asyncio
+import sqlite3
+import time
+
+from persistence import SQLitePersistence
+
+CONVERSATION = 'add_reminder'
+# Ключ ConversationHandler с per_chat и per_user: (чат, пользователь)
+GROUP_KEY = (-1002146448322, 501)
+PRIVATE_KEY = (502, 502)
+
+
+def test_changes_within_interval_are_one_transaction(tmp_path):
+    async def scenario():
+        persistence = SQLitePersistence(str(tmp_path / 'state.db'), flush_delay=0.05)
+        await persistence.update_conversation(CONVERSATION, GROUP_KEY, 1)
+        await persistence.update_user_data(501, {'text': "Созвон"})
+        await persistence.update_user_data(502, {'text': "Отчет"})
+        await persistence.update_user_data(501, {'text': "Созвон", 'date': '18.10'})
+        await persistence.update_conversation(CONVERSATION, GROUP_KEY, 2)
+        before = persistence.transactions
+        await asyncio.sleep(0.15)
+        after = persistence.transactions
+        persistence.close()
+        return before, after
+
+    assert asyncio.run(scenario()) == (0, 1)
+
+
+def test_unchanged_data_is_not_written(tmp_path):
+    async def scenario():
+        persistence = SQLitePersistence(str(tmp_path / 'state.db'), flush_delay=0.01)
+        await persistence.get_user_data()
+        await persistence.update_user_data(501, {'text': "Созвон"})
+        await persistence.flush()
+        await persistence.update_user_data(501, {'text': "Созвон"})
+        await asyncio.sleep(0.05)
+        persistence.close()
+        return persistence.transactions
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_dialogs_survive_reopening(tmp_path):
+    path = str(tmp_path / 'state.db')
+
+    async def before_restart():
+        persistence = SQLitePersistence(path)
+        await persistence.update_conversation(CONVERSATION, GROUP_KEY, 2)
+        await persistence.update_conversation(CONVERSATION, PRIVATE_KEY, 1)
+        await persistence.update_user_data(501, {'text': "Созвон", 'quick_add': {'text': "Созвон"}})
+        await persistence.update_user_data(502, {'text': "Отчет"})
+        # Второй диалог закончился, данные пользователя очищены
+        await persistence.update_conversation(CONVERSATION, PRIVATE_KEY, None)
+        await persistence.drop_user_data(502)
+        await persistence.flush()
+        persistence.close()
+
+    async def after_restart():
+        persistence = SQLitePersistence(path)
+        state = await persistence.get_conversations(CONVERSATION), await persistence.get_user_data()
+        persistence.close()
+        return state
+
+    asyncio.run(before_restart())
+    conversations, user_data = asyncio.run(after_restart())
+
+    assert conversations == {GROUP_KEY: 2}
+    assert user_data == {501: {'text': "Созвон", 'quick_add': {'text': "Созвон"}}}
+
+
+def test_stale_entries_are_pruned_on_open(tmp_path):
+    path = str(tmp_path / 'state.db')
+
+    async def write():
+        persistence = SQLitePersistence(path, max_age=3600)
+        await persistence.update_conversation(CONVERSATION, GROUP_KEY, 2)
+        await persistence.update_conversation(CONVERSATION, PRIVATE_KEY, 1)
+        await persistence.update_user_data(501, {'text': "Созвон"})
+        await persistence.update_user_data(502, {'text': "Отчет"})
+        await persistence.flush()
+        persistence.close()
+
+    async def reopen():
+        persistence = SQLitePersistence(path, max_age=3600)
+        state = await persistence.get_conversations(CONVERSATION), await persistence.get_user_data()
+        persistence.close()
+        return state
+
+    asyncio.run(write())
+    # Диалог в группе брошен два часа назад
+    stale = time.time() - 2 * 3600
+    db = sqlite3.connect(path)
+    db.execute("UPDATE conversations SET updated_at = ? WHERE key = ?", (stale, '[-1002146448322, 501]'))
+    db.execute("UPDATE user_data SET updated_at = ? WHERE user_id = 501", (stale,))
+    db.commit()
+    db.close()
+    conversations, user_data = asyncio.run(reopen())
+
+    assert conversations == {PRIVATE_KEY: 1}
+    assert user_data == {502: {'text': "Отчет"}}
@@ -0,0 +1,144 @@
+"""
+🧪 Параллельная обработка обновлений (ChatOrderedProcessor)
+Обработчик ждет "ворота" — так видно, какие обновления уже начались,
+пока другие еще не закончились.
+"""
+
+import asyncio
+
+import pytest
+from telegram import Update
+
+from processing import ChatOrderedProcessor
+
+GROUP = -1002146448322
+OTHER_GROUP = -1009
+
+
+def message(chat_id: int, number: int) -> Update:
+    data = {
+        'update_id': number,
+        'message': {
+            'message_id': number, 'date': 1760000000, 'text': f"сообщение {number}",
+            'chat': {'id': chat_id, 'type': 'supergroup'},
+            'from': {'id': 501, 'is_bot': False, 'first_name': 'Анна'},
+        },
+    }
+    return Update.de_json(data, None)
+
+
+class GatedHandler:
+    """Обработчик, который заканчивается только после open(чат, номер)"""
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.running = 0
+        self.most_running = 0
+        self._gates = {}
+
+    async def handle(self, chat_id: int, number: int):
+        self.started.append((chat_id, number))
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await self._gates.setdefault((chat_id, number), asyncio.Event()).wait()
+        finally:
+            self.running -= 1
+        self.finished.append((chat_id, number))
+
+    def open(self, chat_id: int, number: int):
+        self._gates.setdefault((chat_id, number), asyncio.Event()).set()
+
+
+async def settle():
+    """Дает всем готовым задачам дойти до своих ворот"""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def submit(processor: ChatOrderedProcessor, handler: GatedHandler, chat_id: int, number: int) -> asyncio.Task:
+    update = message(chat_id, number)
+    return asyncio.create_task(processor.process_update(update, handler.handle(chat_id, number)))
+
+
+def test_one_chat_in_order_other_chats_concurrently():
+    async def scenario():
+        processor, handler = ChatOrderedProcessor(max_concurrent=8), GatedHandler()
+        tasks = [submit(processor, handler, GROUP, number) for number in (1, 2, 3)]
+        tasks.append(submit(processor, handler, OTHER_GROUP, 4))
+        await settle()
+        # Первое обновление группы и обновление другой группы идут одновременно
+        snapshots = [list(handler.started)]
+
+        handler.open(OTHER_GROUP, 4)
+        handler.open(GROUP, 3)      # третье готово раньше второго, но ждет свою очередь
+        await settle()
+        snapshots.append(list(handler.started))
+
+        handler.open(GROUP, 1)
+        await settle()
+        snapshots.append(list(handler.started))
+
+        handler.open(GROUP, 2)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return snapshots, handler, processor
+
+    snapshots, handler, processor = asyncio.run(scenario())
+
+    assert snapshots[0] == [(GROUP, 1), (OTHER_GROUP, 4)]
+    assert snapshots[1] == [(GROUP, 1), (OTHER_GROUP, 4)]
+    assert snapshots[2] == [(GROUP, 1), (OTHER_GROUP, 4), (GROUP, 2)]
+    assert [number for chat, number in handler.finished if chat == GROUP] == [1, 2, 3]
+    assert processor.metrics() == {
+        'updates_in_flight': 0, 'updates_waiting': 0, 'chats_busy': 0, 'updates_processed': 4,
+    }
+
+
+def test_in_flight_limit_is_respected():
+    async def scenario():
+        processor, handler = ChatOrderedProcessor(max_concurrent=2), GatedHandler()
+        chats = [-100 - number for number in range(5)]
+        tasks = [submit(processor, handler, chat_id, number) for number, chat_id in enumerate(chats)]
+        await settle()
+        first = len(handler.started), processor.metrics()
+
+        handler.open(chats[1], 1)
+        await settle()
+        second = list(handler.started)
+
+        for number, chat_id in enumerate(chats):
+            handler.open(chat_id, number)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return chats, first, second, handler
+
+    chats, (started, stats), second, handler = asyncio.run(scenario())
+
+    assert started == 2
+    assert stats['updates_in_flight'] == 2 and stats['updates_waiting'] == 3
+    # Освободилось место — следующий чат в порядке поступления
+    assert second == [(chats[0], 0), (chats[1], 1), (chats[2], 2)]
+    assert handler.most_running == 2
+    assert len(handler.finished) == 5
+
+
+def test_slow_chat_does_not_hold_the_limit_for_others():
+    async def scenario():
+        processor, handler = ChatOrderedProcessor(max_concurrent=2), GatedHandler()
+        # Пять обновлений одной группы ждут своей очереди, не занимая места
+        tasks = [submit(processor, handler, GROUP, number) for number in range(5)]
+        tasks.append(submit(processor, handler, OTHER_GROUP, 9))
+        await settle()
+        started = list(handler.started)
+        for number in range(5):
+            handler.open(GROUP, number)
+        handler.open(OTHER_GROUP, 9)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return started
+
+    assert asyncio.run(scenario()) == [(GROUP, 0), (OTHER_GROUP, 9)]
+
+
+def test_limit_must_be_positive():
+    with pytest.raises(ValueError):
+        ChatOrderedProcessor(max_concurrent=0)
@@ -0,0 +1,238 @@
+"""
+🧪 Правила повторения: переходы на летнее/зимнее время и границы года
+Время срабатывания считается по часам пояса напоминания, поэтому
+ожидаемые значения — местное время и смещение от UTC после перехода.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from recurrence import DailyRule, Occurrence, PreAlertRule, WeekdayRule, YearlyRule
+
+BERLIN = pytz.timezone('Europe/Berlin')
+NEW_YORK = pytz.timezone('America/New_York')
+
+# Переходы 2024 года: (пояс, день перевода вперед, день перевода назад)
+TRANSITIONS = [
+    (BERLIN, datetime(2024, 3, 31), datetime(2024, 10, 27)),
+    (NEW_YORK, datetime(2024, 3, 10), datetime(2024, 11, 3)),
+]
+
+
+def local(tz, *args) -> datetime:
+    return tz.localize(datetime(*args))
+
+
+def at(tz, day: datetime, hour: int, minute: int = 0, days: int = 0) -> datetime:
+    """Время по часам пояса tz через days дней от day"""
+    day = day + timedelta(days=days)
+    return local(tz, day.year, day.month, day.day, hour, minute)
+
+
+def wall(moment: datetime, tz) -> datetime:
+    """Местное время без пояса — для сравнения с ожидаемым"""
+    return moment.astimezone(tz).replace(tzinfo=None)
+
+
+def offset_hours(moment: datetime) -> float:
+    return moment.utcoffset().total_seconds() / 3600
+
+
+def standard_and_summer(tz):
+    """Смещения зимнего и летнего времени пояса, часы"""
+    return offset_hours(local(tz, 2024, 1, 15, 12)), offset_hours(local(tz, 2024, 7, 15, 12))
+
+
+# ========== КАЖДЫЙ ДЕНЬ ==========
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_daily_keeps_wall_clock_across_spring_forward(tz, spring, autumn):
+    winter, summer = standard_and_summer(tz)
+    anchor = at(tz, spring, 9, days=-1)
+
+    fired = DailyRule().next_after(anchor, anchor)
+
+    assert wall(fired, tz) == spring.replace(hour=9)
+    assert offset_hours(fired) == summer
+    assert fired - anchor == timedelta(hours=23)
+    assert offset_hours(at(tz, spring, 9, days=-1)) == winter
+
+
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_daily_keeps_wall_clock_across_fall_back(tz, spring, autumn):
+    winter, summer = standard_and_summer(tz)
+    anchor = at(tz, autumn, 9, days=-1)
+
+    fired = DailyRule().next_after(anchor, anchor)
+
+    assert wall(fired, tz) == autumn.replace(hour=9)
+    assert offset_hours(anchor) == summer
+    assert offset_hours(fired) == winter
+    assert fired - anchor == timedelta(hours=25)
+
+
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_daily_in_skipped_hour_moves_forward_then_returns(tz, spring, autumn):
+    # 02:30 в день перевода вперед не существует — срабатывает в 03:30
+    anchor = at(tz, spring, 2, 30, days=-1)
+    rule = DailyRule()
+
+    fired = rule.next_after(anchor, anchor)
+    following = rule.next_after(anchor, fired)
+
+    assert wall(fired, tz) == spring.replace(hour=3, minute=30)
+    assert wall(following, tz) == (spring + timedelta(days=1)).replace(hour=2, minute=30)
+
+
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_daily_in_repeated_hour_fires_once(tz, spring, autumn):
+    # 01:30 (Нью-Йорк) и 02:30 (Берлин) в день перевода назад бывают дважды
+    hour = 1 if tz is NEW_YORK else 2
+    winter, _ = standard_and_summer(tz)
+    anchor = at(tz, autumn, hour, 30, days=-1)
+    rule = DailyRule()
+
+    fired = rule.next_after(anchor, anchor)
+    following = rule.next_after(anchor, fired)
+
+    assert wall(fired, tz) == autumn.replace(hour=hour, minute=30)
+    assert offset_hours(fired) == winter
+    assert following - fired == timedelta(days=1)
+
+
+# ========== ПО ДНЯМ НЕДЕЛИ ==========
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_weekly_keeps_wall_clock_across_both_transitions(tz, spring, autumn):
+    # Оба перехода 2024 года — в воскресенье
+    winter, summer = standard_and_summer(tz)
+    rule = WeekdayRule()
+
+    before_spring = at(tz, spring, 9, days=-7)
+    fired = rule.next_after(before_spring, before_spring)
+    assert wall(fired, tz) == spring.replace(hour=9)
+    assert offset_hours(fired) == summer
+
+    before_autumn = at(tz, autumn, 9, days=-7)
+    fired = rule.next_after(before_autumn, before_autumn)
+    assert wall(fired, tz) == autumn.replace(hour=9)
+    assert offset_hours(fired) == winter
+
+
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_named_weekday_across_transition(tz, spring, autumn):
+    # "Воскресенье" на 10:00, сохраненное в среду перед переводом вперед
+    _, summer = standard_and_summer(tz)
+    rule = WeekdayRule(6)
+    saved = at(tz, spring, 10, days=-4)
+
+    anchor = rule.align(saved)
+    following = rule.next_after(anchor, anchor)
+
+    assert wall(anchor, tz) == spring.replace(hour=10)
+    assert offset_hours(anchor) == summer
+    assert wall(following, tz) == (spring + timedelta(days=7)).replace(hour=10)
+
+
+# ========== КАЖДЫЙ ГОД ==========
+def test_yearly_feb_29_falls_back_to_feb_28():
+    rule = YearlyRule()
+    anchor = local(BERLIN, 2024, 2, 29, 10, 0)
+
+    fires = [anchor]
+    for _ in range(4):
+        fires.append(rule.next_after(anchor, fires[-1]))
+
+    assert [wall(fired, BERLIN) for fired in fires] == [
+        datetime(2024, 2, 29, 10, 0),
+        datetime(2025, 2, 28, 10, 0),
+        datetime(2026, 2, 28, 10, 0),
+        datetime(2027, 2, 28, 10, 0),
+        datetime(2028, 2, 29, 10, 0),
+    ]
+
+
+def test_yearly_feb_28_is_not_fired_twice_in_non_leap_year():
+    rule = YearlyRule()
+    anchor = local(NEW_YORK, 2024, 2, 29, 10, 0)
+    after = local(NEW_YORK, 2025, 2, 28, 12, 0)
+
+    fired = rule.next_after(anchor, after)
+
+    assert wall(fired, NEW_YORK) == datetime(2026, 2, 28, 10, 0)
+
+
+# ========== ПЕРЕХОД ЧЕРЕЗ НОВЫЙ ГОД ==========
+@pytest.mark.parametrize('rule, expected', [
+    (DailyRule(), datetime(2025, 1, 1, 23, 30)),
+    (WeekdayRule(), datetime(2025, 1, 7, 23, 30)),
+    (WeekdayRule(2), datetime(2025, 1, 1, 23, 30)),
+    (YearlyRule(), datetime(2025, 12, 31, 23, 30)),
+])
+def test_dec_31_rolls_over_to_next_year(rule, expected):
+    anchor = local(BERLIN, 2024, 12, 31, 23, 30)
+
+    fired = rule.next_after(anchor, anchor)
+
+    assert wall(fired, BERLIN) == expected
+
+
+def test_daily_missed_on_dec_31_fires_on_jan_1():
+    anchor = local(NEW_YORK, 2024, 12, 20, 9, 0)
+    now = local(NEW_YORK, 2024, 12, 31, 12, 0)
+
+    fired = DailyRule().fire_after(anchor, Occurrence(anchor), now)
+
+    assert wall(fired.when, NEW_YORK) == datetime(2025, 1, 1, 9, 0)
+    assert not fired.is_pre_alert
+
+
+# ========== ПРЕДВАРИТЕЛЬНЫЕ НАПОМИНАНИЯ ==========
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+@pytest.mark.parametrize('days', [1, 3, 7])
+def test_pre_alert_window_crossing_spring_forward(tz, spring, autumn, days):
+    winter, summer = standard_and_summer(tz)
+    rule = PreAlertRule(days)
+    anchor = at(tz, spring, 9)
+    now = at(tz, spring, 0, days=-days - 1)
+
+    first = rule.first_fire(anchor, now)
+
+    assert first.is_pre_alert
+    assert wall(first.when, tz) == (spring - timedelta(days=days)).replace(hour=9)
+    assert offset_hours(first.when) == winter
+    assert offset_hours(anchor) == summer
+    assert rule.fire_after(anchor, first, now) == Occurrence(anchor)
+    assert rule.fire_after(anchor, Occurrence(anchor), anchor) is None
+
+
+@pytest.mark.parametrize('tz, spring, autumn', TRANSITIONS)
+def test_pre_alert_window_crossing_fall_back(tz, spring, autumn):
+    winter, summer = standard_and_summer(tz)
+    rule = PreAlertRule(7)
+    anchor = at(tz, autumn, 9, days=2)
+    now = local(tz, 2024, 10, 1, 0, 0)
+
+    first = rule.first_fire(anchor, now)
+
+    assert first.is_pre_alert
+    assert wall(first.when, tz) == (autumn - timedelta(days=5)).replace(hour=9)
+    assert offset_hours(first.when) == summer
+    assert offset_hours(anchor) == winter
+
+
+def test_pre_alert_landing_in_skipped_hour_moves_forward():
+    rule = PreAlertRule(1)
+    anchor = local(BERLIN, 2024, 4, 1, 2, 30)
+
+    pre_alert = rule.pre_alert_time(anchor)
+
+    assert wall(pre_alert, BERLIN) == datetime(2024, 3, 31, 3, 30)
+
+
+def test_pre_alert_already_passed_fires_main_occurrence():
+    rule = PreAlertRule(3)
+    anchor = local(BERLIN, 2024, 3, 31, 9, 0)
+    now = local(BERLIN, 2024, 3, 30, 9, 0)
+
+    assert rule.first_fire(anchor, now) == Occurrence(anchor)
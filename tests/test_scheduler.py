@@ -0,0 +1,120 @@
+"""
+🧪 Планировщики: колесо таймеров против мин-кучи
+Оба планировщика проходят одну и ту же временную линию (вставки,
+переносы, отмены, шаги часов от секунд до суток) и должны выдавать
+одни и те же напоминания в одни и те же моменты.
+"""
+
+import random
+import time
+from datetime import datetime
+
+import pytz
+
+from scheduler import ReminderScheduler, TimerWheelScheduler
+
+DAY = 86400
+
+
+async def _never(key, payload):
+    pass
+
+
+def at(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, pytz.utc)
+
+
+def fire(scheduler, now: float) -> list:
+    """То же, что цикл планировщика: забирает сработавшие и снимает их с учета"""
+    fired = []
+    for entry in scheduler.pop_due(now):
+        key = entry[2]
+        if scheduler._entries.get(key) is entry:
+            del scheduler._entries[key]
+            fired.append(key)
+    return sorted(fired)
+
+
+def test_wheel_agrees_with_heap_on_random_timeline():
+    rng = random.Random(8)
+    # Колесо отсчитывает минуты от настоящего времени — линия начинается сейчас
+    now = time.time()
+    heap, wheel = ReminderScheduler(_never), TimerWheelScheduler(_never)
+    fired_total = 0
+
+    for step in range(3_000):
+        for _ in range(rng.randint(0, 5)):
+            key = rng.randrange(400)
+            action = rng.random()
+            if action < 0.15:
+                assert heap.cancel(key) == wheel.cancel(key)
+            else:
+                # От уже наступившего до трех суток вперед, с секундами
+                due = at(now + rng.uniform(-120, 3 * DAY))
+                heap.schedule(key, due, step)
+                wheel.schedule(key, due, step)
+        now += rng.choice((1, 15, 59, 60, 61, 600, 3599, 3600, 7200, 6 * 3600, DAY))
+
+        heap_fired, wheel_fired = fire(heap, now), fire(wheel, now)
+        assert wheel_fired == heap_fired, step
+        assert len(wheel) == len(heap)
+        fired_total += len(heap_fired)
+
+    # Линия действительно что-то выдает, а не сравнивает пустоту
+    assert fired_total > 1_000
+
+
+def test_day_and_hour_slots_cascade_to_minutes():
+    wheel = TimerWheelScheduler(_never)
+    start = wheel._current * 60
+    # Послезавтра в 05:42:30 по UTC: сначала в суточной корзине
+    day = (wheel._current // 1440 + 2) * DAY
+    due = day + 5 * 3600 + 42 * 60 + 30
+    wheel.schedule('отчет', at(due))
+    assert due // DAY in wheel._days
+
+    # Наступили те сутки: элемент переехал в часовой слот
+    assert fire(wheel, day) == []
+    assert 'отчет' in [entry[2] for entry in wheel._hours[5]]
+
+    # Наступил час: элемент в минутном слоте
+    assert fire(wheel, day + 5 * 3600) == []
+    assert 'отчет' in [entry[2] for entry in wheel._minutes[42]]
+
+    # Внутри своей минуты — не раньше срока
+    assert fire(wheel, due - 1) == []
+    assert fire(wheel, due) == ['отчет']
+    assert len(wheel) == 0 and due > start
+
+
+def test_cancel_and_reschedule():
+    for scheduler in (ReminderScheduler(_never), TimerWheelScheduler(_never)):
+        now = float(int(time.time()))
+        scheduler.schedule(1, at(now + 90))
+        scheduler.schedule(2, at(now + 2 * 3600))
+        scheduler.schedule(3, at(now + 3 * DAY))
+        assert scheduler.cancel(2)
+        assert not scheduler.cancel(2)
+        # Перенос вперед: старое время не срабатывает
+        scheduler.schedule(1, at(now + 5 * 3600))
+
+        assert fire(scheduler, now + 4 * 3600) == []
+        assert fire(scheduler, now + 5 * 3600) == [1]
+        assert fire(scheduler, now + 4 * DAY) == [3]
+        assert len(scheduler) == 0
+
+
+def test_idle_wheel_is_rewound_before_insert():
+    wheel = TimerWheelScheduler(_never)
+    # Колесо простаивало десять суток: последняя обработанная минута далеко в прошлом
+    wheel._current -= 10 * 1440
+    advanced = []
+    advance = wheel._advance
+    wheel._advance = lambda: (advanced.append(1), advance())
+
+    now = float(int(time.time()))
+    wheel.schedule('созвон', at(now + 120))
+
+    assert wheel.seconds_until_next(now) <= 60
+    assert fire(wheel, now + 120) == ['созвон']
+    assert len(advanced) <= 3
@@ -0,0 +1,245 @@
+"""
+🧪 Устойчивый доступ к Google Sheets: повторы, предохранитель, переподключение
+Таблица — FakeWorksheet из benchmarks/fakes.py (задержка, 503, 401).
+"""
+
+import asyncio
+import time
+
+import pytest
+from gspread.exceptions import APIError
+
+from fakes import FakeWorksheet, _api_error
+from sheets_client import CircuitBreaker, SheetsUnavailable, is_transient, retry_after
+from storage import SheetsExecutor
+
+ROW = ['Строка', '01.01', '09:00', '', '', '', '', '']
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+# ========== ПРЕДОХРАНИТЕЛЬ ==========
+def test_breaker_opens_after_threshold_and_closes_after_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Пробный запрос — только один
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0 and breaker.opened == 1
+
+
+def test_breaker_failed_probe_opens_again():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.opened == 1
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_stops_requests_to_sheet():
+    async def scenario():
+        sheet = FakeWorksheet()
+        sheet.outage(60)
+        executor = SheetsExecutor(retries=5, backoff=0.001, breaker=CircuitBreaker(failure_threshold=3))
+        with pytest.raises(SheetsUnavailable):
+            await executor.run(sheet.get_all_values)
+        requests = sheet.requests
+        with pytest.raises(SheetsUnavailable):
+            await executor.run(sheet.get_all_values)
+        executor.shutdown()
+        return requests, sheet.requests
+
+    first, second = run(scenario())
+
+    assert first == 3
+    assert second == first
+
+
+# ========== ЧТО ПОВТОРЯТЬ ==========
+@pytest.mark.parametrize('error, idempotent, expected', [
+    (_api_error(503, 'UNAVAILABLE', ''), False, True),
+    (_api_error(429, 'RESOURCE_EXHAUSTED', ''), False, True),
+    (SheetsUnavailable(1), False, True),
+    (asyncio.TimeoutError(), True, True),
+    # После таймаута строка могла уже добавиться
+    (asyncio.TimeoutError(), False, False),
+    (_api_error(400, 'INVALID_ARGUMENT', ''), True, False),
+    (_api_error(403, 'PERMISSION_DENIED', ''), True, False),
+])
+def test_is_transient(error, idempotent, expected):
+    assert is_transient(error, idempotent) is expected
+
+
+def test_append_is_not_retried_after_timeout():
+    async def scenario():
+        sheet = FakeWorksheet(latency=0.2)
+        executor = SheetsExecutor(timeout=0.05, retries=3, backoff=0.001)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(sheet.append_rows, [ROW], idempotent=False)
+        # Запрос в потоке доработает сам — ждем, чтобы посчитать строки
+        await asyncio.sleep(0.3)
+        executor.shutdown()
+        return sheet
+
+    sheet = run(scenario())
+
+    assert sheet.calls['append_rows'] == 1
+    assert len(sheet.rows) == 2
+
+
+def test_read_is_retried_after_timeout():
+    async def scenario():
+        sheet = FakeWorksheet(latency=0.2)
+        executor = SheetsExecutor(timeout=0.05, retries=2, backoff=0.001)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(sheet.get_all_values)
+        executor.shutdown()
+        return sheet
+
+    assert run(scenario()).calls['get_all_values'] == 3
+
+
+def test_append_is_retried_after_503():
+    async def scenario():
+        sheet = FakeWorksheet()
+        sheet.outage(0.05)
+        executor = SheetsExecutor(retries=10, backoff=0.02, max_delay=0.05,
+                                  breaker=CircuitBreaker(failure_threshold=100))
+        await executor.run(sheet.append_rows, [ROW], idempotent=False)
+        executor.shutdown()
+        return sheet
+
+    sheet = run(scenario())
+
+    assert sheet.failures >= 1
+    assert len(sheet.rows) == 2
+
+
+# ========== RETRY-AFTER ==========
+def test_retry_after_header():
+    assert retry_after(_api_error(429, 'RESOURCE_EXHAUSTED', '', retry_after=2.5)) == 2.5
+    assert retry_after(_api_error(429, 'RESOURCE_EXHAUSTED', '')) is None
+    assert retry_after(asyncio.TimeoutError()) is None
+
+
+class QuotaOnce:
+    """Первый вызов — 429 с Retry-After, дальше — успех"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self):
+        self.calls.append(time.perf_counter())
+        if len(self.calls) == 1:
+            raise _api_error(429, 'RESOURCE_EXHAUSTED', 'Quota exceeded', retry_after=self.seconds)
+        return 'ok'
+
+
+def test_retry_after_is_lower_bound_of_delay():
+    async def scenario():
+        call = QuotaOnce(0.3)
+        executor = SheetsExecutor(retries=3, backoff=0.001, max_delay=5)
+        result = await executor.run(call)
+        executor.shutdown()
+        return result, call.calls
+
+    result, calls = run(scenario())
+
+    assert result == 'ok'
+    # asyncio.sleep может проснуться на долю миллисекунды раньше
+    assert calls[1] - calls[0] >= 0.29
+
+
+def test_retry_after_longer_than_max_delay_is_not_waited():
+    async def scenario():
+        call = QuotaOnce(60)
+        executor = SheetsExecutor(retries=3, backoff=0.001, max_delay=1)
+        started = time.perf_counter()
+        with pytest.raises(APIError):
+            await executor.run(call)
+        executor.shutdown()
+        return time.perf_counter() - started, call.calls
+
+    elapsed, calls = run(scenario())
+
+    assert len(calls) == 1
+    assert elapsed < 1
+
+
+# ========== ПЕРЕПОДКЛЮЧЕНИЕ ==========
+def test_reconnects_once_on_401():
+    async def scenario():
+        sheet = FakeWorksheet()
+        sheet.expire_token()
+        executor = SheetsExecutor(reconnect=sheet.reconnect)
+        rows = await executor.run(sheet.get_all_values)
+        executor.shutdown()
+        return sheet, rows, executor.breaker
+
+    sheet, rows, breaker = run(scenario())
+
+    assert rows == sheet.rows
+    assert sheet.reconnects == 1
+    assert breaker.failures == 0
+
+
+def test_second_401_after_reconnect_is_raised():
+    async def scenario():
+        sheet = FakeWorksheet()
+        sheet.expire_token()
+        reconnects = []
+        executor = SheetsExecutor(reconnect=lambda: reconnects.append(1))
+        with pytest.raises(APIError) as raised:
+            await executor.run(sheet.get_all_values)
+        executor.shutdown()
+        return raised.value, reconnects, sheet
+
+    error, reconnects, sheet = run(scenario())
+
+    assert error.response.status_code == 401
+    assert reconnects == [1]
+    assert sheet.requests == 2
+
+
+def test_401_without_reconnect_is_raised():
+    async def scenario():
+        sheet = FakeWorksheet()
+        sheet.expire_token()
+        executor = SheetsExecutor()
+        with pytest.raises(APIError):
+            await executor.run(sheet.get_all_values)
+        executor.shutdown()
+        return sheet
+
+    assert run(scenario()).requests == 1
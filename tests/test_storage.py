@@ -0,0 +1,136 @@
+"""
+🧪 Локальное хранилище SQLite (SQLiteReminderStorage) без сети
+База — временный файл, таблица не подключена.
+"""
+
+import asyncio
+
+import pytest
+
+from models import STATUS_NOT_SENT, STATUS_SENT
+from storage import SQLiteReminderStorage
+
+GROUP = -1002146448322
+OTHER_GROUP = -1009
+
+
+def row(text: str, repeat: str = "❌ Не повторять", status: str = STATUS_NOT_SENT):
+    return [text, '18.10.2026', '09:00', repeat, '@anna', '17.10.2026 10:20', '18.10.2026 09:00', status]
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Запускает scenario(storage) на новой базе и закрывает ее"""
+    path = str(tmp_path / 'reminders.db')
+
+    def run(scenario, default_chat_id=GROUP):
+        async def main():
+            storage = SQLiteReminderStorage(path, default_chat_id=default_chat_id)
+            try:
+                return await scenario(storage)
+            finally:
+                await storage.close()
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_save_and_get(run):
+    async def scenario(storage):
+        first = await storage.save(row("Созвон"), 1000.0)
+        second = await storage.save(['Отчет', '19.10.2026'], None, chat_id=OTHER_GROUP)
+        return first, second, await storage.get(first), await storage.get(second), await storage.get(999)
+
+    first, second, saved, short, missing = run(scenario)
+
+    assert second == first + 1
+    assert saved == row("Созвон")
+    # Короткая строка дополняется до колонок A-H
+    assert short == ['Отчет', '19.10.2026', '', '', '', '', '', '']
+    assert missing is None
+
+
+def test_chat_of_uses_default_partition(run):
+    async def scenario(storage):
+        mine = await storage.save(row("Созвон"), 1000.0)
+        other = await storage.save(row("Отчет"), 1000.0, chat_id=OTHER_GROUP)
+        return storage.chat_of(mine), storage.chat_of(other), storage.chat_of(999)
+
+    assert run(scenario) == (GROUP, OTHER_GROUP, None)
+
+
+def test_list_all_in_id_order(run):
+    async def scenario(storage):
+        ids = [await storage.save(row(text), due) for text, due in (("Б", 300.0), ("А", 100.0), ("В", None))]
+        return ids, await storage.list_all()
+
+    ids, listed = run(scenario)
+
+    assert [reminder_id for reminder_id, _ in listed] == ids
+    assert [data[0] for _, data in listed] == ["Б", "А", "В"]
+
+
+def test_delete_only_within_partition(run):
+    async def scenario(storage):
+        reminder_id = await storage.save(row("Созвон"), 1000.0)
+        from_other_chat = await storage.delete(reminder_id, chat_id=OTHER_GROUP)
+        kept = await storage.get(reminder_id)
+        deleted = await storage.delete(reminder_id, chat_id=GROUP)
+        again = await storage.delete(reminder_id)
+        return from_other_chat, kept, deleted, again, await storage.list_all()
+
+    from_other_chat, kept, deleted, again, listed = run(scenario)
+
+    assert from_other_chat is False and kept is not None
+    assert deleted is True and again is False
+    assert listed == []
+
+
+def test_mark_sent_many_and_query_due(run):
+    async def scenario(storage):
+        early = await storage.save(row("Раньше"), 100.0)
+        late = await storage.save(row("Позже"), 200.0)
+        future = await storage.save(row("Потом"), 5000.0)
+        await storage.save(row("Без срока"), None)
+        await storage.mark_sent_many([early, future])
+        due = await storage.query_due(until=1000.0)
+        everything = await storage.query_due()
+        return early, late, future, due, everything, await storage.get(early)
+
+    early, late, future, due, everything, sent = run(scenario)
+
+    assert [reminder.id for reminder in due] == [late]
+    assert due[0].chat_id == GROUP and due[0].due_at == 200.0
+    assert [reminder.id for reminder in everything] == [late]
+    assert sent[7] == STATUS_SENT
+
+
+def test_reschedule_moves_due_time(run):
+    async def scenario(storage):
+        reminder_id = await storage.save(row("Планерка", "🔄 Каждый день"), 100.0)
+        await storage.reschedule(reminder_id, 86500.0, '19.10.2026 09:00')
+        return await storage.get(reminder_id), await storage.query_due()
+
+    saved, due = run(scenario)
+
+    assert saved[6] == '19.10.2026 09:00'
+    assert due[0].due_at == 86500.0
+
+
+def test_data_survives_reopening(run):
+    async def write(storage):
+        kept = await storage.save(row("Созвон"), 1000.0, chat_id=OTHER_GROUP)
+        gone = await storage.save(row("Отмена"), 1000.0)
+        await storage.delete(gone)
+        await storage.mark_sent(kept)
+        return kept
+
+    async def read(storage):
+        return await storage.list_all(), storage.count()
+
+    kept = run(write)
+    listed, count = run(read)
+
+    assert count == 1
+    assert listed == [(kept, row("Созвон", status=STATUS_SENT))]
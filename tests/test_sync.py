@@ -0,0 +1,189 @@
+"""
+🧪 Синхронизация SQLite ⇄ Google Sheets и сжатие таблицы
+Таблица — FakeWorksheet из benchmarks/fakes.py, база — временный файл SQLite.
+"""
+
+import asyncio
+
+import pytest
+
+from fakes import FakeWorksheet
+from storage import (
+    ReminderRepository,
+    SheetsCompactor,
+    SheetsExecutor,
+    SheetsMirror,
+    SheetsWriteQueue,
+    SQLiteReminderStorage,
+)
+from sync import SheetsSync
+
+
+class Setup:
+    """База с зеркалом в поддельную таблицу, синхронизация и сжатие"""
+
+    def __init__(self, path: str, with_sync: bool = True):
+        self.sheet = FakeWorksheet()
+        self.executor = SheetsExecutor()
+        self.writer = SheetsWriteQueue(self.sheet, self.executor, flush_interval=0.01)
+        self.repo = ReminderRepository(self.sheet, self.executor, self.writer, ttl=0)
+        self.storage = SQLiteReminderStorage(path, mirror=SheetsMirror(self.repo))
+        self.removed = []
+        self.storage.on_sheet_removed = self.removed.append
+        self.sync = SheetsSync(
+            self.storage, self.repo, self.storage.mirror,
+            parse_due=lambda text: None,
+            on_upsert=lambda reminder_id, due_at, row: None,
+            on_remove=self.removed.append,
+        )
+        self.compactor = SheetsCompactor(self.storage, self.repo, sync=self.sync if with_sync else None)
+
+    async def save(self, text: str) -> int:
+        reminder_id = await self.storage.save([text, '01.01', '09:00', '', '', '', '', ''], None)
+        await self.storage.mirror.drain()
+        return reminder_id
+
+    def erase_by_hand(self, text: str):
+        """Человек стирает строку в таблице (колонки A-I)"""
+        for row in self.sheet.rows:
+            if row and row[0] == text:
+                row[:] = [''] * len(row)
+        self.sheet.modified += 1
+
+    def insert_by_hand(self, text: str):
+        """Человек вставляет строку первой — строки ниже сдвигаются"""
+        self.sheet.rows.insert(1, [text, '02.02', '10:00', '', '', '', '', '', ''])
+        self.sheet.modified += 1
+
+    def linked(self):
+        """ID напоминания -> (номер строки, текст)"""
+        return {reminder_id: (sheet_row, row[0]) for reminder_id, sheet_row, _, row in self.storage.sheet_state()}
+
+    def sheet_texts(self):
+        return [row[0] for row in self.sheet.rows[1:]]
+
+    async def close(self):
+        await self.storage.close()
+        self.executor.shutdown()
+
+
+@pytest.mark.parametrize('with_sync', [True, False], ids=['sync-first', 'compaction-only'])
+def test_compaction_does_not_resurrect_row_erased_by_hand(tmp_path, with_sync):
+    async def scenario():
+        setup = Setup(str(tmp_path / 'reminders.db'), with_sync=with_sync)
+        first = await setup.save('Первое')
+        await setup.save('Второе')
+        await setup.sync.sync_once()
+
+        # Строку стерли вручную, и сжатие прошло раньше очередной синхронизации
+        setup.erase_by_hand('Первое')
+        assert await setup.compactor.compact_once() == 1
+        await setup.sync.sync_once()
+        await setup.storage.mirror.drain()
+
+        texts = setup.sheet_texts()
+        local = [row[0] for _, row in await setup.storage.list_all()]
+        await setup.close()
+        return first, texts, local, setup.removed
+
+    first, texts, local, removed = asyncio.run(scenario())
+
+    assert texts == ['Второе']
+    assert local == ['Второе']
+    assert removed == [first]
+
+
+def test_compaction_keeps_rows_below_linked(tmp_path):
+    async def scenario():
+        setup = Setup(str(tmp_path / 'reminders.db'))
+        first = await setup.save('Первое')
+        second = await setup.save('Второе')
+        await setup.storage.delete(first)
+        await setup.storage.mirror.drain()
+
+        await setup.compactor.compact_once()
+        await setup.storage.mark_sent(second)
+        await setup.storage.mirror.drain()
+        rows = [list(row) for row in setup.sheet.rows[1:]]
+        await setup.close()
+        return second, rows
+
+    second, rows = asyncio.run(scenario())
+
+    assert len(rows) == 1
+    assert rows[0][0] == 'Второе'
+    assert rows[0][7] == '✅ Отправлено'
+    assert rows[0][8] == str(second)
+
+
+def test_identical_rows_moved_are_matched_by_id(tmp_path):
+    async def scenario():
+        setup = Setup(str(tmp_path / 'reminders.db'))
+        first = await setup.save('Планерка')
+        second = await setup.save('Планерка')
+        await setup.sync.sync_once()
+
+        setup.insert_by_hand('Новое')
+        await setup.sync.sync_once()
+        await setup.storage.mirror.drain()
+        linked = setup.linked()
+        await setup.close()
+        return first, second, linked, setup.removed
+
+    first, second, linked, removed = asyncio.run(scenario())
+
+    # Одинаковые по содержимому строки не путаются и не пересоздаются
+    assert linked[first] == (3, 'Планерка')
+    assert linked[second] == (4, 'Планерка')
+    assert removed == []
+    assert sorted(text for _, text in linked.values()) == ['Новое', 'Планерка', 'Планерка']
+
+
+def test_row_moved_and_edited_keeps_its_reminder(tmp_path):
+    async def scenario():
+        setup = Setup(str(tmp_path / 'reminders.db'))
+        await setup.save('Первое')
+        second = await setup.save('Второе')
+        await setup.sync.sync_once()
+
+        setup.insert_by_hand('Новое')
+        for row in setup.sheet.rows:
+            if row[0] == 'Второе':
+                row[0] = 'Второе, исправлено'
+        await setup.sync.sync_once()
+        await setup.storage.mirror.drain()
+        linked = setup.linked()
+        await setup.close()
+        return second, linked, setup.removed
+
+    second, linked, removed = asyncio.run(scenario())
+
+    assert linked[second] == (4, 'Второе, исправлено')
+    assert removed == []
+    assert len(linked) == 3
+
+
+def test_ambiguous_hash_without_id_is_not_moved(tmp_path):
+    async def scenario():
+        setup = Setup(str(tmp_path / 'reminders.db'))
+        first = await setup.save('Планерка')
+        second = await setup.save('Планерка')
+        await setup.sync.sync_once()
+
+        # Колонку I стерли, строки сдвинулись: по содержимому их не различить
+        setup.insert_by_hand('Новое')
+        setup.insert_by_hand('Еще новое')
+        for row in setup.sheet.rows[1:]:
+            if row[0] == 'Планерка':
+                row[8] = ''
+        moves = []
+        move = setup.storage.move_sheet_row
+        setup.storage.move_sheet_row = lambda reminder_id, sheet_row: (
+            moves.append(reminder_id), move(reminder_id, sheet_row))
+        await setup.sync.sync_once()
+        await setup.close()
+        return first, second, moves
+
+    first, second, moves = asyncio.run(scenario())
+
+    assert moves == []
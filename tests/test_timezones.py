@@ -0,0 +1,179 @@
+"""
+🧪 Часовые пояса чатов
+Поиск пояса по имени, ввод дат в поясе чата и перенос повторов
+через переход на летнее/зимнее время в поясе, отличном от пояса бота.
+"""
+
+import asyncio
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import pytz
+
+import bot
+from dateparse import parse_when
+from models import Reminder
+from scheduler import ReminderScheduler
+from storage import ChatRegistry, SQLiteReminderStorage
+from timezones import describe_timezone, find_timezone, get_timezone
+
+BERLIN = get_timezone('Europe/Berlin')
+NEW_YORK = get_timezone('America/New_York')
+FORMAT = "%d.%m.%Y %H:%M %Z"
+NEW_YORK_CHAT = -1001
+
+
+def local(tz, *fields):
+    return tz.localize(datetime(*fields))
+
+
+# ========== ПОИСК ПОЯСА ==========
+@pytest.mark.parametrize('text, expected', [
+    ("Asia/Yekaterinburg", "Asia/Yekaterinburg"),
+    ("asia/yekaterinburg", "Asia/Yekaterinburg"),
+    ("  EUROPE/BERLIN ", "Europe/Berlin"),
+    ("UTC", "UTC"),
+    ("Europe/Atlantis", None),
+    ("Екатеринбург", None),
+    ("", None),
+])
+def test_find_timezone(text, expected):
+    assert find_timezone(text) == expected
+
+
+def test_get_timezone_returns_one_object_per_zone():
+    assert get_timezone('Europe/Berlin') is get_timezone('Europe/Berlin')
+    assert get_timezone('Europe/Berlin').zone == 'Europe/Berlin'
+
+
+def test_get_timezone_rejects_unknown_name():
+    with pytest.raises(pytz.UnknownTimeZoneError):
+        get_timezone('Europe/Atlantis')
+
+
+@pytest.mark.parametrize('moment, expected', [
+    (datetime(2026, 1, 15, 12, tzinfo=pytz.utc), "Europe/Berlin (UTC+01:00)"),
+    (datetime(2026, 7, 15, 12, tzinfo=pytz.utc), "Europe/Berlin (UTC+02:00)"),
+])
+def test_describe_timezone_uses_offset_at_moment(moment, expected):
+    assert describe_timezone(BERLIN, moment) == expected
+
+
+def test_registry_falls_back_to_partition_then_default(tmp_path):
+    registry = ChatRegistry(str(tmp_path / 'chats.db'), default_timezone='Europe/Moscow')
+    registry.set_timezone(NEW_YORK_CHAT, 'America/New_York')
+
+    assert registry.timezone(NEW_YORK_CHAT) is NEW_YORK
+    assert registry.timezone(42, NEW_YORK_CHAT) is NEW_YORK
+    assert registry.timezone(42).zone == 'Europe/Moscow'
+    registry.close()
+
+
+# ========== ВВОД ДАТ В ПОЯСЕ ЧАТА ==========
+def test_nonexistent_time_moves_forward():
+    # 28.03.2027 в 02:00 часы в Берлине переводятся на 03:00
+    when = parse_when("28.03 02:30", local(BERLIN, 2027, 3, 20, 12, 0))
+
+    assert when.moment.strftime(FORMAT) == "28.03.2027 03:30 CEST"
+
+
+def test_ambiguous_time_uses_standard_time():
+    # 25.10.2026 в 03:00 часы в Берлине переводятся на 02:00
+    when = parse_when("25.10 02:30", local(BERLIN, 2026, 10, 20, 12, 0))
+
+    assert when.moment.strftime(FORMAT) == "25.10.2026 02:30 CET"
+
+
+def test_same_phrase_in_different_zones():
+    moment = datetime(2026, 10, 17, 7, 20, tzinfo=pytz.utc)
+    moscow = parse_when("завтра в 9", moment.astimezone(get_timezone('Europe/Moscow'))).moment
+    yekaterinburg = parse_when("завтра в 9", moment.astimezone(get_timezone('Asia/Yekaterinburg'))).moment
+
+    assert moscow.timestamp() - yekaterinburg.timestamp() == 2 * 3600
+
+
+def test_column_g_round_trips_in_default_zone():
+    # Колонка G пишется в поясе бота и разбирается обратно в тот же срок
+    rng = random.Random(7)
+    start = local(BERLIN, 2026, 1, 1, 0, 0).timestamp()
+    for _ in range(2_000):
+        epoch = start + rng.randrange(0, 3 * 365 * 86400 // 60) * 60
+        text = datetime.fromtimestamp(epoch, bot.TIMEZONE).strftime(bot.REMINDER_DATETIME_FORMAT)
+        assert bot.parse_reminder_timestamp(text) == epoch, text
+
+
+# ========== ПЛАНИРОВАНИЕ ЧЕРЕЗ ПЕРЕХОД ==========
+class Setup:
+    """Хранилище, планировщик и реестр чатов; чат NEW_YORK_CHAT — в поясе Нью-Йорка"""
+
+    def __init__(self, path):
+        self.storage = SQLiteReminderStorage(str(path / 'reminders.db'))
+        self.registry = ChatRegistry(str(path / 'chats.db'))
+        self.registry.set_timezone(NEW_YORK_CHAT, 'America/New_York')
+        self.scheduler = ReminderScheduler(lambda reminder_id, payload: None)
+        self.application = SimpleNamespace(bot_data={
+            'storage': self.storage, 'scheduler': self.scheduler, 'chats': self.registry,
+        })
+
+    async def add(self, repeat: str, due: datetime) -> Reminder:
+        row = ['Созвон', '', '', repeat, 'tester', '', '', '']
+        reminder_id = await self.storage.save(row, due.timestamp(), chat_id=NEW_YORK_CHAT)
+        return Reminder.from_row(reminder_id, row, due.timestamp(), NEW_YORK_CHAT)
+
+    def scheduled(self, reminder_id: int) -> datetime:
+        return datetime.fromtimestamp(self.scheduler._entries[reminder_id][0], NEW_YORK)
+
+    async def close(self):
+        await self.storage.close()
+        self.registry.close()
+
+
+def test_daily_repeat_keeps_chat_wall_clock_across_fall_back(tmp_path):
+    # Нью-Йорк: 03.11.2030 часы переводятся назад; пояс бота — Москва, без перехода
+    async def scenario():
+        setup = Setup(tmp_path)
+        anchor = local(NEW_YORK, 2030, 11, 2, 18, 0)
+        reminder = await setup.add("🔄 Каждый день", anchor)
+        bot.schedule_reminder(setup.scheduler, reminder, NEW_YORK)
+        fired = setup.scheduler._entries[reminder.id][3][1]
+        setup.scheduler.cancel(reminder.id)
+
+        done = await bot.advance_reminder(setup.application, reminder, fired)
+        following = setup.scheduled(reminder.id)
+        due_at = (await setup.storage.query_due())[0].due_at
+        await setup.close()
+        return anchor, done, following, due_at
+
+    anchor, done, following, due_at = asyncio.run(scenario())
+
+    assert not done
+    assert following.strftime(FORMAT) == "03.11.2030 18:00 EST"
+    assert following.timestamp() - anchor.timestamp() == 25 * 3600
+    assert due_at == following.timestamp()
+
+
+def test_pre_alert_in_chat_zone_across_spring_forward(tmp_path):
+    # Нью-Йорк: 10.03.2030 часы переводятся вперед; "за день до" — по местным часам
+    async def scenario():
+        setup = Setup(tmp_path)
+        event = local(NEW_YORK, 2030, 3, 10, 10, 0)
+        reminder = await setup.add("⏰ За день до", event)
+        bot.schedule_reminder(setup.scheduler, reminder, setup.registry.timezone(NEW_YORK_CHAT))
+        pre_alert = setup.scheduled(reminder.id)
+        occurrence = setup.scheduler._entries[reminder.id][3][1]
+        setup.scheduler.cancel(reminder.id)
+
+        done = await bot.advance_reminder(setup.application, reminder, occurrence)
+        main = setup.scheduled(reminder.id)
+        await setup.close()
+        return event, pre_alert, occurrence, done, main
+
+    event, pre_alert, occurrence, done, main = asyncio.run(scenario())
+
+    assert occurrence.is_pre_alert
+    assert pre_alert.strftime(FORMAT) == "09.03.2030 10:00 EST"
+    assert event.timestamp() - pre_alert.timestamp() == 23 * 3600
+    assert not done
+    assert main == event
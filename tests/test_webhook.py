@@ -0,0 +1,104 @@
+"""
+🧪 HTTP-сервер вебхука: прием обновлений, секрет, /health и /metrics
+Сервер поднимается через aiohttp TestClient, без сети и без Telegram.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram import Bot
+
+from webhook import SECRET_HEADER, WebhookServer
+
+SECRET = 'секрет'.encode('utf-8').hex()
+# Обновление в том виде, в каком его присылает Telegram
+RECORDED_UPDATE = {
+    'update_id': 7001,
+    'message': {
+        'message_id': 15, 'date': 1760000000, 'text': '/list',
+        'chat': {'id': -1002146448322, 'type': 'supergroup', 'title': 'Команда'},
+        'from': {'id': 501, 'is_bot': False, 'first_name': 'Анна'},
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 5}],
+    },
+}
+
+
+def run_server(scenario, health=None):
+    """Запускает scenario(client, application) на тестовом сервере"""
+    async def main():
+        application = SimpleNamespace(bot=Bot('123456:WEBHOOK'), update_queue=asyncio.Queue())
+        server = WebhookServer(application, secret=SECRET, health=health)
+        async with TestClient(TestServer(server.make_app())) as client:
+            return await scenario(client, application), server
+
+    return asyncio.run(main())
+
+
+def test_recorded_update_reaches_update_queue():
+    async def scenario(client, application):
+        response = await client.post('/telegram', json=RECORDED_UPDATE, headers={SECRET_HEADER: SECRET})
+        return response.status, application.update_queue.get_nowait()
+
+    (status, update), server = run_server(scenario)
+
+    assert status == 200
+    assert update.update_id == 7001
+    assert update.message.text == '/list'
+    assert update.effective_chat.id == -1002146448322
+    assert server.received == 1
+
+
+@pytest.mark.parametrize('headers', [{}, {SECRET_HEADER: 'чужой'.encode('utf-8').hex()}], ids=['missing', 'wrong'])
+def test_wrong_secret_is_forbidden(headers):
+    async def scenario(client, application):
+        response = await client.post('/telegram', json=RECORDED_UPDATE, headers=headers)
+        return response.status, application.update_queue.qsize()
+
+    (status, queued), server = run_server(scenario)
+
+    assert status == 403
+    assert queued == 0
+    assert server.rejected == 1
+
+
+@pytest.mark.parametrize('body', ['{"update_id": ', 'не json', '[1, 2]'], ids=['truncated', 'text', 'list'])
+def test_malformed_body_is_bad_request(body):
+    async def scenario(client, application):
+        response = await client.post(
+            '/telegram', data=body.encode('utf-8'),
+            headers={SECRET_HEADER: SECRET, 'Content-Type': 'application/json'},
+        )
+        return response.status, application.update_queue.qsize()
+
+    (status, queued), server = run_server(scenario)
+
+    assert status == 400
+    assert queued == 0
+
+
+def test_health_reports_server_and_bot_state():
+    async def scenario(client, application):
+        response = await client.get('/health')
+        return response.status, await response.json()
+
+    (status, body), _ = run_server(scenario, health=lambda: {'scheduled': 3, 'delivery': {'queue_depth': 0}})
+
+    assert status == 200
+    assert body['status'] == 'ok'
+    assert body['updates_received'] == 0
+    assert body['scheduled'] == 3
+    assert body['delivery'] == {'queue_depth': 0}
+
+
+def test_metrics_are_served_as_prometheus_text():
+    async def scenario(client, application):
+        response = await client.get('/metrics')
+        return response.status, response.content_type, await response.text()
+
+    (status, content_type, text), _ = run_server(scenario)
+
+    assert status == 200
+    assert content_type == 'text/plain'
+    assert '# TYPE bot_handler_seconds histogram' in text
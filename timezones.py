@@ -0,0 +1,37 @@
+"""
+🌍 ЧАСОВЫЕ ПОЯСА
+Сроки напоминаний хранятся в секундах epoch (UTC): планировщик и индекс
+сравнивают числа, а часовой пояс нужен только на краях — чтобы разобрать
+введенную дату, посчитать следующий повтор "по часам" и показать срок.
+У каждого чата может быть свой пояс (/tz), поэтому объекты pytz
+создаются один раз на пояс и дальше берутся из кэша.
+"""
+
+import functools
+from datetime import datetime, tzinfo
+from typing import Optional
+
+import pytz
+
+DEFAULT_TIMEZONE = 'Europe/Moscow'
+
+# "asia/yekaterinburg" -> "Asia/Yekaterinburg"
+_NAMES = {name.lower(): name for name in pytz.all_timezones}
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name: str) -> tzinfo:
+    """Объект пояса по имени IANA (один на пояс)"""
+    return pytz.timezone(name)
+
+
+def find_timezone(text: str) -> Optional[str]:
+    """Имя пояса IANA без учета регистра: "asia/yekaterinburg" -> "Asia/Yekaterinburg" """
+    return _NAMES.get(text.strip().lower())
+
+
+def describe_timezone(tz: tzinfo, now: Optional[datetime] = None) -> str:
+    """ "Asia/Yekaterinburg (UTC+05:00)" — смещение на момент now"""
+    local = (now or datetime.now(pytz.utc)).astimezone(tz)
+    offset = local.strftime('%z')
+    return f"{tz} (UTC{offset[:3]}:{offset[3:]})"
@@ -0,0 +1,152 @@
+"""
+🌐 ВЕБХУК: ПРИЕМ ОБНОВЛЕНИЙ ПО HTTP
+Вместо постоянного опроса Telegram (run_polling) обновления приходят
+POST-запросами на путь вебхука и сразу кладутся в очередь приложения:
+Telegram получает ответ, не дожидаясь обработки, а в простое бот
+не держит открытых запросов. На том же сервере GET /health —
+проверка живости для Koyeb, и GET /metrics — метрики для Prometheus.
+В режиме опроса сервер поднимается без пути вебхука, только ради
+/health и /metrics.
+
+Проверка без Telegram: если WEBHOOK_URL не задан, вебхук в Telegram
+не регистрируется, а сервер принимает записанные обновления:
+    BOT_MODE=webhook python bot.py
+    curl -X POST localhost:8000/telegram -H 'Content-Type: application/json' -d @update.json
+"""
+
+import asyncio
+import contextlib
+import hmac
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+import metrics
+
+# Telegram повторяет secret_token из setWebhook в этом заголовке
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    """
+    aiohttp-сервер: POST path — обновления Telegram (path=None — без вебхука),
+    GET /health — состояние, GET /metrics — метрики
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        path: Optional[str] = '/telegram',
+        secret: str = '',
+        host: str = '0.0.0.0',
+        port: int = 8000,
+        health: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.application = application
+        self.path = path
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.health = health
+        self.received = 0
+        self.rejected = 0
+        self._started = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        if self.path:
+            app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/health', self.handle_health)
+        app.router.add_get('/metrics', self.handle_metrics)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🌐 HTTP-сервер слушает {self.host}:{self.port} ({self.path or '/health, /metrics'})")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), self.secret):
+            self.rejected += 1
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            update = None
+            print(f"⚠️ Вебхук: не удалось разобрать обновление: {e}")
+        if update is None:
+            self.rejected += 1
+            return web.Response(status=400)
+
+        # Обработка — в приложении; Telegram ждет только постановки в очередь
+        self.received += 1
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        status = {
+            'status': 'ok',
+            'uptime_seconds': round(time.monotonic() - self._started),
+            'updates_received': self.received,
+            'updates_rejected': self.rejected,
+            'update_queue': self.application.update_queue.qsize(),
+        }
+        if self.health is not None:
+            status.update(self.health())
+        return web.json_response(status)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+
+async def serve_webhook(
+    application: Application,
+    server: WebhookServer,
+    url: str,
+    allowed_updates: List[str],
+):
+    """
+    Жизненный цикл приложения в режиме вебхука — тот же порядок, что
+    у run_polling: initialize, post_init, start ... stop, shutdown, post_shutdown.
+    Работает до SIGINT/SIGTERM.
+    """
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stopped.set)
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    try:
+        await server.start()
+        await application.start()
+        if url:
+            await application.bot.set_webhook(
+                url.rstrip('/') + server.path,
+                allowed_updates=allowed_updates,
+                secret_token=server.secret or None,
+            )
+            print(f"✅ Вебхук зарегистрирован: {url.rstrip('/')}{server.path}")
+        else:
+            print("ℹ️ WEBHOOK_URL не задан — вебхук в Telegram не зарегистрирован (локальная проверка)")
+        await stopped.wait()
+    finally:
+        await server.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)